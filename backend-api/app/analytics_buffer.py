@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import threading
+
+from app.analytics_store import ingest_event, ingest_events
+from app.runtime_env import read_bool_env, read_float_env
+from app.schemas import AnalyticsEventRequest, AnalyticsIngestStatsResponse
+
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_SYNC = "sync"
+_OVERFLOW_POLICIES = {OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST, OVERFLOW_SYNC}
+
+_logger = logging.getLogger(__name__)
+
+
+class AnalyticsEventBuffer:
+    """Bounded asyncio queue that writes analytics events in bulk off the request path.
+
+    A background task flushes every `batch_size` events or `flush_interval_ms`, whichever
+    comes first. When the queue is full the overflow policy either drops the new event,
+    evicts the oldest one, or writes it straight away on a worker thread.
+    """
+
+    def __init__(
+        self,
+        max_events: int = 10000,
+        batch_size: int = 500,
+        flush_interval_ms: float = 250.0,
+        overflow_policy: str = OVERFLOW_DROP_NEWEST,
+    ) -> None:
+        self.max_events = max(1, max_events)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval_seconds = max(0.001, flush_interval_ms / 1000)
+        self.overflow_policy = overflow_policy if overflow_policy in _OVERFLOW_POLICIES else OVERFLOW_DROP_NEWEST
+        self._queue: asyncio.Queue[AnalyticsEventRequest] | None = None
+        self._batch_ready: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._overflow_writes: set[asyncio.Task[None]] = set()
+        self._stopping = False
+        self._stats_lock = threading.Lock()
+        self._stats = {"enqueued": 0, "flushed": 0, "dropped": 0, "failed": 0, "written_sync": 0, "flushes": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.max_events)
+        self._batch_ready = asyncio.Event()
+        self._stopping = False
+        self._task = self._loop.create_task(self._flush_loop(), name="analytics-event-buffer")
+
+    async def stop(self) -> None:
+        """Stop the flush task once it has written everything still queued."""
+        task = self._task
+        if task is None or self._batch_ready is None:
+            return
+        self._stopping = True
+        self._batch_ready.set()
+        await task
+        if self._overflow_writes:
+            await asyncio.gather(*self._overflow_writes)
+        self._task = None
+
+    def enqueue(self, event: AnalyticsEventRequest) -> None:
+        if not self.running or self._loop is None:
+            # No flush task (scripts, tests, startup not run): keep the old synchronous write.
+            ingest_event(event)
+            self._count("written_sync")
+            return
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._put(event)
+        else:
+            # asyncio.Queue is not thread-safe; hand events from worker threads to the loop.
+            self._loop.call_soon_threadsafe(self._put, event)
+
+    def stats(self) -> AnalyticsIngestStatsResponse:
+        with self._stats_lock:
+            counters = dict(self._stats)
+        return AnalyticsIngestStatsResponse(
+            running=self.running,
+            queued=self._queue.qsize() if self._queue is not None else 0,
+            max_events=self.max_events,
+            batch_size=self.batch_size,
+            flush_interval_ms=int(self.flush_interval_seconds * 1000),
+            overflow_policy=self.overflow_policy,
+            **counters,
+        )
+
+    def _put(self, event: AnalyticsEventRequest) -> None:
+        assert self._queue is not None and self._batch_ready is not None
+        if self._queue.full():
+            if self.overflow_policy == OVERFLOW_SYNC and len(self._overflow_writes) < self.max_events:
+                # The insert blocks, so it runs on a worker thread instead of stalling the loop.
+                write = asyncio.get_running_loop().create_task(self._write_overflow(event))
+                self._overflow_writes.add(write)
+                write.add_done_callback(self._overflow_writes.discard)
+                return
+            if self.overflow_policy in (OVERFLOW_DROP_NEWEST, OVERFLOW_SYNC):
+                # drop_newest, or sync with as many overflow writes already in flight.
+                self._count("dropped")
+                return
+            self._queue.get_nowait()
+            self._count("dropped")
+        self._queue.put_nowait(event)
+        self._count("enqueued")
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    async def _write_overflow(self, event: AnalyticsEventRequest) -> None:
+        try:
+            await asyncio.to_thread(ingest_event, event)
+        except Exception:  # noqa: BLE001
+            _logger.warning("analytics overflow write failed; dropping event", exc_info=True)
+            self._count("failed")
+            return
+        self._count("written_sync")
+
+    async def _flush_loop(self) -> None:
+        assert self._queue is not None and self._batch_ready is not None
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.flush_interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            while not self._queue.empty():
+                await self._flush(self._drain())
+            if self._stopping:
+                return
+
+    def _drain(self) -> list[AnalyticsEventRequest]:
+        assert self._queue is not None
+        batch: list[AnalyticsEventRequest] = []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _flush(self, batch: list[AnalyticsEventRequest]) -> None:
+        if not batch:
+            return
+        try:
+            written = await asyncio.to_thread(ingest_events, batch)
+        except Exception:  # noqa: BLE001
+            _logger.warning("analytics buffer flush failed; dropping %s events", len(batch), exc_info=True)
+            self._count("failed", len(batch))
+            return
+        self._count("flushed", written)
+        self._count("flushes")
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+
+_buffer = AnalyticsEventBuffer(
+    max_events=int(read_float_env("ANALYTICS_BUFFER_MAX_EVENTS", 10000)),
+    batch_size=int(read_float_env("ANALYTICS_BUFFER_BATCH_SIZE", 500)),
+    flush_interval_ms=read_float_env("ANALYTICS_BUFFER_FLUSH_MS", 250.0),
+    overflow_policy=os.getenv("ANALYTICS_BUFFER_OVERFLOW", OVERFLOW_DROP_NEWEST).strip().lower(),
+)
+
+
+def enqueue_event(event: AnalyticsEventRequest) -> None:
+    _buffer.enqueue(event)
+
+
+def start_analytics_buffer() -> bool:
+    if not read_bool_env("ANALYTICS_BUFFER_ENABLED", True):
+        return False
+    _buffer.start()
+    return True
+
+
+async def stop_analytics_buffer() -> None:
+    await _buffer.stop()
+
+
+def get_analytics_buffer_stats() -> AnalyticsIngestStatsResponse:
+    return _buffer.stats()
@@ -0,0 +1,422 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import Select, delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.analytics_partitions import analytics_events_source
+from app.analytics_rollup_store import advance_watermark, hll_precision
+from app.db import session_scope
+from app.hyperloglog import HyperLogLog
+from app.models import (
+    AnalyticsDailyFunnelModel,
+    AnalyticsRollupStateModel,
+    AuthSessionModel,
+    CreditLedgerEntryModel,
+    SubscriptionEntitlementModel,
+)
+from app.retention_store import retention_cutoff
+from app.runtime_env import read_bool_env, read_float_env
+from app.schemas import AnalyticsFunnelRefreshResponse
+from app.time_utils import utc_now
+
+CHECKOUT_EVENTS = ("checkout_started", "web_checkout_started", "checkout_session_started")
+# Stages counted as distinct users; checkout starts are counted as events.
+USER_STAGES = ("login", "preview", "final", "paid")
+
+_STATE_NAME = "analytics_daily_funnel"
+_WATERMARK_OVERLAP = timedelta(minutes=5)
+_SCAN_BATCH_SIZE = 5000
+_LOOKUP_CHUNK_SIZE = 500
+_RENDER_STAGES = {"render_preview": "preview", "render_final": "final"}
+_SOURCE_PLATFORMS = {"ios": "ios", "android": "android", "web": "web"}
+_MIDNIGHT = datetime.min.time()
+
+_refresh_lock = threading.Lock()
+_scheduler_thread: threading.Thread | None = None
+_scheduler_stop = threading.Event()
+_logger = logging.getLogger(__name__)
+
+FunnelKey = tuple[str, str]
+# (stage, user_id, platform, plan_id); platform and plan are hints resolved per user when missing.
+_Touch = tuple[str, str | None, str | None, str | None]
+
+
+@dataclass
+class FunnelSegment:
+    """Funnel stages for one (platform, plan_id) segment over a day or a merged window."""
+
+    platform: str
+    plan_id: str
+    checkout_starts: int = 0
+    users: dict[str, HyperLogLog] = field(
+        default_factory=lambda: {stage: HyperLogLog(precision=hll_precision()) for stage in USER_STAGES}
+    )
+
+    @property
+    def key(self) -> FunnelKey:
+        return (self.platform, self.plan_id)
+
+    def count(self, stage: str) -> int:
+        return self.users[stage].count()
+
+    def merge(self, other: FunnelSegment) -> None:
+        self.checkout_starts += other.checkout_starts
+        for stage in USER_STAGES:
+            self.users[stage].merge(other.users[stage])
+
+
+def merge_funnel_segments(segments: Iterable[FunnelSegment]) -> list[FunnelSegment]:
+    merged: dict[FunnelKey, FunnelSegment] = {}
+    for segment in segments:
+        current = merged.get(segment.key)
+        if current is None:
+            merged[segment.key] = segment
+        else:
+            current.merge(segment)
+    return list(merged.values())
+
+
+def aggregate_funnel(
+    since: datetime,
+    until: datetime,
+    written_after: datetime | None = None,
+    written_until: datetime | None = None,
+) -> list[FunnelSegment]:
+    """Build funnel segments for [since, until) straight from the source tables.
+
+    Sessions come from `auth_sessions`, previews and finals from render credit spends, checkout
+    starts from `analytics_events` and paid activations from active entitlements updated in the
+    range. Rows without a platform or plan are attributed to the user's latest session platform
+    and current active plan (`unknown` / `free` otherwise). `written_after` / `written_until`
+    further limit each source to rows written in (written_after, written_until].
+    """
+    events = analytics_events_source(since=since, until=until)
+    touches: list[_Touch] = []
+    with session_scope() as session:
+        sessions = select(AuthSessionModel.user_id, AuthSessionModel.platform).where(
+            AuthSessionModel.created_at >= since,
+            AuthSessionModel.created_at < until,
+            *_written_between(AuthSessionModel.created_at, written_after, written_until),
+        )
+        touches.extend(("login", user_id, platform, None) for user_id, platform in session.execute(sessions))
+
+        spends = select(
+            CreditLedgerEntryModel.user_id,
+            CreditLedgerEntryModel.reason,
+            CreditLedgerEntryModel.metadata_json,
+        ).where(
+            CreditLedgerEntryModel.created_at >= since,
+            CreditLedgerEntryModel.created_at < until,
+            CreditLedgerEntryModel.delta < 0,
+            CreditLedgerEntryModel.reason.in_(tuple(_RENDER_STAGES)),
+            *_written_between(CreditLedgerEntryModel.created_at, written_after, written_until),
+        )
+        touches.extend(
+            (_RENDER_STAGES[reason], user_id, None, (metadata or {}).get("plan_id"))
+            for user_id, reason, metadata in session.execute(spends)
+        )
+
+        checkouts = select(events.user_id, events.platform).where(
+            events.occurred_at >= since,
+            events.occurred_at < until,
+            events.event_name.in_(CHECKOUT_EVENTS),
+            *_written_between(events.created_at, written_after, written_until),
+        )
+        touches.extend(("checkout", user_id, platform, None) for user_id, platform in session.execute(checkouts))
+
+        activations = select(
+            SubscriptionEntitlementModel.user_id,
+            SubscriptionEntitlementModel.source,
+            SubscriptionEntitlementModel.plan_id,
+        ).where(
+            SubscriptionEntitlementModel.status == "active",
+            SubscriptionEntitlementModel.updated_at >= since,
+            SubscriptionEntitlementModel.updated_at < until,
+            *_written_between(SubscriptionEntitlementModel.updated_at, written_after, written_until),
+        )
+        touches.extend(
+            ("paid", user_id, _SOURCE_PLATFORMS.get(source), plan_id)
+            for user_id, source, plan_id in session.execute(activations)
+        )
+
+        unresolved = {user_id for _, user_id, platform, plan_id in touches if user_id and not (platform and plan_id)}
+        platforms, plans = _user_dimensions(session, unresolved)
+
+    segments: dict[FunnelKey, FunnelSegment] = {}
+    for stage, user_id, platform, plan_id in touches:
+        key = (platform or platforms.get(user_id or "") or "unknown", plan_id or plans.get(user_id or "") or "free")
+        segment = segments.get(key)
+        if segment is None:
+            segment = segments[key] = FunnelSegment(*key)
+        if stage == "checkout":
+            segment.checkout_starts += 1
+        elif user_id:
+            segment.users[stage].add(user_id)
+    return list(segments.values())
+
+
+def refresh_daily_funnel(now: datetime | None = None) -> AnalyticsFunnelRefreshResponse:
+    """Rebuild the days touched by funnel source rows written since the last refresh.
+
+    Like the hourly rollups, each dirty day is re-aggregated from the source tables and replaced
+    in one transaction, so refreshes are idempotent. Days whose sessions or checkout events may
+    already be purged are never rebuilt; rows written since the last refresh are merged into them.
+    """
+    started = time.perf_counter()
+    refreshed_at = now or utc_now()
+    with _refresh_lock:
+        with session_scope() as session:
+            state = session.get(AnalyticsRollupStateModel, _STATE_NAME)
+            watermark = state.watermark if state else None
+            scan_from = watermark - _WATERMARK_OVERLAP if watermark else None
+
+            dirty_days: set[date] = set()
+            rows_scanned = 0
+            for stmt in _dirty_day_queries(scan_from, refreshed_at):
+                for value in session.execute(stmt.execution_options(yield_per=_SCAN_BATCH_SIZE)).scalars():
+                    dirty_days.add(value.date())
+                    rows_scanned += 1
+
+        source_cutoff = _source_retention_cutoff(refreshed_at)
+        merge_days = sorted(
+            day for day in dirty_days if source_cutoff is not None and datetime.combine(day, _MIDNIGHT) < source_cutoff
+        )
+        rows_written = 0
+        for day in sorted(dirty_days.difference(merge_days)):
+            rows_written += _rebuild_day(day)
+
+        # Late rows are read up front (the window is fixed by the watermark) and merged in the same
+        # transaction that moves the watermark, so a refresh in another process cannot merge them again.
+        late_by_day = {day: _late_rows(day, watermark, refreshed_at) for day in merge_days}
+        try:
+            with session_scope() as session:
+                if advance_watermark(session, _STATE_NAME, expected=watermark, new=refreshed_at):
+                    for day, late in late_by_day.items():
+                        rows_written += _merge_late_rows(session, day, late, has_watermark=watermark is not None)
+                else:
+                    _logger.info("analytics funnel watermark moved concurrently; skipping late-row merges")
+        except IntegrityError:
+            _logger.info("analytics funnel watermark was created concurrently; skipping late-row merges")
+
+    return AnalyticsFunnelRefreshResponse(
+        watermark=refreshed_at,
+        days_rebuilt=len(dirty_days),
+        rows_scanned=rows_scanned,
+        rows_written=rows_written,
+        duration_ms=int((time.perf_counter() - started) * 1000),
+    )
+
+
+def load_daily_funnel(since_day: date, until_day: date | None = None) -> list[FunnelSegment]:
+    """Merge materialized days in [since_day, until_day) into one segment per (platform, plan_id)."""
+    stmt = select(AnalyticsDailyFunnelModel).where(AnalyticsDailyFunnelModel.day >= since_day)
+    if until_day is not None:
+        stmt = stmt.where(AnalyticsDailyFunnelModel.day < until_day)
+    with session_scope() as session:
+        return merge_funnel_segments(_segment_from_row(row) for row in session.execute(stmt).scalars())
+
+
+def load_funnel_window(since: datetime, until: datetime) -> list[FunnelSegment]:
+    """Funnel segments for [since, until): whole days from the daily table, the partial first day live."""
+    first_day = _ceil_day(since)
+    first_day_start = datetime.combine(first_day, _MIDNIGHT)
+    segments: list[FunnelSegment] = []
+    if since < first_day_start:
+        segments.extend(aggregate_funnel(since, min(first_day_start, until)))
+    if first_day_start < until:
+        segments.extend(load_daily_funnel(first_day, _ceil_day(until)))
+    return merge_funnel_segments(segments)
+
+
+def start_funnel_scheduler() -> bool:
+    global _scheduler_thread
+    if not read_bool_env("ANALYTICS_FUNNEL_SCHEDULER_ENABLED", True):
+        return False
+    if _scheduler_thread and _scheduler_thread.is_alive():
+        return True
+
+    _scheduler_stop.clear()
+    _scheduler_thread = threading.Thread(target=_scheduler_loop, name="analytics-funnel-scheduler", daemon=True)
+    _scheduler_thread.start()
+    return True
+
+
+def stop_funnel_scheduler(timeout: float = 5.0) -> None:
+    global _scheduler_thread
+    _scheduler_stop.set()
+    if _scheduler_thread:
+        _scheduler_thread.join(timeout=timeout)
+    _scheduler_thread = None
+
+
+def _dirty_day_queries(since: datetime | None, until: datetime) -> list[Select]:
+    """Queries yielding the timestamp that places each recently written source row in a day."""
+    events = analytics_events_source()
+    queries = [
+        (select(AuthSessionModel.created_at), AuthSessionModel.created_at, ()),
+        (
+            select(CreditLedgerEntryModel.created_at),
+            CreditLedgerEntryModel.created_at,
+            (
+                CreditLedgerEntryModel.delta < 0,
+                CreditLedgerEntryModel.reason.in_(tuple(_RENDER_STAGES)),
+            ),
+        ),
+        # Checkout events land on the day they occurred, but are found by insert time.
+        (select(events.occurred_at), events.created_at, (events.event_name.in_(CHECKOUT_EVENTS),)),
+        (
+            select(SubscriptionEntitlementModel.updated_at),
+            SubscriptionEntitlementModel.updated_at,
+            (SubscriptionEntitlementModel.status == "active",),
+        ),
+    ]
+    statements: list[Select] = []
+    for stmt, written_at, criteria in queries:
+        stmt = stmt.where(written_at <= until, *criteria)
+        if since is not None:
+            stmt = stmt.where(written_at >= since)
+        statements.append(stmt)
+    return statements
+
+
+def _written_between(column, after: datetime | None, until: datetime | None) -> list:
+    criteria = []
+    if after is not None:
+        criteria.append(column > after)
+    if until is not None:
+        criteria.append(column <= until)
+    return criteria
+
+
+def _source_retention_cutoff(now: datetime) -> datetime | None:
+    # Sessions and checkout events are purged by retention; ledger and entitlement rows are kept.
+    cutoffs = [
+        cutoff
+        for cutoff in (retention_cutoff("auth_sessions", now), retention_cutoff("analytics_events", now))
+        if cutoff is not None
+    ]
+    return max(cutoffs) if cutoffs else None
+
+
+def _user_dimensions(session: Session, user_ids: set[str]) -> tuple[dict[str, str], dict[str, str]]:
+    """Latest session platform and active plan for each user."""
+    platforms: dict[str, str] = {}
+    plans: dict[str, str] = {}
+    ordered = sorted(user_ids)
+    for offset in range(0, len(ordered), _LOOKUP_CHUNK_SIZE):
+        chunk = ordered[offset : offset + _LOOKUP_CHUNK_SIZE]
+        sessions = (
+            select(AuthSessionModel.user_id, AuthSessionModel.platform)
+            .where(AuthSessionModel.user_id.in_(chunk), AuthSessionModel.platform.is_not(None))
+            .order_by(AuthSessionModel.created_at)
+        )
+        for user_id, platform in session.execute(sessions):
+            if platform:
+                platforms[user_id] = platform
+        entitlements = select(SubscriptionEntitlementModel.user_id, SubscriptionEntitlementModel.plan_id).where(
+            SubscriptionEntitlementModel.user_id.in_(chunk),
+            SubscriptionEntitlementModel.status == "active",
+        )
+        plans.update({user_id: plan_id for user_id, plan_id in session.execute(entitlements)})
+    return platforms, plans
+
+
+def _rebuild_day(day: date) -> int:
+    day_start = datetime.combine(day, _MIDNIGHT)
+    segments = aggregate_funnel(day_start, day_start + timedelta(days=1))
+
+    updated_at = utc_now()
+    try:
+        with session_scope() as session:
+            session.execute(delete(AnalyticsDailyFunnelModel).where(AnalyticsDailyFunnelModel.day == day))
+            if segments:
+                session.execute(
+                    insert(AnalyticsDailyFunnelModel),
+                    [_row_from_segment(day, segment, updated_at) for segment in segments],
+                )
+    except IntegrityError:
+        # Another worker rebuilt the same day concurrently; its rows are equivalent.
+        _logger.info("analytics funnel for %s was rebuilt concurrently", day.isoformat())
+        return 0
+    return len(segments)
+
+
+def _late_rows(day: date, written_after: datetime | None, written_until: datetime) -> list[FunnelSegment]:
+    day_start = datetime.combine(day, _MIDNIGHT)
+    return aggregate_funnel(
+        day_start,
+        day_start + timedelta(days=1),
+        written_after=written_after,
+        written_until=written_until,
+    )
+
+
+def _merge_late_rows(session: Session, day: date, late: list[FunnelSegment], has_watermark: bool) -> int:
+    # Rebuilding a day past source retention would drop the sessions and checkouts already purged, so
+    # only rows written since the previous refresh are added onto the stored segments.
+    if not late:
+        return 0
+    stored = session.execute(
+        select(AnalyticsDailyFunnelModel).where(AnalyticsDailyFunnelModel.day == day)
+    ).scalars().all()
+    if stored and not has_watermark:
+        # No watermark to tell which rows the stored segments already hold; keep them as they are.
+        return 0
+    segments = merge_funnel_segments([*map(_segment_from_row, stored), *late])
+    updated_at = utc_now()
+    session.execute(delete(AnalyticsDailyFunnelModel).where(AnalyticsDailyFunnelModel.day == day))
+    session.execute(
+        insert(AnalyticsDailyFunnelModel),
+        [_row_from_segment(day, segment, updated_at) for segment in segments],
+    )
+    return len(late)
+
+
+def _row_from_segment(day: date, segment: FunnelSegment, updated_at: datetime) -> dict[str, object]:
+    return {
+        "day": day,
+        "platform": segment.platform,
+        "plan_id": segment.plan_id,
+        "login_users": segment.count("login"),
+        "preview_users": segment.count("preview"),
+        "final_users": segment.count("final"),
+        "checkout_starts": segment.checkout_starts,
+        "paid_activations": segment.count("paid"),
+        "user_sketches": {stage: segment.users[stage].to_json() for stage in USER_STAGES},
+        "updated_at": updated_at,
+    }
+
+
+def _segment_from_row(row: AnalyticsDailyFunnelModel) -> FunnelSegment:
+    sketches = row.user_sketches or {}
+    return FunnelSegment(
+        platform=row.platform,
+        plan_id=row.plan_id,
+        checkout_starts=int(row.checkout_starts),
+        users={
+            stage: HyperLogLog.from_json(sketches[stage]) if stage in sketches else HyperLogLog(hll_precision())
+            for stage in USER_STAGES
+        },
+    )
+
+
+def _ceil_day(value: datetime) -> date:
+    return value.date() if value.time() == _MIDNIGHT else value.date() + timedelta(days=1)
+
+
+def _scheduler_loop() -> None:
+    interval_seconds = max(10.0, read_float_env("ANALYTICS_FUNNEL_INTERVAL_SECONDS", 300.0))
+    while not _scheduler_stop.wait(interval_seconds):
+        try:
+            result = refresh_daily_funnel()
+            _logger.info("analytics funnel rebuilt %s days", result.days_rebuilt)
+        except Exception:  # noqa: BLE001
+            _logger.warning("analytics funnel refresh failed", exc_info=True)
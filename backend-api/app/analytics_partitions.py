@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import Column, Index, MetaData, Table, func, inspect, insert, select, text, union_all, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm.util import AliasedClass
+
+from app.db import Base, engine
+from app.models import AnalyticsEventModel, AnalyticsShardStateModel
+from app.runtime_env import read_bool_env, read_float_env
+from app.time_utils import utc_now
+
+PERIOD_DAY = "day"
+PERIOD_WEEK = "week"
+MODE_NATIVE = "native"
+MODE_SHARDED = "sharded"
+
+_TABLE = "analytics_events"
+_LEGACY_TABLE = "analytics_events_legacy"
+_DEFAULT_PARTITION = "analytics_events_default"
+_PERIOD_CODES = {PERIOD_DAY: "d", PERIOD_WEEK: "w"}
+_PARTITION_NAME = re.compile(r"^analytics_events_([dw])(\d{8})$")
+_PG_BOUND = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+_SHARD_STATE_NAME = "analytics_events"
+
+# Either the mapped model or an alias of it over a UNION ALL of shard tables.
+EventsSource = type[AnalyticsEventModel] | AliasedClass[AnalyticsEventModel]
+
+_shard_metadata = MetaData()
+_shard_lock = threading.Lock()
+_covered_until: datetime | None = None
+_logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class EventPartition:
+    """One time range of `analytics_events`; `lower=None` is the unbounded legacy partition."""
+
+    name: str
+    lower: datetime | None
+    upper: datetime
+
+    def overlaps(self, since: datetime | None, until: datetime | None) -> bool:
+        return (since is None or self.upper > since) and (until is None or self.lower is None or self.lower < until)
+
+
+def partition_period() -> str:
+    period = os.getenv("ANALYTICS_PARTITION_PERIOD", PERIOD_WEEK).strip().lower()
+    return period if period in _PERIOD_CODES else PERIOD_WEEK
+
+
+def partitioning_mode(bind: Connection | None = None) -> str | None:
+    """`native` on Postgres (declarative partitions), `sharded` on SQLite when enabled, else None."""
+    dialect = (bind or engine).dialect.name
+    if dialect == "postgresql":
+        return MODE_NATIVE
+    if dialect == "sqlite" and read_bool_env("ANALYTICS_SQLITE_SHARDS_ENABLED", False):
+        return MODE_SHARDED
+    return None
+
+
+def period_start(value: datetime, period: str | None = None) -> datetime:
+    day = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if (period or partition_period()) == PERIOD_WEEK:
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def period_end(start: datetime, period: str | None = None) -> datetime:
+    return start + timedelta(days=7 if (period or partition_period()) == PERIOD_WEEK else 1)
+
+
+def partition_name(start: datetime, period: str | None = None) -> str:
+    return f"{_TABLE}_{_PERIOD_CODES[period or partition_period()]}{start:%Y%m%d}"
+
+
+def list_event_partitions(connection: Connection) -> list[EventPartition]:
+    """Time-bounded partitions (Postgres) or shard tables (SQLite), oldest first."""
+    if connection.dialect.name == "postgresql":
+        return _list_native_partitions(connection)
+    partitions = []
+    for name in inspect(connection).get_table_names():
+        match = _PARTITION_NAME.match(name)
+        if match:
+            lower = datetime.strptime(match.group(2), "%Y%m%d")
+            period = PERIOD_DAY if match.group(1) == "d" else PERIOD_WEEK
+            partitions.append(EventPartition(name=name, lower=lower, upper=period_end(lower, period)))
+    return sorted(partitions, key=lambda item: item.upper)
+
+
+def analytics_events_source(
+    since: datetime | None = None,
+    until: datetime | None = None,
+) -> EventsSource:
+    """Entity to read analytics events for the [since, until) `occurred_at` window.
+
+    Postgres prunes native partitions from the `occurred_at` predicate itself, so callers get
+    the model back. With SQLite shards this is a UNION ALL of the base table (rows written
+    before sharding was enabled) and only the shard tables overlapping the window.
+    """
+    if partitioning_mode() != MODE_SHARDED:
+        return AnalyticsEventModel
+    with engine.connect() as connection:
+        shards = [item for item in list_event_partitions(connection) if item.overlaps(since, until)]
+    if not shards:
+        return AnalyticsEventModel
+    base = AnalyticsEventModel.__table__
+    selects = [select(*base.c)] + [select(*_shard_table(item.name).c) for item in shards]
+    return aliased(AnalyticsEventModel, union_all(*selects).subquery(_TABLE), adapt_on_names=True)
+
+
+def insert_analytics_events(session: Session, rows: list[dict[str, Any]]) -> None:
+    mode = partitioning_mode()
+    if mode != MODE_SHARDED:
+        if mode == MODE_NATIVE:
+            _ensure_native_partitions_if_due()
+        session.execute(insert(AnalyticsEventModel), rows)
+        return
+
+    connection = session.connection()
+    shards = list_event_partitions(connection)
+    first_id = _allocate_event_ids(session, len(rows))
+    grouped: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for offset, row in enumerate(rows):
+        occurred_at = row["occurred_at"]
+        shard = next((item for item in shards if item.lower <= occurred_at < item.upper), None)
+        if shard is None:
+            lower = period_start(occurred_at)
+            shard = EventPartition(name=partition_name(lower), lower=lower, upper=period_end(lower))
+            _shard_table(shard.name).create(bind=connection, checkfirst=True)
+            shards.append(shard)
+        grouped[shard.name].append({**row, "id": first_id + offset})
+    for name, shard_rows in grouped.items():
+        session.execute(insert(_shard_table(name)), shard_rows)
+
+
+def ensure_analytics_partitions(now: datetime | None = None, ahead: int | None = None) -> list[str]:
+    """Create the current and the next `ahead` period partitions; returns the names created."""
+    global _covered_until
+    if partitioning_mode() != MODE_NATIVE:
+        return []
+    now = now or utc_now()
+    ahead = int(read_float_env("ANALYTICS_PARTITIONS_AHEAD", 2)) if ahead is None else ahead
+    with engine.begin() as connection:
+        if not _is_partitioned(connection):
+            return []
+        created = create_native_partitions(connection, now, max(0, ahead))
+    covered_until = period_start(now)
+    for _ in range(max(0, ahead) + 1):
+        covered_until = period_end(covered_until)
+    _covered_until = covered_until
+    return created
+
+
+def create_native_partitions(connection: Connection, now: datetime, ahead: int) -> list[str]:
+    existing = _list_native_partitions(connection)
+    created: list[str] = []
+    start = period_start(now)
+    for _ in range(ahead + 1):
+        end = period_end(start)
+        candidate = EventPartition(name=partition_name(start), lower=start, upper=end)
+        if not any(item.overlaps(candidate.lower, candidate.upper) for item in existing):
+            _create_native_partition(connection, candidate)
+            existing.append(candidate)
+            created.append(candidate.name)
+        start = end
+    return created
+
+
+def drop_expired_analytics_partitions(cutoff: datetime, dry_run: bool = False) -> tuple[int, int]:
+    """Drop partitions/shards lying entirely before `cutoff`; returns (partitions, rows).
+
+    Rows left in partitions straddling the cutoff, in the legacy partition or in the base table
+    are purged by the regular chunked retention delete afterwards.
+    """
+    mode = partitioning_mode()
+    if mode is None:
+        return 0, 0
+    partitions_dropped = 0
+    rows_dropped = 0
+    with engine.begin() as connection:
+        for partition in list_event_partitions(connection):
+            if partition.upper > cutoff:
+                continue
+            quoted = connection.dialect.identifier_preparer.quote(partition.name)
+            partitions_dropped += 1
+            if dry_run and mode == MODE_NATIVE:
+                # A dry run counts through the parent table, which already includes these rows.
+                continue
+            rows_dropped += int(connection.execute(text(f"SELECT COUNT(*) FROM {quoted}")).scalar_one())
+            if not dry_run:
+                connection.execute(text(f"DROP TABLE {quoted}"))
+    return partitions_dropped, rows_dropped
+
+
+def partition_analytics_events_table(connection: Connection) -> None:
+    """Convert a plain Postgres `analytics_events` into a range-partitioned table.
+
+    Existing rows stay where they are: the old table becomes the `analytics_events_legacy`
+    partition covering everything up to the current period, a DEFAULT partition catches rows
+    outside any range, and period partitions are created from now on.
+    """
+    if connection.dialect.name != "postgresql" or _is_partitioned(connection):
+        return
+
+    now = utc_now()
+    sequence = connection.execute(text("SELECT pg_get_serial_sequence(:name, 'id')"), {"name": _TABLE}).scalar()
+    max_occurred_at = connection.execute(text(f"SELECT MAX(occurred_at) FROM {_TABLE}")).scalar()
+    legacy_upper = period_start(now)
+    if max_occurred_at is not None and max_occurred_at >= legacy_upper:
+        legacy_upper = period_end(period_start(max_occurred_at))
+
+    connection.execute(text(f"ALTER TABLE {_TABLE} RENAME TO {_LEGACY_TABLE}"))
+    connection.execute(text(f"ALTER TABLE {_LEGACY_TABLE} DROP CONSTRAINT {_TABLE}_pkey"))
+    index_names = connection.execute(
+        text("SELECT indexname FROM pg_indexes WHERE tablename = :name"), {"name": _LEGACY_TABLE}
+    ).scalars()
+    for index_name in list(index_names):
+        if index_name.startswith(f"ix_{_TABLE}_"):
+            renamed = index_name.replace(f"ix_{_TABLE}_", f"ix_{_LEGACY_TABLE}_", 1)
+            connection.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{renamed}"'))
+
+    connection.execute(
+        text(f"CREATE TABLE {_TABLE} (LIKE {_LEGACY_TABLE} INCLUDING DEFAULTS) PARTITION BY RANGE (occurred_at)")
+    )
+    # Unique constraints on a partitioned table must include the partition key.
+    connection.execute(text(f"ALTER TABLE {_TABLE} ADD PRIMARY KEY (id, occurred_at)"))
+    if sequence:
+        # Dropping the legacy partition must not take the id sequence with it.
+        connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {_TABLE}.id"))
+    for index in Base.metadata.tables[_TABLE].indexes:
+        index.create(bind=connection, checkfirst=True)
+
+    connection.execute(
+        text(f"ALTER TABLE {_TABLE} ATTACH PARTITION {_LEGACY_TABLE} FOR VALUES FROM (MINVALUE) TO (:upper)"),
+        {"upper": legacy_upper},
+    )
+    connection.execute(text(f"CREATE TABLE {_DEFAULT_PARTITION} PARTITION OF {_TABLE} DEFAULT"))
+    create_native_partitions(connection, now, int(read_float_env("ANALYTICS_PARTITIONS_AHEAD", 2)))
+
+
+def _is_partitioned(connection: Connection) -> bool:
+    relkind = connection.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)"), {"name": _TABLE})
+    return relkind.scalar() == "p"
+
+
+def _list_native_partitions(connection: Connection) -> list[EventPartition]:
+    rows = connection.execute(
+        text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid WHERE i.inhparent = to_regclass(:name)"
+        ),
+        {"name": _TABLE},
+    ).all()
+    partitions = []
+    for name, bound in rows:
+        match = _PG_BOUND.search(bound or "")
+        if match is None:
+            continue  # DEFAULT partition
+        lower, upper = (_parse_pg_bound(value) for value in match.groups())
+        if upper is not None:
+            partitions.append(EventPartition(name=name, lower=lower, upper=upper))
+    return sorted(partitions, key=lambda item: item.upper)
+
+
+def _parse_pg_bound(value: str) -> datetime | None:
+    if value.upper() in {"MINVALUE", "MAXVALUE"}:
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def _create_native_partition(connection: Connection, partition: EventPartition) -> None:
+    # Build the partition standalone and attach it, moving any rows the DEFAULT partition
+    # already holds for this range; a plain CREATE ... PARTITION OF would fail on them.
+    connection.execute(text(f"CREATE TABLE {partition.name} (LIKE {_TABLE} INCLUDING DEFAULTS)"))
+    bounds = {"lower": partition.lower, "upper": partition.upper}
+    if connection.execute(text("SELECT to_regclass(:name)"), {"name": _DEFAULT_PARTITION}).scalar():
+        in_range = "occurred_at >= :lower AND occurred_at < :upper"
+        connection.execute(
+            text(f"INSERT INTO {partition.name} SELECT * FROM {_DEFAULT_PARTITION} WHERE {in_range}"), bounds
+        )
+        connection.execute(text(f"DELETE FROM {_DEFAULT_PARTITION} WHERE {in_range}"), bounds)
+    connection.execute(
+        text(f"ALTER TABLE {_TABLE} ATTACH PARTITION {partition.name} FOR VALUES FROM (:lower) TO (:upper)"),
+        bounds,
+    )
+    _logger.info("created analytics_events partition %s", partition.name)
+
+
+def _ensure_native_partitions_if_due() -> None:
+    if _covered_until is not None and utc_now() < _covered_until - timedelta(days=1):
+        return
+    try:
+        ensure_analytics_partitions()
+    except Exception:  # noqa: BLE001
+        # The DEFAULT partition still accepts the rows; the next write retries.
+        _logger.warning("analytics partition maintenance failed", exc_info=True)
+
+
+def _shard_table(name: str) -> Table:
+    with _shard_lock:
+        table = _shard_metadata.tables.get(name)
+        if table is not None:
+            return table
+        base = AnalyticsEventModel.__table__
+        columns: list[Column] = [column._copy() for column in base.columns]
+        return Table(
+            name,
+            _shard_metadata,
+            *columns,
+            Index(f"ix_{name}_occurred_at", "occurred_at"),
+            Index(f"ix_{name}_created_at", "created_at"),
+            Index(f"ix_{name}_user_id_occurred_at", "user_id", "occurred_at"),
+        )
+
+
+def _allocate_event_ids(session: Session, count: int) -> int:
+    """Reserve `count` ids shared by the base table and every shard; returns the first one."""
+    next_id = session.execute(
+        update(AnalyticsShardStateModel)
+        .where(AnalyticsShardStateModel.name == _SHARD_STATE_NAME)
+        .values(next_event_id=AnalyticsShardStateModel.next_event_id + count, updated_at=utc_now())
+        .returning(AnalyticsShardStateModel.next_event_id)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    if next_id is not None:
+        return int(next_id) - count
+
+    connection = session.connection()
+    tables = [AnalyticsEventModel.__table__] + [_shard_table(item.name) for item in list_event_partitions(connection)]
+    first_id = max(int(session.execute(select(func.max(table.c.id))).scalar() or 0) for table in tables) + 1
+    session.add(
+        AnalyticsShardStateModel(name=_SHARD_STATE_NAME, next_event_id=first_id + count, updated_at=utc_now())
+    )
+    session.flush()
+    return first_id
+
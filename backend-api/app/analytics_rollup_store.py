@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.analytics_partitions import analytics_events_source
+from app.db import session_scope
+from app.hyperloglog import HyperLogLog
+from app.latency_sketch import LatencySketch
+from app.models import AnalyticsHourlyRollupModel, AnalyticsRollupStateModel
+from app.retention_store import retention_cutoff
+from app.runtime_env import read_bool_env, read_float_env
+from app.schemas import AnalyticsRollupRefreshResponse
+from app.time_utils import utc_now
+
+_STATE_NAME = "analytics_hourly"
+# Rescan a little before the watermark so rows from transactions that committed late are not missed.
+_WATERMARK_OVERLAP = timedelta(minutes=5)
+_SCAN_BATCH_SIZE = 5000
+
+_refresh_lock = threading.Lock()
+_scheduler_thread: threading.Thread | None = None
+_scheduler_stop = threading.Event()
+_logger = logging.getLogger(__name__)
+
+DimensionKey = tuple[str, str | None, str | None, str | None, str | None]
+
+
+@dataclass
+class EventAggregate:
+    """Counts, cost and latency for one (event_name, provider, operation, platform, status) group."""
+
+    event_name: str
+    provider: str | None = None
+    operation: str | None = None
+    platform: str | None = None
+    status: str | None = None
+    event_count: int = 0
+    cost_usd_sum: float = 0.0
+    latency_ms_sum: int = 0
+    latency_count: int = 0
+    latency_sketch: LatencySketch = field(default_factory=LatencySketch)
+    user_sketch: HyperLogLog = field(default_factory=lambda: HyperLogLog(precision=hll_precision()))
+
+    @property
+    def key(self) -> DimensionKey:
+        return (self.event_name, self.provider, self.operation, self.platform, self.status)
+
+    @property
+    def is_render(self) -> bool:
+        return self.event_name.startswith("render_")
+
+    def add(self, latency_ms: int | None, cost_usd: float | None, user_id: str | None = None) -> None:
+        self.event_count += 1
+        if user_id:
+            self.user_sketch.add(user_id)
+        if cost_usd is not None:
+            self.cost_usd_sum += float(cost_usd)
+        if latency_ms is not None:
+            self.latency_ms_sum += int(latency_ms)
+            self.latency_count += 1
+            self.latency_sketch.add(latency_ms)
+
+    def merge(self, other: EventAggregate) -> None:
+        self.event_count += other.event_count
+        self.cost_usd_sum += other.cost_usd_sum
+        self.latency_ms_sum += other.latency_ms_sum
+        self.latency_count += other.latency_count
+        self.latency_sketch.merge(other.latency_sketch)
+        self.user_sketch.merge(other.user_sketch)
+
+
+def hll_precision() -> int:
+    return int(read_float_env("ANALYTICS_HLL_PRECISION", 12))
+
+
+def floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def aggregate_event_rows(rows: Iterable[tuple]) -> list[EventAggregate]:
+    """Group (event_name, provider, operation, platform, status, latency_ms, cost_usd, user_id) rows."""
+    groups: dict[DimensionKey, EventAggregate] = {}
+    for event_name, provider, operation, platform, status, latency_ms, cost_usd, user_id in rows:
+        key = (event_name, provider or None, operation or None, platform or None, status or None)
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = EventAggregate(*key)
+        group.add(latency_ms, cost_usd, user_id)
+    return list(groups.values())
+
+
+def refresh_hourly_rollups(now: datetime | None = None) -> AnalyticsRollupRefreshResponse:
+    """Rebuild the hourly buckets touched by events created since the last refresh.
+
+    Each dirty hour is re-aggregated from `analytics_events` and replaced in one transaction,
+    so the job is idempotent and safe to run from a scheduler or the CLI. Hours whose raw
+    events may already be purged are never rebuilt; late events are merged into them instead.
+    """
+    started = time.perf_counter()
+    refreshed_at = now or utc_now()
+    with _refresh_lock:
+        with session_scope() as session:
+            state = session.get(AnalyticsRollupStateModel, _STATE_NAME)
+            watermark = state.watermark if state else None
+
+            # Dirty hours are found by insert time, which says nothing about `occurred_at`, so this scan
+            # cannot be narrowed to a partition range.
+            events = analytics_events_source()
+            stmt = select(events.occurred_at).where(events.created_at <= refreshed_at)
+            if watermark is not None:
+                stmt = stmt.where(events.created_at >= watermark - _WATERMARK_OVERLAP)
+            dirty_hours: set[datetime] = set()
+            events_scanned = 0
+            for occurred_at in session.execute(stmt.execution_options(yield_per=_SCAN_BATCH_SIZE)).scalars():
+                dirty_hours.add(floor_hour(occurred_at))
+                events_scanned += 1
+
+        raw_cutoff = retention_cutoff("analytics_events", refreshed_at)
+        merge_hours = sorted(hour for hour in dirty_hours if raw_cutoff is not None and hour < raw_cutoff)
+        rows_written = 0
+        for hour in sorted(dirty_hours.difference(merge_hours)):
+            rows_written += _rebuild_hour(hour)
+
+        # Merges are not idempotent, so they commit together with the watermark move: a refresh in another
+        # process that read the same watermark loses the compare-and-swap and merges nothing.
+        try:
+            with session_scope() as session:
+                if advance_watermark(session, _STATE_NAME, expected=watermark, new=refreshed_at):
+                    for hour in merge_hours:
+                        rows_written += _merge_late_events(session, hour, watermark, refreshed_at)
+                else:
+                    _logger.info("analytics rollup watermark moved concurrently; skipping late-event merges")
+        except IntegrityError:
+            _logger.info("analytics rollup watermark was created concurrently; skipping late-event merges")
+
+    return AnalyticsRollupRefreshResponse(
+        watermark=refreshed_at,
+        hours_rebuilt=len(dirty_hours),
+        events_scanned=events_scanned,
+        rows_written=rows_written,
+        duration_ms=int((time.perf_counter() - started) * 1000),
+    )
+
+
+def refresh_hourly_rollups_if_stale(max_age_seconds: float) -> AnalyticsRollupRefreshResponse | None:
+    """Refresh unless another caller (scheduler, CLI, guardrails) did so within `max_age_seconds`."""
+    with session_scope() as session:
+        state = session.get(AnalyticsRollupStateModel, _STATE_NAME)
+        last_refreshed_at = state.watermark if state else None
+    if last_refreshed_at is not None and utc_now() - last_refreshed_at < timedelta(seconds=max_age_seconds):
+        return None
+    return refresh_hourly_rollups()
+
+
+def load_hourly_rollups(since: datetime | None = None, until: datetime | None = None) -> list[EventAggregate]:
+    """Merge hourly buckets in [since, until) into one aggregate per dimension key."""
+    stmt = select(AnalyticsHourlyRollupModel)
+    if since is not None:
+        stmt = stmt.where(AnalyticsHourlyRollupModel.bucket_start >= floor_hour(since))
+    if until is not None:
+        stmt = stmt.where(AnalyticsHourlyRollupModel.bucket_start < until)
+
+    groups: dict[DimensionKey, EventAggregate] = {}
+    with session_scope() as session:
+        for row in session.execute(stmt).scalars():
+            bucket = _aggregate_from_row(row)
+            group = groups.get(bucket.key)
+            if group is None:
+                groups[bucket.key] = bucket
+            else:
+                group.merge(bucket)
+    return list(groups.values())
+
+
+def start_rollup_scheduler() -> bool:
+    global _scheduler_thread
+    if not read_bool_env("ANALYTICS_ROLLUP_SCHEDULER_ENABLED", True):
+        return False
+    if _scheduler_thread and _scheduler_thread.is_alive():
+        return True
+
+    _scheduler_stop.clear()
+    _scheduler_thread = threading.Thread(target=_scheduler_loop, name="analytics-rollup-scheduler", daemon=True)
+    _scheduler_thread.start()
+    return True
+
+
+def stop_rollup_scheduler(timeout: float = 5.0) -> None:
+    global _scheduler_thread
+    _scheduler_stop.set()
+    if _scheduler_thread:
+        _scheduler_thread.join(timeout=timeout)
+    _scheduler_thread = None
+
+
+def _rebuild_hour(hour: datetime) -> int:
+    hour_end = hour + timedelta(hours=1)
+    events = analytics_events_source(since=hour, until=hour_end)
+    with session_scope() as session:
+        rows = session.execute(
+            select(
+                events.event_name,
+                events.provider,
+                events.operation,
+                events.platform,
+                events.status,
+                events.latency_ms,
+                events.cost_usd,
+                events.user_id,
+            )
+            .where(events.occurred_at >= hour, events.occurred_at < hour_end)
+            .execution_options(yield_per=_SCAN_BATCH_SIZE)
+        )
+        groups = aggregate_event_rows(rows)
+
+    updated_at = utc_now()
+    try:
+        with session_scope() as session:
+            session.execute(delete(AnalyticsHourlyRollupModel).where(AnalyticsHourlyRollupModel.bucket_start == hour))
+            if groups:
+                session.execute(
+                    insert(AnalyticsHourlyRollupModel),
+                    [_row_from_aggregate(hour, group, updated_at) for group in groups],
+                )
+    except IntegrityError:
+        # Another worker rebuilt the same hour concurrently; its rows are equivalent.
+        _logger.info("analytics rollup for %s was rebuilt concurrently", hour.isoformat())
+        return 0
+    return len(groups)
+
+
+def advance_watermark(session, name: str, expected: datetime | None, new: datetime) -> bool:
+    """Move a rollup watermark from `expected` to `new` in the caller's transaction (compare-and-swap).
+
+    Returns False when another refresh already moved it. On Postgres the UPDATE holds the state row
+    lock until commit, so a concurrent refresh waits and then fails the comparison.
+    """
+    if expected is None:
+        session.add(AnalyticsRollupStateModel(name=name, watermark=new, updated_at=utc_now()))
+        # A concurrent first refresh makes this raise IntegrityError.
+        session.flush()
+        return True
+    moved = session.execute(
+        update(AnalyticsRollupStateModel)
+        .where(AnalyticsRollupStateModel.name == name, AnalyticsRollupStateModel.watermark == expected)
+        .values(watermark=new, updated_at=utc_now())
+        .execution_options(synchronize_session=False)
+    )
+    return moved.rowcount == 1
+
+
+def _merge_late_events(session, hour: datetime, created_after: datetime | None, created_until: datetime) -> int:
+    # Rebuilding an hour past raw-event retention would replace its history with whatever is left, so
+    # only events created since the previous refresh are added onto the stored buckets.
+    hour_end = hour + timedelta(hours=1)
+    events = analytics_events_source(since=hour, until=hour_end)
+    stmt = select(
+        events.event_name,
+        events.provider,
+        events.operation,
+        events.platform,
+        events.status,
+        events.latency_ms,
+        events.cost_usd,
+        events.user_id,
+    ).where(events.occurred_at >= hour, events.occurred_at < hour_end, events.created_at <= created_until)
+    if created_after is not None:
+        stmt = stmt.where(events.created_at > created_after)
+
+    stored = session.execute(
+        select(AnalyticsHourlyRollupModel).where(AnalyticsHourlyRollupModel.bucket_start == hour)
+    ).scalars().all()
+    if stored and created_after is None:
+        # No watermark to tell which events the stored buckets already hold; keep them as they are.
+        return 0
+    late = aggregate_event_rows(session.execute(stmt))
+    if not late:
+        return 0
+
+    groups = {bucket.key: bucket for bucket in map(_aggregate_from_row, stored)}
+    for group in late:
+        if group.key in groups:
+            groups[group.key].merge(group)
+        else:
+            groups[group.key] = group
+    updated_at = utc_now()
+    session.execute(delete(AnalyticsHourlyRollupModel).where(AnalyticsHourlyRollupModel.bucket_start == hour))
+    session.execute(
+        insert(AnalyticsHourlyRollupModel),
+        [_row_from_aggregate(hour, group, updated_at) for group in groups.values()],
+    )
+    return len(late)
+
+
+def _row_from_aggregate(hour: datetime, group: EventAggregate, updated_at: datetime) -> dict[str, object]:
+    return {
+        "bucket_start": hour,
+        "event_name": group.event_name,
+        "provider": group.provider or "",
+        "operation": group.operation or "",
+        "platform": group.platform or "",
+        "status": group.status or "",
+        "event_count": group.event_count,
+        "cost_usd_sum": round(group.cost_usd_sum, 6),
+        "latency_ms_sum": group.latency_ms_sum,
+        "latency_count": group.latency_count,
+        "latency_sketch": group.latency_sketch.to_json(),
+        "user_sketch": group.user_sketch.to_json(),
+        "updated_at": updated_at,
+    }
+
+
+def _aggregate_from_row(row: AnalyticsHourlyRollupModel) -> EventAggregate:
+    return EventAggregate(
+        event_name=row.event_name,
+        provider=row.provider or None,
+        operation=row.operation or None,
+        platform=row.platform or None,
+        status=row.status or None,
+        event_count=int(row.event_count),
+        cost_usd_sum=float(row.cost_usd_sum),
+        latency_ms_sum=int(row.latency_ms_sum),
+        latency_count=int(row.latency_count),
+        latency_sketch=LatencySketch.from_json(row.latency_sketch),
+        user_sketch=HyperLogLog.from_json(row.user_sketch) if row.user_sketch else HyperLogLog(hll_precision()),
+    )
+
+
+def _scheduler_loop() -> None:
+    interval_seconds = max(10.0, read_float_env("ANALYTICS_ROLLUP_INTERVAL_SECONDS", 60.0))
+    while not _scheduler_stop.wait(interval_seconds):
+        try:
+            result = refresh_hourly_rollups()
+            _logger.info("analytics rollup rebuilt %s hours", result.hours_rebuilt)
+        except Exception:  # noqa: BLE001
+            _logger.warning("analytics rollup refresh failed", exc_info=True)
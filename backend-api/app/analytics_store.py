@@ -1,15 +1,35 @@
 from __future__ import annotations
 
+import json
+import os
+import zlib
 from collections import Counter, defaultdict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Callable
 from app.time_utils import utc_now
 
-from sqlalchemy import desc, func, select
+from pydantic import ValidationError
+from sqlalchemy import Row, case, desc, func, insert, literal_column, or_, select
+from sqlalchemy.orm import Session
 
+from app.analytics_funnel_store import (
+    USER_STAGES,
+    FunnelSegment,
+    aggregate_funnel,
+    load_funnel_window,
+)
+from app.analytics_partitions import EventsSource, analytics_events_source, insert_analytics_events
+from app.analytics_rollup_store import (
+    EventAggregate,
+    hll_precision,
+    load_hourly_rollups,
+    refresh_hourly_rollups_if_stale,
+)
 from app.db import session_scope
+from app.hyperloglog import HyperLogLog
+from app.latency_sketch import LatencySketch
 from app.models import (
-    AnalyticsEventModel,
-    AuthSessionModel,
     CreditLedgerEntryModel,
     ExperimentAssignmentModel,
     ExperimentModel,
@@ -17,8 +37,12 @@ from app.models import (
     SubscriptionEntitlementModel,
 )
 from app.product_store import get_variable_map
+from app.provider_health_store import record_provider_events
+from app.runtime_env import read_float_env
 from app.schemas import (
     AnalyticsAlert,
+    AnalyticsBatchIngestResponse,
+    AnalyticsBatchItemError,
     AnalyticsCreditsMetrics,
     AnalyticsCreditReasonMetric,
     AnalyticsDashboardResponse,
@@ -27,6 +51,7 @@ from app.schemas import (
     AnalyticsExperimentMetric,
     AnalyticsExperimentVariantMetric,
     AnalyticsFunnelMetrics,
+    AnalyticsFunnelSegmentMetric,
     AnalyticsOperationMetric,
     AnalyticsOverviewResponse,
     AnalyticsPlatformMetric,
@@ -40,50 +65,89 @@ from app.schemas import (
 )
 
 _MAX_EVENTS_SCAN = 20000
+_GZIP_MAGIC = b"\x1f\x8b"
+_NDJSON_MEDIA_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
 
 
 def ingest_event(event: AnalyticsEventRequest) -> None:
-    with session_scope() as session:
-        session.add(
-            AnalyticsEventModel(
-                event_name=event.event_name,
-                user_id=event.user_id,
-                platform=event.platform,
-                provider=event.provider,
-                operation=event.operation.value if event.operation else None,
-                status=event.status.value if event.status else None,
-                latency_ms=event.latency_ms,
-                cost_usd=event.cost_usd,
-                occurred_at=event.occurred_at,
-            )
-        )
+    ingest_events([event])
 
 
-def get_analytics_overview() -> AnalyticsOverviewResponse:
+def ingest_events(events: list[AnalyticsEventRequest]) -> int:
+    """Insert events with one multi-row INSERT; returns the number of rows written."""
+    if not events:
+        return 0
     with session_scope() as session:
-        stmt = select(AnalyticsEventModel).order_by(desc(AnalyticsEventModel.id)).limit(_MAX_EVENTS_SCAN)
-        rows = session.execute(stmt).scalars().all()
+        insert_analytics_events(session, [_event_row(event) for event in events])
+    record_provider_events(events)
+    return len(events)
+
+
+def ingest_event_batch(
+    raw_body: bytes,
+    content_type: str | None = None,
+    content_encoding: str | None = None,
+    max_events: int = 500,
+    max_bytes: int = 4 * 1024 * 1024,
+) -> AnalyticsBatchIngestResponse:
+    """Validate a JSON array or NDJSON body item by item and bulk-insert the valid events."""
+    items = _parse_event_batch(raw_body, content_type, content_encoding, max_bytes)
+    if len(items) > max_events:
+        raise ValueError("batch_too_large")
+
+    events: list[AnalyticsEventRequest] = []
+    errors: list[AnalyticsBatchItemError] = []
+    for index, (item, parse_error) in enumerate(items):
+        if parse_error:
+            errors.append(AnalyticsBatchItemError(index=index, errors=[parse_error]))
+            continue
+        try:
+            events.append(AnalyticsEventRequest.model_validate(item))
+        except ValidationError as exc:
+            errors.append(
+                AnalyticsBatchItemError(
+                    index=index,
+                    errors=[
+                        f"{'.'.join(str(part) for part in error['loc']) or 'item'}: {error['msg']}"
+                        for error in exc.errors()
+                    ],
+                )
+            )
 
-    snapshot = list(reversed(rows))
-    render_events = [row for row in snapshot if row.event_name.startswith("render_")]
+    accepted = ingest_events(events)
+    return AnalyticsBatchIngestResponse(
+        received=len(items),
+        accepted=accepted,
+        rejected=len(errors),
+        errors=errors,
+    )
 
-    render_success = sum(1 for row in render_events if row.status == JobStatus.completed.value)
-    render_failed = sum(1 for row in render_events if row.status == JobStatus.failed.value)
 
-    latencies = [row.latency_ms for row in render_events if row.latency_ms is not None]
-    avg_latency = (sum(latencies) / len(latencies)) if latencies else None
-    p95_latency = _percentile(latencies, 0.95) if latencies else None
+def get_analytics_overview() -> AnalyticsOverviewResponse:
+    if _reads_rollups():
+        # All-time totals: rollups keep the full history in O(hours) rows.
+        groups = load_hourly_rollups()
+        latency = _merge_latency([group for group in groups if group.is_render])
+    else:
+        events = analytics_events_source()
+        recent_ids = select(events.id).order_by(desc(events.id)).limit(_MAX_EVENTS_SCAN)
+        criteria = (events.id.in_(recent_ids.scalar_subquery()),)
+        with session_scope() as session:
+            groups = _query_event_groups(session, events, criteria)
+            latency = _query_render_latency(session, events, criteria).overall
+
+    render_groups = [group for group in groups if group.is_render]
+    render_events = sum(group.event_count for group in render_groups)
+    render_success = _count_status(render_groups, JobStatus.completed.value)
+    render_failed = _count_status(render_groups, JobStatus.failed.value)
 
-    provider_counts: dict[str, int] = defaultdict(int)
-    provider_success_total: dict[str, int] = defaultdict(int)
     provider_event_total: dict[str, int] = defaultdict(int)
-
-    for row in render_events:
-        if row.provider:
-            provider_counts[row.provider] += 1
-            provider_event_total[row.provider] += 1
-            if row.status == JobStatus.completed.value:
-                provider_success_total[row.provider] += 1
+    provider_success_total: dict[str, int] = defaultdict(int)
+    for group in render_groups:
+        if group.provider:
+            provider_event_total[group.provider] += group.event_count
+            if group.status == JobStatus.completed.value:
+                provider_success_total[group.provider] += group.event_count
 
     provider_success_rate = {
         provider: round((provider_success_total[provider] / total) * 100.0, 2)
@@ -91,42 +155,60 @@ def get_analytics_overview() -> AnalyticsOverviewResponse:
         if total > 0
     }
 
-    total_cost = round(sum(float(row.cost_usd) for row in snapshot if row.cost_usd is not None), 6)
+    total_cost = round(sum(group.cost_usd_sum for group in groups), 6)
 
     return AnalyticsOverviewResponse(
-        total_events=len(snapshot),
-        render_events=len(render_events),
+        total_events=sum(group.event_count for group in groups),
+        render_events=render_events,
         render_success=render_success,
         render_failed=render_failed,
-        render_success_rate=round((render_success / len(render_events)) * 100.0, 2) if render_events else 0.0,
-        avg_latency_ms=round(avg_latency, 2) if avg_latency is not None else None,
-        p95_latency_ms=round(p95_latency, 2) if p95_latency is not None else None,
+        render_success_rate=round((render_success / render_events) * 100.0, 2) if render_events else 0.0,
+        avg_latency_ms=round(latency.avg, 2) if latency.avg is not None else None,
+        p95_latency_ms=round(latency.p95, 2) if latency.p95 is not None else None,
         total_cost_usd=total_cost,
-        provider_event_counts=dict(provider_counts),
+        provider_event_counts=dict(provider_event_total),
         provider_success_rate=provider_success_rate,
     )
 
 
-def get_analytics_dashboard(hours: int = 24) -> AnalyticsDashboardResponse:
+def get_analytics_dashboard(
+    hours: int = 24,
+    max_staleness_seconds: float | None = None,
+) -> AnalyticsDashboardResponse:
     now = utc_now()
     window_hours = max(1, int(hours))
     window_start = now - timedelta(hours=window_hours)
 
-    with session_scope() as session:
-        event_stmt = (
-            select(AnalyticsEventModel)
-            .where(AnalyticsEventModel.occurred_at >= window_start)
-            .order_by(AnalyticsEventModel.id)
-        )
-        events = session.execute(event_stmt).scalars().all()
+    reads_rollups = _reads_rollups(max_staleness_seconds)
+    if reads_rollups:
+        # Rollups are hourly, so the window starts at the top of its first hour.
+        groups = load_hourly_rollups(since=window_start)
+        render_latency = _render_latency_from_groups([group for group in groups if group.is_render])
+    else:
+        events = analytics_events_source(since=window_start)
+        criteria = (events.occurred_at >= window_start,)
+        with session_scope() as session:
+            groups = _query_event_groups(session, events, criteria)
+            render_latency = _query_render_latency(session, events, criteria)
 
-        ledger_stmt = select(CreditLedgerEntryModel).where(CreditLedgerEntryModel.created_at >= window_start)
-        ledger_rows = session.execute(ledger_stmt).scalars().all()
+    with session_scope() as session:
+        if reads_rollups and window_hours > read_float_env("ANALYTICS_DISTINCT_EXACT_MAX_HOURS", 1.0):
+            # Merge the per-bucket HyperLogLog sketches instead of scanning user ids.
+            unique_users = _merge_user_sketches(groups)
+            active_render_users = _merge_user_sketches([group for group in groups if group.is_render])
+            platform_users = {
+                name: _merge_user_sketches(members)
+                for name, members in _group_by(groups, lambda group: group.platform).items()
+            }
+        else:
+            unique_users = _count_distinct_users(session, window_start)
+            active_render_users = _count_distinct_users(session, window_start, render_only=True)
+            platform_users = _count_distinct_users_by_platform(session, window_start)
 
-        active_sub_stmt = select(SubscriptionEntitlementModel).where(
-            SubscriptionEntitlementModel.status == "active"
-        )
-        active_subscriptions = session.execute(active_sub_stmt).scalars().all()
+        credit_reason_rows = _query_credit_reason_totals(session, window_start)
+        unique_consumers = _count_credit_consumers(session, window_start)
+        subscription_rows = _query_active_subscriptions(session, now)
+        job_counts = _query_render_job_counts(session, window_start)
 
         experiment_stmt = select(ExperimentModel).order_by(desc(ExperimentModel.updated_at)).limit(200)
         experiments = session.execute(experiment_stmt).scalars().all()
@@ -137,172 +219,72 @@ def get_analytics_dashboard(hours: int = 24) -> AnalyticsDashboardResponse:
                 ExperimentAssignmentModel.experiment_id.in_(experiment_ids)
             )
             experiment_assignments = session.execute(assignment_stmt).scalars().all()
+            # Only assigned users matter for conversion, so skip loading every active entitlement.
+            paid_stmt = select(SubscriptionEntitlementModel.user_id).where(
+                SubscriptionEntitlementModel.status == "active",
+                SubscriptionEntitlementModel.user_id.in_(
+                    select(ExperimentAssignmentModel.user_id).where(
+                        ExperimentAssignmentModel.experiment_id.in_(experiment_ids)
+                    )
+                ),
+            )
+            active_paid_user_ids = set(session.execute(paid_stmt).scalars().all())
         else:
             experiment_assignments = []
+            active_paid_user_ids = set()
 
-        login_users = int(
-            session.execute(
-                select(func.count(func.distinct(AuthSessionModel.user_id))).where(
-                    AuthSessionModel.created_at >= window_start
-                )
-            ).scalar_one()
-            or 0
-        )
-
-        queued_jobs = int(
-            session.execute(
-                select(func.count())
-                .select_from(RenderJobModel)
-                .where(RenderJobModel.status == JobStatus.queued.value)
-            ).scalar_one()
-            or 0
-        )
-        in_progress_jobs = int(
-            session.execute(
-                select(func.count())
-                .select_from(RenderJobModel)
-                .where(RenderJobModel.status == JobStatus.in_progress.value)
-            ).scalar_one()
-            or 0
-        )
-        completed_jobs_window = int(
-            session.execute(
-                select(func.count())
-                .select_from(RenderJobModel)
-                .where(
-                    RenderJobModel.status == JobStatus.completed.value,
-                    RenderJobModel.updated_at >= window_start,
-                )
-            ).scalar_one()
-            or 0
-        )
-        failed_jobs_window = int(
-            session.execute(
-                select(func.count())
-                .select_from(RenderJobModel)
-                .where(
-                    RenderJobModel.status == JobStatus.failed.value,
-                    RenderJobModel.updated_at >= window_start,
-                )
-            ).scalar_one()
-            or 0
-        )
-        canceled_jobs_window = int(
-            session.execute(
-                select(func.count())
-                .select_from(RenderJobModel)
-                .where(
-                    RenderJobModel.status == JobStatus.canceled.value,
-                    RenderJobModel.updated_at >= window_start,
-                )
-            ).scalar_one()
-            or 0
-        )
-        preview_completed = int(
-            session.execute(
-                select(func.count())
-                .select_from(RenderJobModel)
-                .where(
-                    RenderJobModel.tier == RenderTier.preview.value,
-                    RenderJobModel.status == JobStatus.completed.value,
-                    RenderJobModel.updated_at >= window_start,
-                )
-            ).scalar_one()
-            or 0
-        )
-        final_completed = int(
-            session.execute(
-                select(func.count())
-                .select_from(RenderJobModel)
-                .where(
-                    RenderJobModel.tier == RenderTier.final.value,
-                    RenderJobModel.status == JobStatus.completed.value,
-                    RenderJobModel.updated_at >= window_start,
-                )
-            ).scalar_one()
-            or 0
-        )
-
-    render_events = [row for row in events if row.event_name.startswith("render_")]
+    # Whole days come from the materialized daily funnel; only the partial first day is aggregated live.
+    funnel_segments = load_funnel_window(window_start, now) if reads_rollups else aggregate_funnel(window_start, now)
 
-    unique_users = len({row.user_id for row in events if row.user_id})
-    active_render_users = len({row.user_id for row in render_events if row.user_id})
+    render_groups = [group for group in groups if group.is_render]
+    render_events = sum(group.event_count for group in render_groups)
 
-    status_counter = Counter((row.status or "unknown") for row in render_events)
+    status_counter: Counter[str] = Counter()
+    for group in render_groups:
+        status_counter[group.status or "unknown"] += group.event_count
     render_success = int(status_counter.get(JobStatus.completed.value, 0))
     render_failed = int(status_counter.get(JobStatus.failed.value, 0))
     render_in_progress = int(
         status_counter.get(JobStatus.queued.value, 0) + status_counter.get(JobStatus.in_progress.value, 0)
     )
 
-    latencies = [row.latency_ms for row in render_events if row.latency_ms is not None]
-    avg_latency = _avg(latencies)
-    p50_latency = _percentile(latencies, 0.50) if latencies else None
-    p95_latency = _percentile(latencies, 0.95) if latencies else None
-
-    total_cost = round(sum(float(row.cost_usd) for row in render_events if row.cost_usd is not None), 6)
-    avg_cost_per_render = (total_cost / len(render_events)) if render_events else None
+    latency = render_latency.overall
+    total_cost = round(sum(group.cost_usd_sum for group in render_groups), 6)
+    avg_cost_per_render = (total_cost / render_events) if render_events else None
 
     summary = AnalyticsDashboardSummary(
         window_hours=window_hours,
-        total_events=len(events),
+        total_events=sum(group.event_count for group in groups),
         unique_users=unique_users,
         active_render_users=active_render_users,
-        render_events=len(render_events),
+        render_events=render_events,
         render_success=render_success,
         render_failed=render_failed,
         render_in_progress=render_in_progress,
-        render_success_rate=_rate(render_success, len(render_events)),
-        preview_completed=preview_completed,
-        final_completed=final_completed,
-        preview_to_final_rate=_rate(final_completed, preview_completed),
-        avg_latency_ms=_rounded(avg_latency),
-        p50_latency_ms=_rounded(p50_latency),
-        p95_latency_ms=_rounded(p95_latency),
+        render_success_rate=_rate(render_success, render_events),
+        preview_completed=job_counts["preview_completed"],
+        final_completed=job_counts["final_completed"],
+        preview_to_final_rate=_rate(job_counts["final_completed"], job_counts["preview_completed"]),
+        avg_latency_ms=_rounded(latency.avg),
+        p50_latency_ms=_rounded(latency.p50),
+        p95_latency_ms=_rounded(latency.p95),
+        p99_latency_ms=_rounded(latency.p99),
         total_cost_usd=round(total_cost, 6),
         avg_cost_per_render_usd=_rounded(avg_cost_per_render),
     )
 
-    provider_breakdown = _build_provider_breakdown(render_events)
-    operation_breakdown = _build_operation_breakdown(render_events)
-    platform_breakdown = _build_platform_breakdown(events, render_events)
+    provider_breakdown = _build_provider_breakdown(render_groups, render_latency.by_provider)
+    operation_breakdown = _build_operation_breakdown(render_groups, render_latency.by_operation)
+    platform_breakdown = _build_platform_breakdown(groups, platform_users)
     status_breakdown = _build_status_breakdown(status_counter)
 
-    credits_metrics = _build_credits_metrics(ledger_rows)
-    subscription_metrics = _build_subscription_metrics(active_subscriptions, now)
-    subscription_source_metrics = _build_subscription_source_metrics(active_subscriptions)
+    credits_metrics = _build_credits_metrics(credit_reason_rows, unique_consumers)
+    subscription_metrics = _build_subscription_metrics(subscription_rows)
+    subscription_source_metrics = _build_subscription_source_metrics(subscription_rows)
 
-    preview_users = len(
-        {
-            row.user_id
-            for row in ledger_rows
-            if row.delta < 0 and row.reason == "render_preview" and row.user_id
-        }
-    )
-    final_users = len(
-        {
-            row.user_id
-            for row in ledger_rows
-            if row.delta < 0 and row.reason == "render_final" and row.user_id
-        }
-    )
-    checkout_events = {"checkout_started", "web_checkout_started", "checkout_session_started"}
-    checkout_starts = sum(1 for row in events if row.event_name in checkout_events)
-    paid_activations = sum(1 for row in active_subscriptions if row.updated_at >= window_start)
+    funnel_metrics = _build_funnel_metrics(funnel_segments)
+    funnel_segment_metrics = _build_funnel_segment_metrics(funnel_segments)
 
-    funnel_metrics = AnalyticsFunnelMetrics(
-        login_users=login_users,
-        preview_users=preview_users,
-        final_users=final_users,
-        checkout_starts=checkout_starts,
-        paid_activations=paid_activations,
-        login_to_preview_rate=_rate(preview_users, login_users),
-        preview_to_final_rate=_rate(final_users, preview_users),
-        final_to_checkout_rate=_rate(checkout_starts, final_users),
-        checkout_to_paid_rate=_rate(paid_activations, checkout_starts),
-    )
-
-    active_paid_user_ids = {row.user_id for row in active_subscriptions}
     experiment_breakdown = _build_experiment_breakdown(
         experiments=experiments,
         assignments=experiment_assignments,
@@ -310,17 +292,18 @@ def get_analytics_dashboard(hours: int = 24) -> AnalyticsDashboardResponse:
     )
 
     queue_metrics = AnalyticsQueueMetrics(
-        queued_jobs=queued_jobs,
-        in_progress_jobs=in_progress_jobs,
-        completed_jobs_window=completed_jobs_window,
-        failed_jobs_window=failed_jobs_window,
-        canceled_jobs_window=canceled_jobs_window,
+        queued_jobs=job_counts["queued_jobs"],
+        in_progress_jobs=job_counts["in_progress_jobs"],
+        completed_jobs_window=job_counts["completed_jobs_window"],
+        failed_jobs_window=job_counts["failed_jobs_window"],
+        canceled_jobs_window=job_counts["canceled_jobs_window"],
     )
 
     alerts = _build_alerts(
         summary=summary,
         queue_metrics=queue_metrics,
         provider_breakdown=provider_breakdown,
+        funnel=funnel_metrics,
     )
 
     return AnalyticsDashboardResponse(
@@ -335,79 +318,52 @@ def get_analytics_dashboard(hours: int = 24) -> AnalyticsDashboardResponse:
         subscription_sources=subscription_source_metrics,
         queue=queue_metrics,
         funnel=funnel_metrics,
+        funnel_segments=funnel_segment_metrics,
         experiment_breakdown=experiment_breakdown,
         alerts=alerts,
     )
 
 
-def _build_provider_breakdown(render_events: list[AnalyticsEventModel]) -> list[AnalyticsProviderMetric]:
-    grouped: dict[str, list[AnalyticsEventModel]] = defaultdict(list)
-    for row in render_events:
-        grouped[row.provider or "unknown"].append(row)
-
-    rows: list[AnalyticsProviderMetric] = []
-    for provider, provider_rows in grouped.items():
-        success = sum(1 for row in provider_rows if row.status == JobStatus.completed.value)
-        latencies = [row.latency_ms for row in provider_rows if row.latency_ms is not None]
-        total_cost = sum(float(row.cost_usd) for row in provider_rows if row.cost_usd is not None)
-        rows.append(
-            AnalyticsProviderMetric(
-                provider=provider,
-                total_events=len(provider_rows),
-                success_rate=_rate(success, len(provider_rows)),
-                avg_latency_ms=_rounded(_avg(latencies)),
-                p95_latency_ms=_rounded(_percentile(latencies, 0.95) if latencies else None),
-                total_cost_usd=round(total_cost, 6),
-                avg_cost_usd=_rounded(total_cost / len(provider_rows) if provider_rows else None),
-            )
-        )
+def _build_provider_breakdown(
+    render_groups: list[EventAggregate],
+    latency_by_provider: dict[str, _LatencyStats],
+) -> list[AnalyticsProviderMetric]:
+    rows = [
+        AnalyticsProviderMetric(provider=name, **_breakdown_fields(members, latency_by_provider.get(name)))
+        for name, members in _group_by(render_groups, lambda group: group.provider).items()
+    ]
     rows.sort(key=lambda item: item.total_events, reverse=True)
     return rows
 
 
-def _build_operation_breakdown(render_events: list[AnalyticsEventModel]) -> list[AnalyticsOperationMetric]:
-    grouped: dict[str, list[AnalyticsEventModel]] = defaultdict(list)
-    for row in render_events:
-        grouped[row.operation or "unknown"].append(row)
-
-    rows: list[AnalyticsOperationMetric] = []
-    for operation, operation_rows in grouped.items():
-        success = sum(1 for row in operation_rows if row.status == JobStatus.completed.value)
-        latencies = [row.latency_ms for row in operation_rows if row.latency_ms is not None]
-        total_cost = sum(float(row.cost_usd) for row in operation_rows if row.cost_usd is not None)
-        rows.append(
-            AnalyticsOperationMetric(
-                operation=operation,
-                total_events=len(operation_rows),
-                success_rate=_rate(success, len(operation_rows)),
-                avg_latency_ms=_rounded(_avg(latencies)),
-                p95_latency_ms=_rounded(_percentile(latencies, 0.95) if latencies else None),
-                total_cost_usd=round(total_cost, 6),
-                avg_cost_usd=_rounded(total_cost / len(operation_rows) if operation_rows else None),
-            )
-        )
+def _build_operation_breakdown(
+    render_groups: list[EventAggregate],
+    latency_by_operation: dict[str, _LatencyStats],
+) -> list[AnalyticsOperationMetric]:
+    rows = [
+        AnalyticsOperationMetric(operation=name, **_breakdown_fields(members, latency_by_operation.get(name)))
+        for name, members in _group_by(render_groups, lambda group: group.operation).items()
+    ]
     rows.sort(key=lambda item: item.total_events, reverse=True)
     return rows
 
 
 def _build_platform_breakdown(
-    events: list[AnalyticsEventModel],
-    render_events: list[AnalyticsEventModel],
+    groups: list[EventAggregate],
+    platform_users: dict[str, int],
 ) -> list[AnalyticsPlatformMetric]:
     grouped_total: dict[str, int] = defaultdict(int)
     grouped_render: dict[str, int] = defaultdict(int)
     grouped_success: dict[str, int] = defaultdict(int)
 
-    for row in events:
-        grouped_total[row.platform or "unknown"] += 1
-
-    for row in render_events:
-        platform = row.platform or "unknown"
-        grouped_render[platform] += 1
-        if row.status == JobStatus.completed.value:
-            grouped_success[platform] += 1
+    for group in groups:
+        platform = group.platform or "unknown"
+        grouped_total[platform] += group.event_count
+        if group.is_render:
+            grouped_render[platform] += group.event_count
+            if group.status == JobStatus.completed.value:
+                grouped_success[platform] += group.event_count
 
-    platforms = set(grouped_total.keys()) | set(grouped_render.keys())
     rows = [
         AnalyticsPlatformMetric(
             platform=platform,
@@ -415,8 +371,9 @@ def _build_platform_breakdown(
             render_events=grouped_render[platform],
             render_success=grouped_success[platform],
             render_success_rate=_rate(grouped_success[platform], grouped_render[platform]),
+            unique_users=platform_users.get(platform, 0),
         )
-        for platform in platforms
+        for platform in grouped_total
     ]
     rows.sort(key=lambda item: item.total_events, reverse=True)
     return rows
@@ -428,32 +385,20 @@ def _build_status_breakdown(status_counter: Counter[str]) -> list[AnalyticsStatu
     return rows
 
 
-def _build_credits_metrics(ledger_rows: list[CreditLedgerEntryModel]) -> AnalyticsCreditsMetrics:
-    consumed_total = sum(-row.delta for row in ledger_rows if row.delta < 0)
-    granted_total = sum(row.delta for row in ledger_rows if row.delta > 0)
-    refunded_total = sum(
-        row.delta
-        for row in ledger_rows
-        if row.delta > 0 and row.reason.startswith("render_refund")
-    )
-    daily_reset_total = sum(row.delta for row in ledger_rows if row.delta > 0 and row.reason == "daily_reset")
-    unique_consumers = len({row.user_id for row in ledger_rows if row.delta < 0})
-
-    grouped: dict[str, dict[str, int]] = defaultdict(lambda: {"events": 0, "net_delta": 0, "absolute_delta": 0})
-    for row in ledger_rows:
-        entry = grouped[row.reason]
-        entry["events"] += 1
-        entry["net_delta"] += int(row.delta)
-        entry["absolute_delta"] += abs(int(row.delta))
+def _build_credits_metrics(reason_rows: list[Row], unique_consumers: int) -> AnalyticsCreditsMetrics:
+    consumed_total = sum(int(row.consumed or 0) for row in reason_rows)
+    granted_total = sum(int(row.granted or 0) for row in reason_rows)
+    refunded_total = sum(int(row.granted or 0) for row in reason_rows if row.reason.startswith("render_refund"))
+    daily_reset_total = sum(int(row.granted or 0) for row in reason_rows if row.reason == "daily_reset")
 
     top_reasons = [
         AnalyticsCreditReasonMetric(
-            reason=reason,
-            events=stats["events"],
-            net_delta=stats["net_delta"],
-            absolute_delta=stats["absolute_delta"],
+            reason=row.reason,
+            events=int(row.events),
+            net_delta=int(row.net_delta or 0),
+            absolute_delta=int(row.absolute_delta or 0),
         )
-        for reason, stats in grouped.items()
+        for row in reason_rows
     ]
     top_reasons.sort(key=lambda item: (item.absolute_delta, item.events), reverse=True)
 
@@ -467,38 +412,25 @@ def _build_credits_metrics(ledger_rows: list[CreditLedgerEntryModel]) -> Analyti
     )
 
 
-def _build_subscription_metrics(
-    active_subscriptions: list[SubscriptionEntitlementModel],
-    now: datetime,
-) -> AnalyticsSubscriptionMetrics:
+def _build_subscription_metrics(subscription_rows: list[Row]) -> AnalyticsSubscriptionMetrics:
     plan_counter: dict[str, int] = defaultdict(int)
-    renewals_due_7d = 0
-    expirations_due_7d = 0
-    in_7_days = now + timedelta(days=7)
-
-    for row in active_subscriptions:
-        plan_counter[row.plan_id] += 1
-        if row.renews_at and now <= row.renews_at <= in_7_days:
-            renewals_due_7d += 1
-        if row.expires_at and now <= row.expires_at <= in_7_days:
-            expirations_due_7d += 1
+    for row in subscription_rows:
+        plan_counter[row.plan_id] += int(row.active)
 
     return AnalyticsSubscriptionMetrics(
-        active_subscriptions=len(active_subscriptions),
+        active_subscriptions=sum(int(row.active) for row in subscription_rows),
         active_by_plan=dict(sorted(plan_counter.items())),
-        renewals_due_7d=renewals_due_7d,
-        expirations_due_7d=expirations_due_7d,
+        renewals_due_7d=sum(int(row.renewals_due or 0) for row in subscription_rows),
+        expirations_due_7d=sum(int(row.expirations_due or 0) for row in subscription_rows),
     )
 
 
-def _build_subscription_source_metrics(
-    active_subscriptions: list[SubscriptionEntitlementModel],
-) -> list[AnalyticsSubscriptionSourceMetric]:
+def _build_subscription_source_metrics(subscription_rows: list[Row]) -> list[AnalyticsSubscriptionSourceMetric]:
     source_counter: dict[str, int] = defaultdict(int)
-    for row in active_subscriptions:
-        source_counter[row.source or "unknown"] += 1
+    for row in subscription_rows:
+        source_counter[row.source or "unknown"] += int(row.active)
 
-    total_active = len(active_subscriptions)
+    total_active = sum(source_counter.values())
     rows = [
         AnalyticsSubscriptionSourceMetric(
             source=source,
@@ -511,6 +443,44 @@ def _build_subscription_source_metrics(
     return rows
 
 
+def _build_funnel_metrics(segments: list[FunnelSegment]) -> AnalyticsFunnelMetrics:
+    # Merge the per-segment sketches so a user seen on two platforms or plans counts once.
+    total = FunnelSegment(platform="*", plan_id="*")
+    for segment in segments:
+        total.merge(segment)
+    login_users, preview_users, final_users, paid_activations = (total.count(stage) for stage in USER_STAGES)
+    checkout_starts = total.checkout_starts
+
+    return AnalyticsFunnelMetrics(
+        login_users=login_users,
+        preview_users=preview_users,
+        final_users=final_users,
+        checkout_starts=checkout_starts,
+        paid_activations=paid_activations,
+        login_to_preview_rate=_rate(preview_users, login_users),
+        preview_to_final_rate=_rate(final_users, preview_users),
+        final_to_checkout_rate=_rate(checkout_starts, final_users),
+        checkout_to_paid_rate=_rate(paid_activations, checkout_starts),
+    )
+
+
+def _build_funnel_segment_metrics(segments: list[FunnelSegment]) -> list[AnalyticsFunnelSegmentMetric]:
+    rows = [
+        AnalyticsFunnelSegmentMetric(
+            platform=segment.platform,
+            plan_id=segment.plan_id,
+            login_users=segment.count("login"),
+            preview_users=segment.count("preview"),
+            final_users=segment.count("final"),
+            checkout_starts=segment.checkout_starts,
+            paid_activations=segment.count("paid"),
+        )
+        for segment in segments
+    ]
+    rows.sort(key=lambda item: (-item.login_users, item.platform, item.plan_id))
+    return rows
+
+
 def _build_experiment_breakdown(
     *,
     experiments: list[ExperimentModel],
@@ -578,6 +548,7 @@ def _build_alerts(
     summary: AnalyticsDashboardSummary,
     queue_metrics: AnalyticsQueueMetrics,
     provider_breakdown: list[AnalyticsProviderMetric],
+    funnel: AnalyticsFunnelMetrics,
 ) -> list[AnalyticsAlert]:
     variables = get_variable_map()
 
@@ -585,6 +556,7 @@ def _build_alerts(
     max_p95_latency = _as_float(variables.get("analytics_alert_max_p95_latency_ms"), 12000.0)
     max_avg_cost = _as_float(variables.get("analytics_alert_max_avg_cost_usd"), 0.12)
     max_queued_jobs = _as_float(variables.get("analytics_alert_max_queued_jobs"), 50.0)
+    min_checkout_to_paid_rate = _as_float(variables.get("analytics_alert_min_checkout_to_paid_rate_pct"), 5.0)
 
     alerts: list[AnalyticsAlert] = []
 
@@ -652,13 +624,369 @@ def _build_alerts(
             )
         )
 
+    if funnel.checkout_starts >= 20 and funnel.checkout_to_paid_rate < min_checkout_to_paid_rate:
+        alerts.append(
+            AnalyticsAlert(
+                code="checkout_conversion_low",
+                severity="warning",
+                message="Checkout to paid conversion is below the configured threshold.",
+                current_value=funnel.checkout_to_paid_rate,
+                threshold=min_checkout_to_paid_rate,
+            )
+        )
+
     return alerts
 
 
-def _avg(values: list[int]) -> float | None:
-    if not values:
-        return None
-    return float(sum(values) / len(values))
+def _parse_event_batch(
+    raw_body: bytes,
+    content_type: str | None,
+    content_encoding: str | None,
+    max_bytes: int,
+) -> list[tuple[object, str | None]]:
+    if len(raw_body) > max_bytes:
+        raise ValueError("batch_body_too_large")
+    if (content_encoding or "").strip().lower() == "gzip" or raw_body[:2] == _GZIP_MAGIC:
+        # Bounded decompression so a small gzip body cannot expand without limit.
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            raw_body = decompressor.decompress(raw_body, max_bytes + 1)
+        except zlib.error as exc:
+            raise ValueError("invalid_batch_body") from exc
+        if len(raw_body) > max_bytes or decompressor.unconsumed_tail:
+            raise ValueError("batch_body_too_large")
+
+    try:
+        text = raw_body.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        raise ValueError("invalid_batch_body") from exc
+
+    media_type = (content_type or "").split(";", 1)[0].strip().lower()
+    if media_type in _NDJSON_MEDIA_TYPES:
+        items: list[tuple[object, str | None]] = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append((json.loads(line), None))
+            except json.JSONDecodeError as exc:
+                items.append((None, f"invalid_json: {exc.msg}"))
+        return items
+
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError as exc:
+        raise ValueError("invalid_batch_body") from exc
+    if isinstance(payload, dict):
+        payload = payload.get("events")
+    if not isinstance(payload, list):
+        raise ValueError("invalid_batch_body")
+    return [(item, None) for item in payload]
+
+
+def _event_row(event: AnalyticsEventRequest) -> dict[str, object]:
+    return {
+        "event_name": event.event_name,
+        "user_id": event.user_id,
+        "platform": event.platform,
+        "provider": event.provider,
+        "operation": event.operation.value if event.operation else None,
+        "status": event.status.value if event.status else None,
+        "latency_ms": event.latency_ms,
+        "cost_usd": event.cost_usd,
+        "occurred_at": event.occurred_at,
+    }
+
+
+def _reads_rollups(max_staleness_seconds: float | None = None) -> bool:
+    if os.getenv("ANALYTICS_DASHBOARD_SOURCE", "rollups").strip().lower() != "rollups":
+        return False
+    # Dashboard reads serve what the rollup schedulers last wrote; only callers that need fresh render
+    # numbers (guardrails) pay for an inline hourly refresh. The daily funnel is refreshed by its scheduler only.
+    if max_staleness_seconds is not None:
+        refresh_hourly_rollups_if_stale(max_staleness_seconds)
+    return True
+
+
+def _count_distinct_users(session: Session, window_start: datetime, render_only: bool = False) -> int:
+    events = analytics_events_source(since=window_start)
+    stmt = select(func.count(func.distinct(events.user_id))).where(
+        events.occurred_at >= window_start,
+        events.user_id.is_not(None),
+    )
+    if render_only:
+        stmt = stmt.where(events.event_name.startswith("render_", autoescape=True))
+    return int(session.execute(stmt).scalar_one() or 0)
+
+
+def _count_distinct_users_by_platform(session: Session, window_start: datetime) -> dict[str, int]:
+    events = analytics_events_source(since=window_start)
+    platform = func.coalesce(func.nullif(events.platform, literal_column("''")), literal_column("'unknown'"))
+    stmt = (
+        select(platform, func.count(func.distinct(events.user_id)))
+        .where(events.occurred_at >= window_start, events.user_id.is_not(None))
+        .group_by(platform)
+    )
+    return {name: int(count) for name, count in session.execute(stmt)}
+
+
+def _merge_user_sketches(groups: list[EventAggregate]) -> int:
+    sketch = HyperLogLog(precision=hll_precision())
+    for group in groups:
+        sketch.merge(group.user_sketch)
+    return sketch.count()
+
+
+def _group_by(groups: list[EventAggregate], dimension: Callable[[EventAggregate], str | None]) -> dict[str, list]:
+    grouped: dict[str, list[EventAggregate]] = defaultdict(list)
+    for group in groups:
+        grouped[dimension(group) or "unknown"].append(group)
+    return grouped
+
+
+def _count_status(groups: list[EventAggregate], status: str) -> int:
+    return sum(group.event_count for group in groups if group.status == status)
+
+
+@dataclass(frozen=True)
+class _LatencyStats:
+    avg: float | None
+    p50: float | None
+    p95: float | None
+    p99: float | None
+
+
+_NO_LATENCY = _LatencyStats(avg=None, p50=None, p95=None, p99=None)
+
+
+@dataclass(frozen=True)
+class _RenderLatency:
+    overall: _LatencyStats
+    by_provider: dict[str, _LatencyStats]
+    by_operation: dict[str, _LatencyStats]
+
+
+def _merge_latency(groups: list[EventAggregate]) -> _LatencyStats:
+    sketch = LatencySketch()
+    latency_sum = 0
+    latency_count = 0
+    for group in groups:
+        sketch.merge(group.latency_sketch)
+        latency_sum += group.latency_ms_sum
+        latency_count += group.latency_count
+    return _stats_from_sketch(sketch, latency_sum)
+
+
+def _stats_from_sketch(sketch: LatencySketch, latency_sum: int) -> _LatencyStats:
+    return _LatencyStats(
+        avg=(latency_sum / sketch.count) if sketch.count else None,
+        p50=sketch.quantile(0.50),
+        p95=sketch.quantile(0.95),
+        p99=sketch.quantile(0.99),
+    )
+
+
+def _render_latency_from_groups(render_groups: list[EventAggregate]) -> _RenderLatency:
+    return _RenderLatency(
+        overall=_merge_latency(render_groups),
+        by_provider={
+            name: _merge_latency(members)
+            for name, members in _group_by(render_groups, lambda group: group.provider).items()
+        },
+        by_operation={
+            name: _merge_latency(members)
+            for name, members in _group_by(render_groups, lambda group: group.operation).items()
+        },
+    )
+
+
+def _query_event_groups(session: Session, events: EventsSource, criteria: tuple) -> list[EventAggregate]:
+    """Counts, cost and latency sums per dimension key, aggregated in the database."""
+    dimensions = (events.event_name, events.provider, events.operation, events.platform, events.status)
+    stmt = (
+        select(
+            *dimensions,
+            func.count().label("event_count"),
+            func.sum(events.cost_usd).label("cost_usd_sum"),
+            func.sum(events.latency_ms).label("latency_ms_sum"),
+            func.count(events.latency_ms).label("latency_count"),
+        )
+        .where(*criteria)
+        .group_by(*dimensions)
+    )
+    groups: dict[tuple, EventAggregate] = {}
+    for row in session.execute(stmt):
+        bucket = EventAggregate(
+            event_name=row.event_name,
+            provider=row.provider or None,
+            operation=row.operation or None,
+            platform=row.platform or None,
+            status=row.status or None,
+            event_count=int(row.event_count),
+            cost_usd_sum=float(row.cost_usd_sum or 0.0),
+            latency_ms_sum=int(row.latency_ms_sum or 0),
+            latency_count=int(row.latency_count),
+        )
+        group = groups.get(bucket.key)
+        if group is None:
+            groups[bucket.key] = bucket
+        else:
+            group.merge(bucket)
+    return list(groups.values())
+
+
+def _query_render_latency(session: Session, events: EventsSource, criteria: tuple) -> _RenderLatency:
+    """Render latency percentiles overall and per provider / operation.
+
+    Postgres computes them with `percentile_cont`; other databases stream only the three
+    columns needed into latency sketches instead of hydrating full event rows.
+    """
+    criteria = (
+        *criteria,
+        events.event_name.startswith("render_", autoescape=True),
+        events.latency_ms.is_not(None),
+    )
+    if session.get_bind().dialect.name == "postgresql":
+        return _RenderLatency(
+            overall=_query_latency_percentiles(session, events, criteria, None).get("", _NO_LATENCY),
+            by_provider=_query_latency_percentiles(session, events, criteria, "provider"),
+            by_operation=_query_latency_percentiles(session, events, criteria, "operation"),
+        )
+
+    overall = LatencySketch()
+    overall_sum = 0
+    sketches: dict[tuple[str, str], LatencySketch] = defaultdict(LatencySketch)
+    sums: dict[tuple[str, str], int] = defaultdict(int)
+    stmt = select(events.provider, events.operation, events.latency_ms).where(*criteria)
+    for provider, operation, latency_ms in session.execute(stmt.execution_options(yield_per=5000)):
+        overall.add(latency_ms)
+        overall_sum += int(latency_ms)
+        for key in (("provider", provider or "unknown"), ("operation", operation or "unknown")):
+            sketches[key].add(latency_ms)
+            sums[key] += int(latency_ms)
+
+    def by_dimension(dimension: str) -> dict[str, _LatencyStats]:
+        return {
+            name: _stats_from_sketch(sketch, sums[(kind, name)])
+            for (kind, name), sketch in sketches.items()
+            if kind == dimension
+        }
+
+    return _RenderLatency(
+        overall=_stats_from_sketch(overall, overall_sum),
+        by_provider=by_dimension("provider"),
+        by_operation=by_dimension("operation"),
+    )
+
+
+def _query_latency_percentiles(
+    session: Session,
+    events: EventsSource,
+    criteria: tuple,
+    dimension: str | None,
+) -> dict[str, _LatencyStats]:
+    latency = events.latency_ms
+    # Inline the constants so the GROUP BY expression matches the selected one under server-side binding.
+    if dimension is not None:
+        column = getattr(events, dimension)
+        name = func.coalesce(func.nullif(column, literal_column("''")), literal_column("'unknown'"))
+    else:
+        name = literal_column("''")
+    stmt = select(
+        name.label("name"),
+        func.avg(latency).label("avg"),
+        func.percentile_cont(0.50).within_group(latency).label("p50"),
+        func.percentile_cont(0.95).within_group(latency).label("p95"),
+        func.percentile_cont(0.99).within_group(latency).label("p99"),
+    ).where(*criteria)
+    if dimension is not None:
+        stmt = stmt.group_by(name)
+    return {
+        row.name: _LatencyStats(
+            avg=_as_optional_float(row.avg),
+            p50=_as_optional_float(row.p50),
+            p95=_as_optional_float(row.p95),
+            p99=_as_optional_float(row.p99),
+        )
+        for row in session.execute(stmt)
+    }
+
+
+def _query_credit_reason_totals(session: Session, window_start: datetime) -> list[Row]:
+    delta = CreditLedgerEntryModel.delta
+    stmt = (
+        select(
+            CreditLedgerEntryModel.reason,
+            func.count().label("events"),
+            func.sum(delta).label("net_delta"),
+            func.sum(func.abs(delta)).label("absolute_delta"),
+            func.sum(case((delta < 0, -delta), else_=0)).label("consumed"),
+            func.sum(case((delta > 0, delta), else_=0)).label("granted"),
+        )
+        .where(CreditLedgerEntryModel.created_at >= window_start)
+        .group_by(CreditLedgerEntryModel.reason)
+    )
+    return list(session.execute(stmt).all())
+
+
+def _count_credit_consumers(session: Session, window_start: datetime) -> int:
+    stmt = select(func.count(func.distinct(CreditLedgerEntryModel.user_id))).where(
+        CreditLedgerEntryModel.created_at >= window_start,
+        CreditLedgerEntryModel.delta < 0,
+        CreditLedgerEntryModel.user_id.is_not(None),
+    )
+    return int(session.execute(stmt).scalar_one() or 0)
+
+
+def _query_active_subscriptions(session: Session, now: datetime) -> list[Row]:
+    """Active entitlement counts per (plan_id, source), with renewals and expirations due within 7 days."""
+    entitlement = SubscriptionEntitlementModel
+    in_7_days = now + timedelta(days=7)
+    stmt = (
+        select(
+            entitlement.plan_id,
+            entitlement.source,
+            func.count().label("active"),
+            func.sum(case((entitlement.renews_at.between(now, in_7_days), 1), else_=0)).label("renewals_due"),
+            func.sum(case((entitlement.expires_at.between(now, in_7_days), 1), else_=0)).label("expirations_due"),
+        )
+        .where(entitlement.status == "active")
+        .group_by(entitlement.plan_id, entitlement.source)
+    )
+    return list(session.execute(stmt).all())
+
+
+def _query_render_job_counts(session: Session, window_start: datetime) -> dict[str, int]:
+    """Queue depth plus window completions, failures and cancellations from one grouped query."""
+    status, tier = RenderJobModel.status, RenderJobModel.tier
+    open_statuses = (JobStatus.queued.value, JobStatus.in_progress.value)
+    stmt = (
+        select(status, tier, func.count())
+        .where(or_(status.in_(open_statuses), RenderJobModel.updated_at >= window_start))
+        .group_by(status, tier)
+    )
+    counts: dict[str, int] = defaultdict(int)
+    for job_status, job_tier, count in session.execute(stmt):
+        # Open jobs count regardless of age; terminal ones only matched through the window clause.
+        counts[f"{job_status}_jobs" if job_status in open_statuses else f"{job_status}_jobs_window"] += int(count)
+        if job_status == JobStatus.completed.value and job_tier in (RenderTier.preview.value, RenderTier.final.value):
+            counts[f"{job_tier}_completed"] += int(count)
+    return counts
+
+
+def _breakdown_fields(groups: list[EventAggregate], latency: _LatencyStats | None = None) -> dict[str, object]:
+    total_events = sum(group.event_count for group in groups)
+    total_cost = sum(group.cost_usd_sum for group in groups)
+    latency = latency or _NO_LATENCY
+    return {
+        "total_events": total_events,
+        "success_rate": _rate(_count_status(groups, JobStatus.completed.value), total_events),
+        "avg_latency_ms": _rounded(latency.avg),
+        "p95_latency_ms": _rounded(latency.p95),
+        "p99_latency_ms": _rounded(latency.p99),
+        "total_cost_usd": round(total_cost, 6),
+        "avg_cost_usd": _rounded(total_cost / total_events if total_events else None),
+    }
 
 
 def _rate(numerator: int, denominator: int) -> float:
@@ -671,6 +999,10 @@ def _rounded(value: float | None) -> float | None:
     return round(float(value), 2) if value is not None else None
 
 
+def _as_optional_float(value: object) -> float | None:
+    return float(value) if value is not None else None
+
+
 def _as_float(value: object, default: float) -> float:
     try:
         if value is None:
@@ -678,11 +1010,3 @@ def _as_float(value: object, default: float) -> float:
         return float(value)
     except (TypeError, ValueError):
         return default
-
-
-def _percentile(values: list[int], q: float) -> float:
-    if not values:
-        return 0.0
-    sorted_values = sorted(values)
-    index = int(round((len(sorted_values) - 1) * q))
-    return float(sorted_values[index])
@@ -1,25 +1,54 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from app.time_utils import utc_now
 from uuid import uuid4
 
 from sqlalchemy import select
 
+from app.auth_tokens import is_signed_token, issue_signed_token, signed_tokens_enabled, verify_signed_token
+from app.cache_bus import TOPIC_AUTH_REVOCATIONS, TOPIC_AUTH_SESSIONS, publish_invalidation, subscribe
 from app.db import session_scope
 from app.models import AuthSessionModel
+from app.runtime_env import read_float_env
 from app.schemas import AuthMeResponse, AuthSessionResponse, DevLoginRequest, LogoutResponse
+from app.ttl_cache import TTLCache, is_missing
+
+_SessionInfo = tuple[str, str | None, datetime]
+
+_TOKEN_CACHE_TTL_SECONDS = read_float_env("AUTH_TOKEN_CACHE_TTL_SECONDS", 60.0)
+# Unknown/revoked tokens are remembered briefly so token guessing cannot hammer the DB.
+_TOKEN_NEGATIVE_TTL_SECONDS = read_float_env("AUTH_TOKEN_NEGATIVE_TTL_SECONDS", 30.0)
+_token_cache: TTLCache[_SessionInfo | None] = TTLCache(int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000")))
+
+# Signed tokens are verified in memory; their auth_sessions rows exist only to record
+# revocations, which every worker mirrors as session_id -> expires_at.
+_SIGNED_SESSION_ROW_PREFIX = "sid_"
+_REVOCATION_REFRESH_SECONDS = read_float_env("AUTH_REVOCATION_REFRESH_SECONDS", 30.0)
+_revoked_session_ids: dict[str, datetime] = {}
+_revocations_loaded_at: float | None = None
+_revocation_lock = threading.Lock()
 
 
 def create_dev_session(payload: DevLoginRequest) -> AuthSessionResponse:
     now = utc_now()
     expires_at = now + timedelta(hours=payload.ttl_hours)
-    token = f"dev_{uuid4().hex}{uuid4().hex}"
+    if signed_tokens_enabled():
+        session_id = uuid4().hex
+        token = issue_signed_token(payload.user_id, payload.platform, expires_at, session_id)
+        row_token = f"{_SIGNED_SESSION_ROW_PREFIX}{session_id}"
+    else:
+        token = f"dev_{uuid4().hex}{uuid4().hex}"
+        row_token = token
 
     with session_scope() as session:
         session.add(
             AuthSessionModel(
-                token=token,
+                token=row_token,
                 user_id=payload.user_id,
                 platform=payload.platform,
                 created_at=now,
@@ -28,6 +57,8 @@ def create_dev_session(payload: DevLoginRequest) -> AuthSessionResponse:
             )
         )
 
+    if row_token == token:
+        _cache_session_info(_token_cache_key(token), (payload.user_id, payload.platform, expires_at))
     return AuthSessionResponse(
         access_token=token,
         token_type="bearer",
@@ -49,6 +80,10 @@ def get_me(token: str) -> AuthMeResponse | None:
 
 
 def revoke_session(token: str) -> LogoutResponse:
+    if is_signed_token(token):
+        return _revoke_signed_session(token)
+
+    cache_key = _token_cache_key(token)
     with session_scope() as session:
         model = session.get(AuthSessionModel, token)
         if not model:
@@ -56,7 +91,10 @@ def revoke_session(token: str) -> LogoutResponse:
         if model.revoked_at is not None:
             return LogoutResponse(revoked=False)
         model.revoked_at = utc_now()
-        return LogoutResponse(revoked=True)
+
+    # Only the token hash leaves the process; raw tokens never hit the bus.
+    publish_invalidation(TOPIC_AUTH_SESSIONS, cache_key)
+    return LogoutResponse(revoked=True)
 
 
 def resolve_authenticated_user(token: str) -> str | None:
@@ -67,15 +105,107 @@ def resolve_authenticated_user(token: str) -> str | None:
     return user_id
 
 
-def _get_active_session_info(token: str) -> tuple[str, str | None, datetime] | None:
+def _get_active_session_info(token: str) -> _SessionInfo | None:
     now = utc_now()
+    if is_signed_token(token):
+        claims = verify_signed_token(token, now)
+        if not claims or _is_session_revoked(claims.session_id):
+            return None
+        return claims.user_id, claims.platform, claims.expires_at
+
+    cache_key = _token_cache_key(token)
+    cached = _token_cache.get(cache_key)
+    if not is_missing(cached):
+        if cached is None or cached[2] <= now:
+            return None
+        return cached
+
     with session_scope() as session:
         stmt = select(AuthSessionModel).where(AuthSessionModel.token == token)
         model = session.execute(stmt).scalar_one_or_none()
-        if not model:
-            return None
-        if model.revoked_at is not None:
-            return None
-        if model.expires_at <= now:
-            return None
-        return model.user_id, model.platform, model.expires_at
+        if not model or model.revoked_at is not None or model.expires_at <= now:
+            info = None
+        else:
+            info = (model.user_id, model.platform, model.expires_at)
+
+    _cache_session_info(cache_key, info)
+    return info
+
+
+def _cache_session_info(cache_key: str, info: _SessionInfo | None) -> None:
+    if info is None:
+        _token_cache.set(cache_key, None, _TOKEN_NEGATIVE_TTL_SECONDS)
+        return
+    # Never keep a positive entry past the token's own expiry.
+    seconds_left = (info[2] - utc_now()).total_seconds()
+    _token_cache.set(cache_key, info, min(_TOKEN_CACHE_TTL_SECONDS, seconds_left))
+
+
+def _token_cache_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _revoke_signed_session(token: str) -> LogoutResponse:
+    claims = verify_signed_token(token, utc_now())
+    if not claims:
+        return LogoutResponse(revoked=False)
+
+    with session_scope() as session:
+        model = session.get(AuthSessionModel, f"{_SIGNED_SESSION_ROW_PREFIX}{claims.session_id}")
+        if not model or model.revoked_at is not None:
+            return LogoutResponse(revoked=False)
+        model.revoked_at = utc_now()
+
+    expires_unix = int(claims.expires_at.replace(tzinfo=timezone.utc).timestamp())
+    publish_invalidation(TOPIC_AUTH_REVOCATIONS, f"{claims.session_id}:{expires_unix}")
+    return LogoutResponse(revoked=True)
+
+
+def _is_session_revoked(session_id: str) -> bool:
+    if _revocations_loaded_at is None or time.monotonic() - _revocations_loaded_at >= _REVOCATION_REFRESH_SECONDS:
+        _refresh_revocations()
+    return session_id in _revoked_session_ids
+
+
+def _refresh_revocations() -> None:
+    global _revoked_session_ids, _revocations_loaded_at
+    now = utc_now()
+    with session_scope() as session:
+        rows = session.execute(
+            select(AuthSessionModel.token, AuthSessionModel.expires_at).where(
+                AuthSessionModel.token.startswith(_SIGNED_SESSION_ROW_PREFIX),
+                AuthSessionModel.revoked_at.is_not(None),
+                AuthSessionModel.expires_at > now,
+            )
+        ).all()
+
+    loaded = {token[len(_SIGNED_SESSION_ROW_PREFIX) :]: expires_at for token, expires_at in rows}
+    with _revocation_lock:
+        # Keep bus-delivered revocations that raced this query; expired ones drop out.
+        for session_id, expires_at in _revoked_session_ids.items():
+            if expires_at > now:
+                loaded.setdefault(session_id, expires_at)
+        _revoked_session_ids = loaded
+        _revocations_loaded_at = time.monotonic()
+
+
+def _on_auth_revocation(key: str | None) -> None:
+    global _revocations_loaded_at
+    if key is None:
+        _revocations_loaded_at = None
+        return
+    session_id, _, expires_unix = key.partition(":")
+    expires_at = datetime.fromtimestamp(int(expires_unix), tz=timezone.utc).replace(tzinfo=None)
+    with _revocation_lock:
+        _revoked_session_ids[session_id] = expires_at
+
+
+def _on_auth_sessions_invalidated(cache_key: str | None) -> None:
+    if cache_key is None:
+        _token_cache.clear()
+    else:
+        _token_cache.pop(cache_key)
+
+
+subscribe(TOPIC_AUTH_SESSIONS, _on_auth_sessions_invalidated)
+subscribe(TOPIC_AUTH_REVOCATIONS, _on_auth_revocation)
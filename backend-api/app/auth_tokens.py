@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+
+SIGNED_TOKEN_PREFIX = "hs1."
+
+
+@dataclass(frozen=True)
+class SignedTokenClaims:
+    user_id: str
+    platform: str | None
+    expires_at: datetime
+    session_id: str
+    key_id: str
+
+
+def signed_tokens_enabled() -> bool:
+    return os.getenv("AUTH_TOKEN_FORMAT", "opaque").strip().lower() == "signed" and bool(_signing_keys()[1])
+
+
+def is_signed_token(token: str) -> bool:
+    return token.startswith(SIGNED_TOKEN_PREFIX)
+
+
+def issue_signed_token(user_id: str, platform: str | None, expires_at: datetime, session_id: str) -> str:
+    active_kid, keys = _signing_keys()
+    if not active_kid:
+        raise ValueError("auth_signing_keys_not_configured")
+
+    claims = {
+        "sub": user_id,
+        "plt": platform,
+        "exp": int(expires_at.replace(tzinfo=timezone.utc).timestamp()),
+        "sid": session_id,
+        "kid": active_kid,
+    }
+    body = _b64encode(json.dumps(claims, separators=(",", ":"), sort_keys=True).encode("utf-8"))
+    signing_input = f"{SIGNED_TOKEN_PREFIX}{body}"
+    return f"{signing_input}.{_sign(keys[active_kid], signing_input)}"
+
+
+def verify_signed_token(token: str, now: datetime) -> SignedTokenClaims | None:
+    """Check signature and expiry in memory. Revocation is checked by the caller."""
+    if not is_signed_token(token):
+        return None
+    signing_input, _, signature = token.rpartition(".")
+    if not signing_input or not signature:
+        return None
+
+    try:
+        claims = json.loads(_b64decode(signing_input[len(SIGNED_TOKEN_PREFIX) :]))
+        key = _signing_keys()[1].get(claims["kid"])
+        if key is None or not hmac.compare_digest(_sign(key, signing_input), signature):
+            return None
+        expires_at = datetime.fromtimestamp(int(claims["exp"]), tz=timezone.utc).replace(tzinfo=None)
+        user_id = str(claims["sub"])
+        session_id = str(claims["sid"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+    if expires_at <= now:
+        return None
+    return SignedTokenClaims(
+        user_id=user_id,
+        platform=claims.get("plt"),
+        expires_at=expires_at,
+        session_id=session_id,
+        key_id=claims["kid"],
+    )
+
+
+def _signing_keys() -> tuple[str | None, dict[str, bytes]]:
+    return _parse_signing_keys(os.getenv("AUTH_SIGNING_KEYS", ""))
+
+
+@lru_cache(maxsize=4)
+def _parse_signing_keys(raw_value: str) -> tuple[str | None, dict[str, bytes]]:
+    # "kid:secret,kid:secret"; the first key signs, every listed key verifies (rotation).
+    keys: dict[str, bytes] = {}
+    active_kid: str | None = None
+    for item in raw_value.split(","):
+        kid, _, secret = item.strip().partition(":")
+        if not kid or not secret:
+            continue
+        keys[kid] = secret.encode("utf-8")
+        active_kid = active_kid or kid
+    return active_kid, keys
+
+
+def _sign(key: bytes, signing_input: str) -> str:
+    return _b64encode(hmac.new(key, signing_input.encode("ascii"), hashlib.sha256).digest())
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
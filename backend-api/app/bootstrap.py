@@ -5,7 +5,9 @@ from app.models import (  # noqa: F401
     AdminAuditLogModel,
     AnalyticsEventModel,
     AuthSessionModel,
+    CacheInvalidationEventModel,
     CreditBalanceModel,
+    CreditHoldModel,
     CreditLedgerEntryModel,
     CreditResetScheduleModel,
     ExperimentAssignmentModel,
@@ -15,18 +17,21 @@ from app.models import (  # noqa: F401
     ProviderSettingsStateModel,
     ProviderSettingsVersionModel,
     RenderJobModel,
+    SchemaMigrationModel,
     SubscriptionEntitlementModel,
     SubscriptionWebhookEventModel,
     UserProjectModel,
     VariableModel,
 )
 from app.credit_reset_store import bootstrap_credit_reset_schedule
+from app.migrations import apply_migrations
 from app.product_store import bootstrap_product_data
 from app.settings_store import bootstrap_provider_settings
 
 
 def init_database() -> None:
     Base.metadata.create_all(bind=engine)
+    apply_migrations(engine)
     bootstrap_provider_settings()
     bootstrap_product_data()
     bootstrap_credit_reset_schedule()
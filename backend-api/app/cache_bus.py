@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable
+from uuid import uuid4
+
+from sqlalchemy import delete, func, insert, select, text
+
+from app.db import engine, session_scope
+from app.models import CacheInvalidationEventModel
+from app.runtime_env import read_bool_env, read_float_env
+from app.time_utils import utc_now
+
+TOPIC_PROVIDER_SETTINGS = "provider_settings"
+TOPIC_CATALOG = "catalog"
+TOPIC_ENTITLEMENTS = "entitlements"
+TOPIC_AUTH_SESSIONS = "auth_sessions"
+TOPIC_AUTH_REVOCATIONS = "auth_revocations"
+
+_PG_CHANNEL = "homeai_cache_invalidation"
+_POLL_INTERVAL_SECONDS = read_float_env("CACHE_BUS_POLL_SECONDS", 1.0)
+_EVENT_RETENTION = timedelta(hours=1)
+_POLL_BATCH_SIZE = 500
+
+# Identifies this process so it can skip its own events; they were already applied locally.
+_ORIGIN = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+
+InvalidationHandler = Callable[[str | None], None]
+
+_handlers: dict[str, list[InvalidationHandler]] = defaultdict(list)
+_listener_thread: threading.Thread | None = None
+_listener_stop = threading.Event()
+_logger = logging.getLogger(__name__)
+
+
+def subscribe(topic: str, handler: InvalidationHandler) -> None:
+    if handler not in _handlers[topic]:
+        _handlers[topic].append(handler)
+
+
+def publish_invalidation(topic: str, key: str | None = None) -> None:
+    """Apply an invalidation locally, then fan it out to other workers.
+
+    Call after the write has committed. Broadcast failures are logged and swallowed:
+    the write already succeeded and peers still converge through their cache TTLs.
+    """
+    _dispatch(topic, key)
+    try:
+        if _uses_notify():
+            _publish_notify(topic, key)
+        else:
+            _publish_row(topic, key)
+    except Exception:  # noqa: BLE001
+        _logger.warning("cache invalidation broadcast failed for topic=%s", topic, exc_info=True)
+
+
+def start_invalidation_listener() -> bool:
+    global _listener_thread
+    if not read_bool_env("CACHE_BUS_ENABLED", True):
+        return False
+    if _listener_thread and _listener_thread.is_alive():
+        return True
+
+    _listener_stop.clear()
+    target = _listen_notify if _uses_notify() else _listen_poll
+    _listener_thread = threading.Thread(target=target, name="cache-invalidation-listener", daemon=True)
+    _listener_thread.start()
+    return True
+
+
+def stop_invalidation_listener(timeout: float = 5.0) -> None:
+    global _listener_thread
+    _listener_stop.set()
+    if _listener_thread:
+        _listener_thread.join(timeout=timeout)
+    _listener_thread = None
+
+
+def _uses_notify() -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def _dispatch(topic: str, key: str | None) -> None:
+    for handler in list(_handlers.get(topic, ())):
+        try:
+            handler(key)
+        except Exception:  # noqa: BLE001
+            _logger.warning("cache invalidation handler failed for topic=%s", topic, exc_info=True)
+
+
+def _dispatch_all() -> None:
+    # Used after (re)connecting, when events may have been missed.
+    for topic in list(_handlers):
+        _dispatch(topic, None)
+
+
+def _publish_notify(topic: str, key: str | None) -> None:
+    payload = json.dumps({"topic": topic, "key": key, "origin": _ORIGIN})
+    with engine.begin() as connection:
+        connection.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": _PG_CHANNEL, "payload": payload})
+
+
+def _publish_row(topic: str, key: str | None) -> None:
+    now = utc_now()
+    with session_scope() as session:
+        session.execute(
+            insert(CacheInvalidationEventModel).values(topic=topic, key=key, origin=_ORIGIN, created_at=now)
+        )
+        session.execute(
+            delete(CacheInvalidationEventModel).where(CacheInvalidationEventModel.created_at < now - _EVENT_RETENTION)
+        )
+
+
+def _listen_notify() -> None:
+    while not _listener_stop.is_set():
+        raw_connection = None
+        try:
+            raw_connection = engine.raw_connection()
+            connection = raw_connection.driver_connection
+            connection.autocommit = True
+            connection.execute(f"LISTEN {_PG_CHANNEL}")
+            _dispatch_all()
+
+            while not _listener_stop.is_set():
+                for notify in connection.notifies(timeout=_POLL_INTERVAL_SECONDS):
+                    event = json.loads(notify.payload)
+                    if event.get("origin") != _ORIGIN:
+                        _dispatch(event["topic"], event.get("key"))
+        except Exception:  # noqa: BLE001
+            _logger.warning("cache invalidation listener lost its connection; retrying", exc_info=True)
+            _listener_stop.wait(_POLL_INTERVAL_SECONDS)
+        finally:
+            if raw_connection is not None:
+                # Autocommit/LISTEN state must not leak back into the pool.
+                raw_connection.invalidate()
+
+
+def _listen_poll() -> None:
+    last_event_id: int | None = None
+    while not _listener_stop.is_set():
+        try:
+            with session_scope() as session:
+                if last_event_id is None:
+                    last_event_id = int(
+                        session.execute(select(func.coalesce(func.max(CacheInvalidationEventModel.id), 0))).scalar_one()
+                    )
+                    rows = []
+                else:
+                    rows = session.execute(
+                        select(
+                            CacheInvalidationEventModel.id,
+                            CacheInvalidationEventModel.topic,
+                            CacheInvalidationEventModel.key,
+                            CacheInvalidationEventModel.origin,
+                        )
+                        .where(CacheInvalidationEventModel.id > last_event_id)
+                        .order_by(CacheInvalidationEventModel.id)
+                        .limit(_POLL_BATCH_SIZE)
+                    ).all()
+
+            for event_id, topic, key, origin in rows:
+                last_event_id = event_id
+                if origin != _ORIGIN:
+                    _dispatch(topic, key)
+        except Exception:  # noqa: BLE001
+            _logger.warning("cache invalidation poll failed", exc_info=True)
+
+        _listener_stop.wait(_POLL_INTERVAL_SECONDS)
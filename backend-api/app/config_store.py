@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass
+
+from app.product_store import get_catalog_fingerprint, get_variable_map, list_active_styles, list_plans
+from app.schemas import MobileBootstrapConfigResponse
+from app.settings_store import get_provider_settings, get_provider_settings_meta
+
+
+@dataclass(frozen=True)
+class BootstrapConfigPayload:
+    fingerprint: tuple[object, ...]
+    config: MobileBootstrapConfigResponse
+    body: bytes
+    etag: str
+
+
+_bootstrap_payload: BootstrapConfigPayload | None = None
+_bootstrap_lock = threading.Lock()
+
+
+def get_bootstrap_config() -> BootstrapConfigPayload:
+    """Return the mobile bootstrap config, serialized once per catalog snapshot and settings version."""
+    global _bootstrap_payload
+    fingerprint = (*get_catalog_fingerprint(), get_provider_settings_meta()["current_version"])
+    cached = _bootstrap_payload
+    if cached and cached.fingerprint == fingerprint:
+        return cached
+
+    config = _build_bootstrap_config()
+    body = config.model_dump_json().encode("utf-8")
+    payload = BootstrapConfigPayload(
+        fingerprint=fingerprint,
+        config=config,
+        body=body,
+        etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+    )
+    with _bootstrap_lock:
+        _bootstrap_payload = payload
+    return payload
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match uses weak comparison, so a W/ prefix still matches.
+        if candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _build_bootstrap_config() -> MobileBootstrapConfigResponse:
+    provider_settings = get_provider_settings()
+    provider_meta = get_provider_settings_meta()
+    return MobileBootstrapConfigResponse(
+        active_plans=[plan for plan in list_plans() if plan.is_active],
+        styles=list_active_styles(),
+        variables=get_variable_map(),
+        provider_defaults={
+            "default_provider": provider_settings.default_provider,
+            "fallback_chain": provider_settings.fallback_chain,
+            "version": provider_meta["current_version"],
+        },
+    )
@@ -1,14 +1,23 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+import time
+from datetime import date, datetime, timedelta
 from app.time_utils import utc_now
 
-from sqlalchemy import select
+from sqlalchemy import DateTime, and_, case, func, literal, literal_column, select, union, update
 
-from app.db import session_scope
-from app.models import CreditBalanceModel, CreditLedgerEntryModel, CreditResetScheduleModel, SubscriptionEntitlementModel
+from app.db import dialect_insert, session_scope
+from app.models import (
+    CreditBalanceModel,
+    CreditHoldModel,
+    CreditLedgerEntryModel,
+    CreditResetScheduleModel,
+    SubscriptionEntitlementModel,
+)
 from app.product_store import list_plans
 from app.schemas import (
+    CreditHoldStatus,
+    CreditRefillMode,
     CreditResetRunResponse,
     CreditResetScheduleResponse,
     CreditResetScheduleUpdateRequest,
@@ -16,6 +25,7 @@ from app.schemas import (
 )
 
 _SCHEDULE_ID = 1
+_RESET_CHUNK_SIZE = 500
 
 
 def bootstrap_credit_reset_schedule() -> None:
@@ -51,6 +61,8 @@ def update_credit_reset_schedule(payload: CreditResetScheduleUpdateRequest) -> C
 
         if "enabled" in update_data:
             schedule.enabled = bool(update_data["enabled"])
+        if "refill_mode" in update_data:
+            schedule.refill_mode = CreditRefillMode(update_data["refill_mode"]).value
         if "reset_hour_utc" in update_data:
             schedule.reset_hour_utc = int(update_data["reset_hour_utc"])
         if "reset_minute_utc" in update_data:
@@ -66,78 +78,79 @@ def update_credit_reset_schedule(payload: CreditResetScheduleUpdateRequest) -> C
         return _to_schema(schedule)
 
 
-def run_daily_credit_reset(dry_run: bool = False, run_at: datetime | None = None) -> CreditResetRunResponse:
+def run_daily_credit_reset(
+    dry_run: bool = False,
+    run_at: datetime | None = None,
+    chunk_size: int = _RESET_CHUNK_SIZE,
+) -> CreditResetRunResponse:
     started_at = run_at or utc_now()
+    clock_start = time.perf_counter()
+    chunk_size = max(1, int(chunk_size))
 
     with session_scope() as session:
         schedule = _get_or_create_schedule(session)
-
-        plan_daily_credits = {plan.plan_id: plan.daily_credits for plan in list_plans()}
-
-        balance_users = set(session.execute(select(CreditBalanceModel.user_id)).scalars().all())
-        entitlement_users = set(session.execute(select(SubscriptionEntitlementModel.user_id)).scalars().all())
-        user_ids = sorted(balance_users | entitlement_users)
-
-        balances_updated = 0
-        for user_id in user_ids:
-            entitlement = session.get(SubscriptionEntitlementModel, user_id)
-            plan_id = (
-                entitlement.plan_id
-                if entitlement and entitlement.status == "active" and entitlement.plan_id
-                else "free"
-            )
-
-            target_balance = _resolve_target_balance(plan_id, plan_daily_credits, schedule)
-            balance_model = session.get(CreditBalanceModel, user_id)
-            if not balance_model:
-                balance_model = CreditBalanceModel(user_id=user_id, balance=0)
-                session.add(balance_model)
-
-            current_balance = balance_model.balance
-            delta = target_balance - current_balance
-
-            if delta == 0:
-                continue
-
-            idempotency_key = f"daily_reset:{started_at.date().isoformat()}:{user_id}"
-            existing_entry = session.execute(
-                select(CreditLedgerEntryModel).where(CreditLedgerEntryModel.idempotency_key == idempotency_key)
-            ).scalar_one_or_none()
-            if existing_entry:
-                continue
-
-            balances_updated += 1
+        target_by_plan = _plan_target_balances(schedule)
+        default_target = schedule.free_daily_credits
+        # Same reset period (and so the same idempotency keys) as `apply_lazy_refill`, even when the
+        # reset time is not midnight or the tick runs late.
+        refill_date = _current_refill_date(schedule, started_at)
+
+    key_prefix = f"daily_reset:{refill_date.isoformat()}:"
+    users_processed = 0
+    balances_updated = 0
+    chunks_processed = 0
+    after_user_id: str | None = None
+
+    # Keyset-paginated over user_id with one short transaction per chunk, so the
+    # midnight run never holds locks on the whole balances table.
+    while True:
+        with session_scope() as session:
+            chunk_user_ids = _next_user_chunk(session, after_user_id, chunk_size)
+            if not chunk_user_ids:
+                break
+
+            chunk_bounds = (after_user_id, chunk_user_ids[-1])
             if dry_run:
-                continue
-
-            balance_model.balance = target_balance
-            balance_model.updated_at = utc_now()
-
-            session.add(
-                CreditLedgerEntryModel(
-                    user_id=user_id,
-                    delta=delta,
-                    reason="daily_reset",
-                    idempotency_key=idempotency_key,
-                    metadata_json={
-                        "plan_id": plan_id,
-                        "target_balance": target_balance,
-                    },
+                balances_updated += _count_pending_resets(
+                    session,
+                    chunk_bounds=chunk_bounds,
+                    key_prefix=key_prefix,
+                    target_by_plan=target_by_plan,
+                    default_target=default_target,
                 )
-            )
+            else:
+                balances_updated += _apply_reset_chunk(
+                    session,
+                    chunk_bounds=chunk_bounds,
+                    refill_date=refill_date,
+                    key_prefix=key_prefix,
+                    target_by_plan=target_by_plan,
+                    default_target=default_target,
+                )
+
+        users_processed += len(chunk_user_ids)
+        chunks_processed += 1
+        after_user_id = chunk_user_ids[-1]
+        if len(chunk_user_ids) < chunk_size:
+            break
 
-        if not dry_run:
+    if not dry_run:
+        with session_scope() as session:
+            schedule = _get_or_create_schedule(session)
             schedule.last_run_at = started_at
             schedule.next_run_at = _compute_next_run(schedule.reset_hour_utc, schedule.reset_minute_utc, started_at)
             schedule.updated_at = utc_now()
 
+    elapsed_seconds = time.perf_counter() - clock_start
     completed_at = utc_now()
     return CreditResetRunResponse(
         started_at=started_at,
         completed_at=completed_at,
         dry_run=dry_run,
-        users_processed=len(user_ids),
+        users_processed=users_processed,
         balances_updated=balances_updated,
+        chunks_processed=chunks_processed,
+        users_per_second=round(users_processed / elapsed_seconds, 2) if elapsed_seconds > 0 else None,
     )
 
 
@@ -169,6 +182,19 @@ def tick_daily_credit_reset() -> CreditResetTickResponse:
                 run_result=None,
             )
 
+        if schedule.refill_mode == CreditRefillMode.lazy.value:
+            # Balances refill on their next read/consume; only advance the schedule.
+            schedule.last_run_at = checked_at
+            schedule.next_run_at = _compute_next_run(schedule.reset_hour_utc, schedule.reset_minute_utc, checked_at)
+            schedule.updated_at = utc_now()
+            return CreditResetTickResponse(
+                checked_at=checked_at,
+                due=True,
+                ran=False,
+                skipped_reason="lazy_refill_mode",
+                run_result=None,
+            )
+
     run_result = run_daily_credit_reset(dry_run=False, run_at=checked_at)
     return CreditResetTickResponse(
         checked_at=checked_at,
@@ -179,16 +205,273 @@ def tick_daily_credit_reset() -> CreditResetTickResponse:
     )
 
 
-def _resolve_target_balance(
-    plan_id: str,
-    plan_daily_credits: dict[str, int],
-    schedule: CreditResetScheduleModel,
+def apply_lazy_refill(session, user_id: str, now: datetime | None = None) -> int | None:
+    """Refill one user to its plan target if a reset boundary passed since its last refill.
+
+    Runs inside the caller's transaction. Returns the new balance when the refill
+    check ran, or ``None`` when lazy mode is off or the user is already current.
+    """
+    schedule = session.get(CreditResetScheduleModel, _SCHEDULE_ID)
+    if not schedule or not schedule.enabled or schedule.refill_mode != CreditRefillMode.lazy.value:
+        return None
+
+    reference = now or utc_now()
+    refill_date = _current_refill_date(schedule, reference)
+    balance_model = session.get(CreditBalanceModel, user_id)
+    if balance_model and balance_model.last_refill_date and balance_model.last_refill_date >= refill_date:
+        return None
+
+    entitlement = session.get(SubscriptionEntitlementModel, user_id)
+    plan_id = (
+        entitlement.plan_id
+        if entitlement and entitlement.status == "active" and entitlement.plan_id
+        else "free"
+    )
+    target_balance = _plan_target_balances(schedule).get(plan_id, schedule.free_daily_credits)
+    held_amount = session.execute(
+        select(func.coalesce(func.sum(CreditHoldModel.amount), 0)).where(
+            CreditHoldModel.user_id == user_id,
+            CreditHoldModel.status == CreditHoldStatus.held.value,
+        )
+    ).scalar_one()
+    # Open holds were debited without a ledger row; settling them later must land on the target.
+    delta = target_balance - int(held_amount) - (balance_model.balance if balance_model else 0)
+
+    applied_delta = 0
+    if delta != 0:
+        # Same key as the batch reset, so a batch run and a lazy refill never both apply.
+        ledger_insert = (
+            dialect_insert(CreditLedgerEntryModel)
+            .values(
+                user_id=user_id,
+                delta=delta,
+                reason="daily_reset",
+                idempotency_key=f"daily_reset:{refill_date.isoformat()}:{user_id}",
+                metadata_json={"plan_id": plan_id, "target_balance": target_balance, "mode": "lazy"},
+                created_at=reference,
+            )
+            .on_conflict_do_nothing(index_elements=[CreditLedgerEntryModel.idempotency_key])
+            .returning(CreditLedgerEntryModel.id)
+        )
+        if session.execute(ledger_insert).first() is not None:
+            applied_delta = delta
+
+    balance_upsert = dialect_insert(CreditBalanceModel).values(
+        user_id=user_id,
+        balance=applied_delta,
+        last_refill_date=refill_date,
+        updated_at=reference,
+    )
+    balance_upsert = balance_upsert.on_conflict_do_update(
+        index_elements=[CreditBalanceModel.user_id],
+        set_={
+            "balance": CreditBalanceModel.balance + balance_upsert.excluded.balance,
+            "last_refill_date": balance_upsert.excluded.last_refill_date,
+            "updated_at": balance_upsert.excluded.updated_at,
+        },
+    ).returning(CreditBalanceModel.balance)
+    return int(session.execute(balance_upsert).scalar_one())
+
+
+def _current_refill_date(schedule: CreditResetScheduleModel, reference: datetime) -> date:
+    boundary = reference.replace(
+        hour=schedule.reset_hour_utc,
+        minute=schedule.reset_minute_utc,
+        second=0,
+        microsecond=0,
+    )
+    if boundary > reference:
+        boundary = boundary - timedelta(days=1)
+    return boundary.date()
+
+
+def _plan_target_balances(schedule: CreditResetScheduleModel) -> dict[str, int]:
+    targets = {plan.plan_id: plan.daily_credits for plan in list_plans()}
+    targets["free"] = schedule.free_daily_credits
+    targets["pro"] = schedule.pro_daily_credits
+    return targets
+
+
+def _next_user_chunk(session, after_user_id: str | None, limit: int) -> list[str]:
+    parts = []
+    for column in (CreditBalanceModel.user_id, SubscriptionEntitlementModel.user_id):
+        stmt = select(column.label("user_id"))
+        if after_user_id is not None:
+            stmt = stmt.where(column > after_user_id)
+        page = stmt.order_by(column).limit(limit).subquery()
+        parts.append(select(page.c.user_id))
+
+    users = union(*parts).subquery()
+    stmt = select(users.c.user_id).order_by(users.c.user_id).limit(limit)
+    return list(session.execute(stmt).scalars().all())
+
+
+def _in_chunk(column, chunk_bounds: tuple[str | None, str]):
+    lower, upper = chunk_bounds
+    if lower is None:
+        return column <= upper
+    return and_(column > lower, column <= upper)
+
+
+def _reset_candidates(
+    session,
+    *,
+    chunk_bounds: tuple[str | None, str],
+    key_prefix: str,
+    target_by_plan: dict[str, int],
+    default_target: int,
+    now: datetime,
+):
+    """Select one ledger row per user in the chunk whose balance differs from its plan target.
+
+    Open credit holds already lowered the balance without a ledger row, so the reset aims at the
+    target minus what is held: a later release then lands exactly on the target, and a capture
+    keeps the ledger sum equal to the balance.
+    """
+    users = union(
+        select(CreditBalanceModel.user_id.label("user_id")).where(_in_chunk(CreditBalanceModel.user_id, chunk_bounds)),
+        select(SubscriptionEntitlementModel.user_id.label("user_id")).where(
+            _in_chunk(SubscriptionEntitlementModel.user_id, chunk_bounds)
+        ),
+    ).subquery("reset_users")
+
+    effective_plan_id = case(
+        (
+            and_(
+                SubscriptionEntitlementModel.status == "active",
+                func.coalesce(SubscriptionEntitlementModel.plan_id, "") != "",
+            ),
+            SubscriptionEntitlementModel.plan_id,
+        ),
+        else_=literal("free"),
+    )
+    target_balance = case(
+        *[(effective_plan_id == plan_id, credits) for plan_id, credits in target_by_plan.items()],
+        else_=default_target,
+    )
+    open_holds = (
+        select(CreditHoldModel.user_id, func.sum(CreditHoldModel.amount).label("held_amount"))
+        .where(
+            CreditHoldModel.status == CreditHoldStatus.held.value,
+            _in_chunk(CreditHoldModel.user_id, chunk_bounds),
+        )
+        .group_by(CreditHoldModel.user_id)
+        .subquery("open_holds")
+    )
+    current_balance = func.coalesce(CreditBalanceModel.balance, 0)
+    reset_balance = target_balance - func.coalesce(open_holds.c.held_amount, 0)
+    json_object = func.json_build_object if session.get_bind().dialect.name == "postgresql" else func.json_object
+
+    return (
+        select(
+            users.c.user_id,
+            (reset_balance - current_balance).label("delta"),
+            literal("daily_reset").label("reason"),
+            (literal(key_prefix) + users.c.user_id).label("idempotency_key"),
+            json_object(
+                literal_column("'plan_id'"),
+                effective_plan_id,
+                literal_column("'target_balance'"),
+                target_balance,
+            ).label("metadata_json"),
+            literal(now, DateTime).label("created_at"),
+        )
+        .select_from(users)
+        .outerjoin(CreditBalanceModel, CreditBalanceModel.user_id == users.c.user_id)
+        .outerjoin(SubscriptionEntitlementModel, SubscriptionEntitlementModel.user_id == users.c.user_id)
+        .outerjoin(open_holds, open_holds.c.user_id == users.c.user_id)
+        .where(reset_balance != current_balance)
+    )
+
+
+def _count_pending_resets(
+    session,
+    *,
+    chunk_bounds: tuple[str | None, str],
+    key_prefix: str,
+    target_by_plan: dict[str, int],
+    default_target: int,
+) -> int:
+    candidates = _reset_candidates(
+        session,
+        chunk_bounds=chunk_bounds,
+        key_prefix=key_prefix,
+        target_by_plan=target_by_plan,
+        default_target=default_target,
+        now=utc_now(),
+    ).subquery()
+    already_reset = select(CreditLedgerEntryModel.id).where(
+        CreditLedgerEntryModel.idempotency_key == candidates.c.idempotency_key
+    )
+    stmt = select(func.count()).select_from(candidates).where(~already_reset.exists())
+    return int(session.execute(stmt).scalar_one() or 0)
+
+
+def _apply_reset_chunk(
+    session,
+    *,
+    chunk_bounds: tuple[str | None, str],
+    refill_date: date,
+    key_prefix: str,
+    target_by_plan: dict[str, int],
+    default_target: int,
 ) -> int:
-    if plan_id == "free":
-        return schedule.free_daily_credits
-    if plan_id == "pro":
-        return schedule.pro_daily_credits
-    return plan_daily_credits.get(plan_id, schedule.free_daily_credits)
+    now = utc_now()
+
+    # Entitlement-only users get a zero balance row so the bulk UPDATE below can refill them.
+    missing_balances = select(
+        SubscriptionEntitlementModel.user_id,
+        literal(0).label("balance"),
+        literal(now, DateTime).label("updated_at"),
+    ).where(_in_chunk(SubscriptionEntitlementModel.user_id, chunk_bounds))
+    session.execute(
+        dialect_insert(CreditBalanceModel)
+        .from_select(["user_id", "balance", "updated_at"], missing_balances)
+        .on_conflict_do_nothing(index_elements=[CreditBalanceModel.user_id])
+    )
+
+    candidates = _reset_candidates(
+        session,
+        chunk_bounds=chunk_bounds,
+        key_prefix=key_prefix,
+        target_by_plan=target_by_plan,
+        default_target=default_target,
+        now=now,
+    )
+    ledger_insert = (
+        dialect_insert(CreditLedgerEntryModel)
+        .from_select(
+            ["user_id", "delta", "reason", "idempotency_key", "metadata_json", "created_at"],
+            candidates,
+        )
+        .on_conflict_do_nothing(index_elements=[CreditLedgerEntryModel.idempotency_key])
+        .returning(CreditLedgerEntryModel.user_id)
+    )
+    reset_user_ids = list(session.execute(ledger_insert).scalars().all())
+
+    if reset_user_ids:
+        # Apply the recorded delta rather than assigning the target, so a consume that
+        # lands mid-chunk stays reflected in both the balance and the ledger sum.
+        recorded_delta = (
+            select(CreditLedgerEntryModel.delta)
+            .where(CreditLedgerEntryModel.idempotency_key == literal(key_prefix) + CreditBalanceModel.user_id)
+            .scalar_subquery()
+        )
+        session.execute(
+            update(CreditBalanceModel)
+            .where(CreditBalanceModel.user_id.in_(reset_user_ids))
+            .values(balance=CreditBalanceModel.balance + recorded_delta, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+
+    # Lets lazy refill skip users the batch already covered for this reset day.
+    session.execute(
+        update(CreditBalanceModel)
+        .where(_in_chunk(CreditBalanceModel.user_id, chunk_bounds))
+        .values(last_refill_date=refill_date)
+        .execution_options(synchronize_session=False)
+    )
+    return len(reset_user_ids)
 
 
 def _get_or_create_schedule(session) -> CreditResetScheduleModel:
@@ -220,6 +503,7 @@ def _compute_next_run(hour: int, minute: int, reference: datetime) -> datetime:
 def _to_schema(schedule: CreditResetScheduleModel) -> CreditResetScheduleResponse:
     return CreditResetScheduleResponse(
         enabled=schedule.enabled,
+        refill_mode=CreditRefillMode(schedule.refill_mode or CreditRefillMode.batch.value),
         reset_hour_utc=schedule.reset_hour_utc,
         reset_minute_utc=schedule.reset_minute_utc,
         free_daily_credits=schedule.free_daily_credits,
@@ -1,17 +1,36 @@
 from __future__ import annotations
 
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
+from uuid import uuid4
+
 from app.time_utils import utc_now
 
-from sqlalchemy import select
+from sqlalchemy import select, update
+
+from app.credit_reset_store import apply_lazy_refill
+from app.db import dialect_insert, session_scope
+from app.models import CreditBalanceModel, CreditHoldModel, CreditLedgerEntryModel
+from app.schemas import (
+    CreditBalanceResponse,
+    CreditConsumeRequest,
+    CreditGrantRequest,
+    CreditHoldRequest,
+    CreditHoldResponse,
+    CreditHoldStatus,
+    CreditHoldSweepResponse,
+    CreditOperationResponse,
+)
 
-from app.db import session_scope
-from app.models import CreditBalanceModel, CreditLedgerEntryModel
-from app.schemas import CreditBalanceResponse, CreditConsumeRequest, CreditGrantRequest, CreditOperationResponse
+_HOLD_SWEEP_CHUNK_SIZE = 500
 
 
 def get_balance(user_id: str) -> CreditBalanceResponse:
     with session_scope() as session:
+        refilled_balance = apply_lazy_refill(session, user_id)
+        if refilled_balance is not None:
+            return CreditBalanceResponse(user_id=user_id, balance=refilled_balance)
+
         balance_model = session.get(CreditBalanceModel, user_id)
         if not balance_model:
             return CreditBalanceResponse(user_id=user_id, balance=0)
@@ -20,81 +39,296 @@ def get_balance(user_id: str) -> CreditBalanceResponse:
 
 def consume_credits(payload: CreditConsumeRequest) -> CreditOperationResponse:
     with session_scope() as session:
-        if payload.idempotency_key:
-            existing = _find_ledger_by_idempotency(session, payload.idempotency_key)
-            if existing:
-                balance_model = session.get(CreditBalanceModel, payload.user_id)
-                return CreditOperationResponse(
-                    user_id=payload.user_id,
-                    balance=balance_model.balance if balance_model else 0,
-                    applied=False,
-                )
+        apply_lazy_refill(session, payload.user_id)
 
-        balance_model = session.get(CreditBalanceModel, payload.user_id)
-        if not balance_model:
-            balance_model = CreditBalanceModel(user_id=payload.user_id, balance=0)
-            session.add(balance_model)
+        # Claim the idempotency key first; a duplicate request becomes a no-op insert
+        # instead of a SELECT-then-INSERT race.
+        inserted = _insert_ledger_entry(
+            session,
+            user_id=payload.user_id,
+            delta=-payload.amount,
+            reason=payload.reason,
+            idempotency_key=payload.idempotency_key,
+            metadata=payload.metadata,
+        )
+        if not inserted:
+            return CreditOperationResponse(
+                user_id=payload.user_id,
+                balance=_read_balance(session, payload.user_id),
+                applied=False,
+            )
 
-        if balance_model.balance < payload.amount:
+        # Single conditional UPDATE: the balance check and decrement cannot interleave
+        # with a concurrent consume for the same user.
+        stmt = (
+            update(CreditBalanceModel)
+            .where(
+                CreditBalanceModel.user_id == payload.user_id,
+                CreditBalanceModel.balance >= payload.amount,
+            )
+            .values(balance=CreditBalanceModel.balance - payload.amount, updated_at=utc_now())
+            .returning(CreditBalanceModel.balance)
+            .execution_options(synchronize_session=False)
+        )
+        new_balance = session.execute(stmt).scalar_one_or_none()
+        if new_balance is None:
+            # Rolls back the ledger insert above.
             raise ValueError("insufficient_credits")
 
-        balance_model.balance -= payload.amount
-        balance_model.updated_at = utc_now()
+        return CreditOperationResponse(
+            user_id=payload.user_id,
+            balance=int(new_balance),
+            applied=True,
+        )
 
-        session.add(
-            CreditLedgerEntryModel(
+
+def grant_credits(payload: CreditGrantRequest) -> CreditOperationResponse:
+    with session_scope() as session:
+        inserted = _insert_ledger_entry(
+            session,
+            user_id=payload.user_id,
+            delta=payload.amount,
+            reason=payload.reason,
+            idempotency_key=payload.idempotency_key,
+            metadata=payload.metadata,
+        )
+        if not inserted:
+            return CreditOperationResponse(
                 user_id=payload.user_id,
-                delta=-payload.amount,
-                reason=payload.reason,
-                idempotency_key=payload.idempotency_key,
-                metadata_json=payload.metadata,
+                balance=_read_balance(session, payload.user_id),
+                applied=False,
             )
-        )
 
+        new_balance = _increment_balance(session, payload.user_id, payload.amount)
         return CreditOperationResponse(
             user_id=payload.user_id,
-            balance=balance_model.balance,
+            balance=new_balance,
             applied=True,
         )
 
 
-def grant_credits(payload: CreditGrantRequest) -> CreditOperationResponse:
+def hold_credits(payload: CreditHoldRequest) -> CreditHoldResponse:
+    """Reserve credits without writing the ledger; capture or release resolves the hold."""
+    now = utc_now()
+    expires_at = now + timedelta(seconds=payload.ttl_seconds)
+
     with session_scope() as session:
+        apply_lazy_refill(session, payload.user_id)
+
+        hold_id = str(uuid4())
+        stmt = dialect_insert(CreditHoldModel).values(
+            id=hold_id,
+            user_id=payload.user_id,
+            amount=payload.amount,
+            status=CreditHoldStatus.held.value,
+            reason=payload.reason,
+            idempotency_key=payload.idempotency_key,
+            metadata_json=payload.metadata,
+            expires_at=expires_at,
+            created_at=now,
+        )
         if payload.idempotency_key:
-            existing = _find_ledger_by_idempotency(session, payload.idempotency_key)
-            if existing:
-                balance_model = session.get(CreditBalanceModel, payload.user_id)
-                return CreditOperationResponse(
-                    user_id=payload.user_id,
-                    balance=balance_model.balance if balance_model else 0,
+            stmt = stmt.on_conflict_do_nothing(index_elements=[CreditHoldModel.idempotency_key])
+        inserted = session.execute(stmt.returning(CreditHoldModel.id)).first() is not None
+
+        if not inserted:
+            existing = session.execute(
+                select(CreditHoldModel).where(CreditHoldModel.idempotency_key == payload.idempotency_key)
+            ).scalar_one()
+            hold_id = existing.id
+            # A replay of a hold that was already given back reserves again; an open or
+            # captured hold is returned as-is so the caller is never charged twice.
+            rearmed = session.execute(
+                update(CreditHoldModel)
+                .where(
+                    CreditHoldModel.id == hold_id,
+                    CreditHoldModel.status.in_([CreditHoldStatus.released.value, CreditHoldStatus.expired.value]),
+                )
+                .values(
+                    status=CreditHoldStatus.held.value,
+                    amount=payload.amount,
+                    expires_at=expires_at,
+                    resolved_at=None,
+                )
+                .returning(CreditHoldModel.id)
+                .execution_options(synchronize_session=False)
+            ).first()
+            if rearmed is None:
+                return CreditHoldResponse(
+                    hold_id=existing.id,
+                    user_id=existing.user_id,
+                    amount=existing.amount,
+                    status=CreditHoldStatus(existing.status),
+                    balance=_read_balance(session, payload.user_id),
                     applied=False,
+                    expires_at=existing.expires_at,
                 )
 
-        balance_model = session.get(CreditBalanceModel, payload.user_id)
-        if not balance_model:
-            balance_model = CreditBalanceModel(user_id=payload.user_id, balance=0)
-            session.add(balance_model)
+        new_balance = session.execute(
+            update(CreditBalanceModel)
+            .where(
+                CreditBalanceModel.user_id == payload.user_id,
+                CreditBalanceModel.balance >= payload.amount,
+            )
+            .values(balance=CreditBalanceModel.balance - payload.amount, updated_at=now)
+            .returning(CreditBalanceModel.balance)
+            .execution_options(synchronize_session=False)
+        ).scalar_one_or_none()
+        if new_balance is None:
+            raise ValueError("insufficient_credits")
+
+        return CreditHoldResponse(
+            hold_id=hold_id,
+            user_id=payload.user_id,
+            amount=payload.amount,
+            status=CreditHoldStatus.held,
+            balance=int(new_balance),
+            applied=True,
+            expires_at=expires_at,
+        )
 
-        balance_model.balance += payload.amount
-        balance_model.updated_at = utc_now()
 
-        session.add(
-            CreditLedgerEntryModel(
-                user_id=payload.user_id,
-                delta=payload.amount,
-                reason=payload.reason,
-                idempotency_key=payload.idempotency_key,
-                metadata_json=payload.metadata,
-            )
+def capture_credit_hold(hold_id: str) -> CreditOperationResponse:
+    with session_scope() as session:
+        hold = _resolve_hold(session, hold_id, CreditHoldStatus.captured)
+        if hold is None:
+            return _hold_noop_response(session, hold_id)
+
+        # The balance was already debited by the hold; capture only records the spend.
+        _insert_ledger_entry(
+            session,
+            user_id=hold.user_id,
+            delta=-hold.amount,
+            reason=hold.reason,
+            idempotency_key=hold.idempotency_key or f"credit_hold:{hold.id}",
+            metadata={**(hold.metadata_json or {}), "hold_id": hold.id},
+        )
+        return CreditOperationResponse(
+            user_id=hold.user_id,
+            balance=_read_balance(session, hold.user_id),
+            applied=True,
         )
 
+
+def release_credit_hold(hold_id: str) -> CreditOperationResponse:
+    with session_scope() as session:
+        hold = _resolve_hold(session, hold_id, CreditHoldStatus.released)
+        if hold is None:
+            return _hold_noop_response(session, hold_id)
+
         return CreditOperationResponse(
-            user_id=payload.user_id,
-            balance=balance_model.balance,
+            user_id=hold.user_id,
+            balance=_increment_balance(session, hold.user_id, hold.amount),
             applied=True,
         )
 
 
-def _find_ledger_by_idempotency(session, idempotency_key: str) -> CreditLedgerEntryModel | None:
-    stmt = select(CreditLedgerEntryModel).where(CreditLedgerEntryModel.idempotency_key == idempotency_key)
-    return session.execute(stmt).scalar_one_or_none()
+def expire_credit_holds(
+    now: datetime | None = None,
+    chunk_size: int = _HOLD_SWEEP_CHUNK_SIZE,
+) -> CreditHoldSweepResponse:
+    checked_at = now or utc_now()
+    expired_holds = 0
+    credits_returned = 0
+
+    while True:
+        with session_scope() as session:
+            due_ids = (
+                select(CreditHoldModel.id)
+                .where(
+                    CreditHoldModel.status == CreditHoldStatus.held.value,
+                    CreditHoldModel.expires_at <= checked_at,
+                )
+                .order_by(CreditHoldModel.expires_at)
+                .limit(chunk_size)
+                .scalar_subquery()
+            )
+            rows = session.execute(
+                update(CreditHoldModel)
+                .where(CreditHoldModel.id.in_(due_ids), CreditHoldModel.status == CreditHoldStatus.held.value)
+                .values(status=CreditHoldStatus.expired.value, resolved_at=checked_at)
+                .returning(CreditHoldModel.user_id, CreditHoldModel.amount)
+                .execution_options(synchronize_session=False)
+            ).all()
+
+            returned_by_user: dict[str, int] = defaultdict(int)
+            for user_id, amount in rows:
+                returned_by_user[user_id] += int(amount)
+            for user_id, amount in returned_by_user.items():
+                _increment_balance(session, user_id, amount)
+
+        expired_holds += len(rows)
+        credits_returned += sum(returned_by_user.values())
+        if len(rows) < chunk_size:
+            break
+
+    return CreditHoldSweepResponse(
+        checked_at=checked_at,
+        expired_holds=expired_holds,
+        credits_returned=credits_returned,
+    )
+
+
+def _resolve_hold(session, hold_id: str, status: CreditHoldStatus) -> CreditHoldModel | None:
+    # Conditional transition: capture, release and the sweeper race on the same row,
+    # and only the first one to move it out of "held" gets to act on it.
+    row = session.execute(
+        update(CreditHoldModel)
+        .where(CreditHoldModel.id == hold_id, CreditHoldModel.status == CreditHoldStatus.held.value)
+        .values(status=status.value, resolved_at=utc_now())
+        .returning(CreditHoldModel.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        return None
+    return session.get(CreditHoldModel, hold_id, populate_existing=True)
+
+
+def _hold_noop_response(session, hold_id: str) -> CreditOperationResponse:
+    hold = session.get(CreditHoldModel, hold_id)
+    if not hold:
+        raise ValueError("credit_hold_not_found")
+    return CreditOperationResponse(
+        user_id=hold.user_id,
+        balance=_read_balance(session, hold.user_id),
+        applied=False,
+    )
+
+
+def _insert_ledger_entry(
+    session,
+    *,
+    user_id: str,
+    delta: int,
+    reason: str,
+    idempotency_key: str | None,
+    metadata: dict,
+) -> bool:
+    stmt = dialect_insert(CreditLedgerEntryModel).values(
+        user_id=user_id,
+        delta=delta,
+        reason=reason,
+        idempotency_key=idempotency_key,
+        metadata_json=metadata,
+        created_at=utc_now(),
+    )
+    if idempotency_key:
+        stmt = stmt.on_conflict_do_nothing(index_elements=[CreditLedgerEntryModel.idempotency_key])
+    return session.execute(stmt.returning(CreditLedgerEntryModel.id)).first() is not None
+
+
+def _increment_balance(session, user_id: str, amount: int) -> int:
+    stmt = dialect_insert(CreditBalanceModel).values(user_id=user_id, balance=amount, updated_at=utc_now())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CreditBalanceModel.user_id],
+        set_={
+            "balance": CreditBalanceModel.balance + stmt.excluded.balance,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ).returning(CreditBalanceModel.balance)
+    return int(session.execute(stmt).scalar_one())
+
+
+def _read_balance(session, user_id: str) -> int:
+    balance_model = session.get(CreditBalanceModel, user_id)
+    return balance_model.balance if balance_model else 0
@@ -5,6 +5,7 @@ from contextlib import contextmanager
 from typing import Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
@@ -42,3 +43,10 @@ def session_scope() -> Generator:
         raise
     finally:
         session.close()
+
+
+def dialect_insert(model):
+    """Return an INSERT construct supporting ``on_conflict_*`` clauses for the active backend."""
+    if engine.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    return sqlite.insert(model)
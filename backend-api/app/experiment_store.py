@@ -9,6 +9,7 @@ from typing import Any
 
 from sqlalchemy import delete, desc, select
 
+from app.analytics_partitions import analytics_events_source
 from app.db import session_scope
 from app.models import (
     AdminAuditLogModel,
@@ -362,7 +363,8 @@ def evaluate_experiment_guardrails(
 
     checked_at = utc_now()
     window_hours = max(1, int(hours))
-    dashboard = get_analytics_dashboard(hours=window_hours)
+    # Guardrails act on the numbers, so read rollups that include every event up to now.
+    dashboard = get_analytics_dashboard(hours=window_hours, max_staleness_seconds=0)
     experiment_metrics = {item.experiment_id: item for item in dashboard.experiment_breakdown}
     variables = get_variable_map()
     required_streak_raw = _safe_float(variables.get("experiment_guardrail_consecutive_runs_required"))
@@ -512,13 +514,14 @@ def get_experiment_performance(*, experiment_id: str, hours: int) -> ExperimentP
         all_user_ids = set().union(*users_by_variant.values()) if users_by_variant else set()
 
         if all_user_ids:
+            analytics_events = analytics_events_source(since=window_start)
             event_stmt = (
-                select(AnalyticsEventModel)
+                select(analytics_events)
                 .where(
-                    AnalyticsEventModel.user_id.in_(all_user_ids),
-                    AnalyticsEventModel.occurred_at >= window_start,
+                    analytics_events.user_id.in_(all_user_ids),
+                    analytics_events.occurred_at >= window_start,
                 )
-                .order_by(AnalyticsEventModel.id)
+                .order_by(analytics_events.id)
             )
             events = session.execute(event_stmt).scalars().all()
 
@@ -718,13 +721,14 @@ def get_experiment_trends(*, experiment_id: str, hours: int, bucket_hours: int)
         all_user_ids = set(variant_by_user.keys())
 
         if all_user_ids:
+            analytics_events = analytics_events_source(since=window_start)
             event_stmt = (
-                select(AnalyticsEventModel)
+                select(analytics_events)
                 .where(
-                    AnalyticsEventModel.user_id.in_(all_user_ids),
-                    AnalyticsEventModel.occurred_at >= window_start,
+                    analytics_events.user_id.in_(all_user_ids),
+                    analytics_events.occurred_at >= window_start,
                 )
-                .order_by(AnalyticsEventModel.id)
+                .order_by(analytics_events.id)
             )
             events = session.execute(event_stmt).scalars().all()
 
@@ -788,7 +792,8 @@ def get_experiment_trends(*, experiment_id: str, hours: int, bucket_hours: int)
             if row.status == JobStatus.completed.value:
                 bucket["render_success"] += 1
             if row.latency_ms is not None:
-                bucket["latencies"].append(int(row.latency_ms))
+                bucket["latency_ms_sum"] += int(row.latency_ms)
+                bucket["latency_count"] += 1
             if row.cost_usd is not None:
                 bucket["total_cost_usd"] += float(row.cost_usd)
 
@@ -858,7 +863,6 @@ def get_experiment_trends(*, experiment_id: str, hours: int, bucket_hours: int)
 
             render_events = int(bucket["render_events"])
             render_success = int(bucket["render_success"])
-            latencies = list(bucket["latencies"])
             preview_users = len(bucket["preview_users"])
             final_users = len(bucket["final_users"])
             checkout_started_users = len(bucket["checkout_users"])
@@ -887,7 +891,9 @@ def get_experiment_trends(*, experiment_id: str, hours: int, bucket_hours: int)
                     assigned_users=assigned_users,
                     render_events=render_events,
                     render_success_rate=_rate(render_success, render_events),
-                    avg_latency_ms=_rounded(_avg(latencies)),
+                    avg_latency_ms=_rounded(
+                        bucket["latency_ms_sum"] / bucket["latency_count"] if bucket["latency_count"] else None
+                    ),
                     total_cost_usd=round(float(bucket["total_cost_usd"]), 6),
                     preview_users=preview_users,
                     final_users=final_users,
@@ -1559,7 +1565,8 @@ def _new_bucket_accumulator() -> dict[str, Any]:
     return {
         "render_events": 0,
         "render_success": 0,
-        "latencies": [],
+        "latency_ms_sum": 0,
+        "latency_count": 0,
         "total_cost_usd": 0.0,
         "preview_users": set(),
         "final_users": set(),
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import csv
+import io
+import itertools
+import json
+import zlib
+from dataclasses import dataclass
+from datetime import UTC, date, datetime
+from typing import Any, Callable, Iterable, Iterator
+
+from sqlalchemy import inspect, select, tuple_
+
+from app.analytics_partitions import analytics_events_source
+from app.db import session_scope
+from app.models import AnalyticsEventModel, CreditLedgerEntryModel, RenderJobModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json fallback
+    orjson = None
+
+FORMAT_NDJSON = "ndjson"
+FORMAT_CSV = "csv"
+EXPORT_FORMATS = (FORMAT_NDJSON, FORMAT_CSV)
+EXPORT_MEDIA_TYPES = {FORMAT_NDJSON: "application/x-ndjson", FORMAT_CSV: "text/csv"}
+
+_DEFAULT_BATCH_SIZE = 1000
+_MAX_BATCH_SIZE = 10000
+
+
+@dataclass(frozen=True)
+class ExportTable:
+    name: str
+    columns: tuple[str, ...]
+    # Column the [since, until) range and the keyset cursor are ordered on, together with `id`.
+    time_column: str
+    source: Callable[[datetime, datetime], Any]
+
+
+def _table(model: Any, time_column: str, source: Callable[[datetime, datetime], Any] | None = None) -> ExportTable:
+    return ExportTable(
+        name=model.__tablename__,
+        columns=tuple(attr.key for attr in inspect(model).column_attrs),
+        time_column=time_column,
+        source=source or (lambda since, until: model),
+    )
+
+
+EXPORT_TABLES: dict[str, ExportTable] = {
+    item.name: item
+    for item in (
+        _table(AnalyticsEventModel, "occurred_at", analytics_events_source),
+        _table(CreditLedgerEntryModel, "created_at"),
+        _table(RenderJobModel, "created_at"),
+    )
+}
+
+
+def stream_export(
+    table: str,
+    since: datetime,
+    until: datetime,
+    export_format: str = FORMAT_NDJSON,
+    compress: bool = False,
+    batch_size: int = _DEFAULT_BATCH_SIZE,
+) -> Iterator[bytes]:
+    """Validate the request up front and return a byte-chunk iterator over the rows.
+
+    Rows are read in keyset pages of `batch_size` ordered by `(time_column, id)`, each page in
+    its own short transaction, so memory stays flat and no snapshot is held open for the
+    length of a large export. Errors raise here, before the first chunk is produced.
+    """
+    spec = EXPORT_TABLES.get(table)
+    if spec is None:
+        raise ValueError("unknown_export_table")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError("unknown_export_format")
+    since, until = _as_naive_utc(since), _as_naive_utc(until)
+    if until <= since:
+        raise ValueError("invalid_export_range")
+
+    batches = _iter_batches(spec, since, until, min(max(1, batch_size), _MAX_BATCH_SIZE))
+    if export_format == FORMAT_NDJSON:
+        chunks = (_encode_ndjson(spec.columns, batch) for batch in batches)
+    else:
+        rows = (_encode_csv([_csv_value(value) for value in row] for row in batch) for batch in batches)
+        chunks = itertools.chain([_encode_csv([spec.columns])], rows)
+    return _gzip_chunks(chunks) if compress else chunks
+
+
+def _iter_batches(spec: ExportTable, since: datetime, until: datetime, batch_size: int) -> Iterator[list[tuple]]:
+    entity = spec.source(since, until)
+    time_column = getattr(entity, spec.time_column)
+    columns = [getattr(entity, name) for name in spec.columns]
+    base = (
+        select(time_column, entity.id, *columns)
+        .where(time_column >= since, time_column < until)
+        .order_by(time_column, entity.id)
+        .limit(batch_size)
+    )
+
+    cursor: tuple[datetime, Any] | None = None
+    while True:
+        stmt = base if cursor is None else base.where(tuple_(time_column, entity.id) > cursor)
+        with session_scope() as session:
+            rows = session.execute(stmt).all()
+        if not rows:
+            return
+        cursor = (rows[-1][0], rows[-1][1])
+        yield [tuple(row)[2:] for row in rows]
+        if len(rows) < batch_size:
+            return
+
+
+def _encode_ndjson(columns: tuple[str, ...], batch: list[tuple]) -> bytes:
+    return b"".join(_json_bytes(dict(zip(columns, row))) + b"\n" for row in batch)
+
+
+def _encode_csv(rows: Iterable[Iterable[Any]]) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        # JSON columns are embedded as compact JSON text.
+        return json.dumps(value, separators=(",", ":"), sort_keys=True)
+    return value
+
+
+def _json_bytes(payload: dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Unsupported export value: {type(value).__name__}")
+
+
+def _as_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import math
+from typing import Any, Iterable
+
+_DEFAULT_PRECISION = 12
+_MIN_PRECISION = 4
+_MAX_PRECISION = 16
+_HASH_BITS = 64
+
+
+class HyperLogLog:
+    """Mergeable distinct counter with `2 ** precision` one-byte registers.
+
+    Like `LatencySketch`, small sketches stay exact: they keep the 64-bit hashes themselves
+    until `exact_limit` distinct values, so per-hour rollup rows for quiet dimensions stay
+    tiny and their counts exact. Past that the hashes collapse into registers with a
+    standard error of about `1.04 / sqrt(2 ** precision)` (1.6% at the default precision).
+    Sketches of different precision merge by folding the finer one down.
+    """
+
+    __slots__ = ("precision", "exact_limit", "_hashes", "_registers")
+
+    def __init__(self, precision: int = _DEFAULT_PRECISION, exact_limit: int | None = None) -> None:
+        self.precision = min(max(int(precision), _MIN_PRECISION), _MAX_PRECISION)
+        # By default stay exact while the hash list is smaller than the dense registers.
+        self.exact_limit = max(0, exact_limit if exact_limit is not None else (1 << self.precision) // 16)
+        self._hashes: set[int] | None = set()
+        self._registers: bytearray | None = None
+
+    @property
+    def is_exact(self) -> bool:
+        return self._hashes is not None
+
+    def add(self, value: str) -> None:
+        self.add_hash(_hash(value))
+
+    def update(self, values: Iterable[str]) -> None:
+        for value in values:
+            self.add(value)
+
+    def add_hash(self, hashed: int) -> None:
+        if self._hashes is not None:
+            self._hashes.add(hashed)
+            if len(self._hashes) > self.exact_limit:
+                self._collapse()
+            return
+        self._add_to_registers(hashed)
+
+    def merge(self, other: HyperLogLog) -> None:
+        if other._hashes is not None:
+            for hashed in other._hashes:
+                self.add_hash(hashed)
+            return
+        if other.precision < self.precision:
+            self._reduce_precision(other.precision)
+        elif self._hashes is not None:
+            self._collapse()
+        registers = other._registers or bytearray(1 << other.precision)
+        if other.precision > self.precision:
+            registers = _fold(registers, other.precision, self.precision)
+        assert self._registers is not None
+        for index, rank in enumerate(registers):
+            if rank > self._registers[index]:
+                self._registers[index] = rank
+
+    def count(self) -> int:
+        if self._hashes is not None:
+            return len(self._hashes)
+        assert self._registers is not None
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -rank for rank in self._registers)
+        zeros = self._registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting).
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_json(self) -> dict[str, Any]:
+        if self._hashes is not None:
+            return {"p": self.precision, "h": sorted(self._hashes)}
+        assert self._registers is not None
+        return {"p": self.precision, "r": base64.b64encode(bytes(self._registers)).decode("ascii")}
+
+    @classmethod
+    def from_json(cls, payload: dict[str, Any] | None, exact_limit: int | None = None) -> HyperLogLog:
+        payload = payload or {}
+        sketch = cls(precision=int(payload.get("p", _DEFAULT_PRECISION)), exact_limit=exact_limit)
+        if "r" in payload:
+            sketch._hashes = None
+            sketch._registers = bytearray(base64.b64decode(payload["r"]))
+        else:
+            sketch._hashes = {int(hashed) for hashed in payload.get("h", [])}
+        return sketch
+
+    def _collapse(self) -> None:
+        hashes, self._hashes = self._hashes or set(), None
+        self._registers = bytearray(1 << self.precision)
+        for hashed in hashes:
+            self._add_to_registers(hashed)
+
+    def _add_to_registers(self, hashed: int) -> None:
+        assert self._registers is not None
+        index = hashed >> (_HASH_BITS - self.precision)
+        remaining_bits = _HASH_BITS - self.precision
+        remaining = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - remaining.bit_length() + 1
+        if rank > self._registers[index]:
+            self._registers[index] = rank
+
+    def _reduce_precision(self, precision: int) -> None:
+        if self._registers is not None:
+            self._registers = _fold(self._registers, self.precision, precision)
+            self.precision = precision
+            return
+        self.precision = precision
+        self._collapse()
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _fold(registers: bytearray, from_precision: int, to_precision: int) -> bytearray:
+    """Re-bucket registers to a lower precision; the dropped index bits become leading hash bits."""
+    shift = from_precision - to_precision
+    folded = bytearray(1 << to_precision)
+    for index, rank in enumerate(registers):
+        if rank == 0:
+            continue
+        dropped = index & ((1 << shift) - 1)
+        new_rank = shift - dropped.bit_length() + 1 if dropped else shift + rank
+        target = index >> shift
+        if new_rank > folded[target]:
+            folded[target] = new_rank
+    return folded
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+from typing import Any, Callable, get_args, get_origin
+
+from fastapi.responses import JSONResponse, Response
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib json fallback
+    orjson = None
+
+JSON_MEDIA_TYPE = "application/json"
+
+
+class FastJSONResponse(JSONResponse):
+    """Default response class: orjson when installed, stdlib json otherwise."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ModelResponseRoute(APIRoute):
+    """Route that skips FastAPI's response re-validation when the handler already returns the model.
+
+    The stock path dumps the returned model to a dict, validates that dict against
+    `response_model` again and then encodes it. When the result is exactly the declared
+    model (or a list of it) pydantic can write JSON bytes directly. Any other result, and
+    routes that filter fields or inject `Response`, keep the stock behaviour.
+    """
+
+    def get_route_handler(self) -> Callable[..., Any]:
+        matcher = _result_matcher(self)
+        call = self.dependant.call
+        if matcher is not None and call is not None and not getattr(call, "_serializes_models", False):
+            self.dependant.call = _wrap_endpoint(
+                call,
+                matcher=matcher,
+                adapter=TypeAdapter(self.response_model),
+                status_code=self.status_code,
+            )
+        return super().get_route_handler()
+
+
+def json_bytes_response(
+    payload: BaseModel,
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    return Response(
+        content=payload.model_dump_json(by_alias=True),
+        status_code=status_code,
+        media_type=JSON_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+def _result_matcher(route: APIRoute) -> Callable[[Any], bool] | None:
+    if route.response_field is None or route.dependant.response_param_name:
+        return None
+    if (
+        route.response_model_include is not None
+        or route.response_model_exclude is not None
+        or route.response_model_exclude_unset
+        or route.response_model_exclude_defaults
+        or route.response_model_exclude_none
+        or not route.response_model_by_alias
+    ):
+        return None
+
+    response_model = route.response_model
+    if isinstance(response_model, type) and issubclass(response_model, BaseModel):
+        # Exact type only: a subclass may carry fields the response model is meant to hide.
+        return lambda value: type(value) is response_model
+    if get_origin(response_model) is list:
+        (item_type,) = get_args(response_model) or (None,)
+        if isinstance(item_type, type) and issubclass(item_type, BaseModel):
+            return lambda value: type(value) is list and all(type(item) is item_type for item in value)
+    return None
+
+
+def _wrap_endpoint(
+    call: Callable[..., Any],
+    *,
+    matcher: Callable[[Any], bool],
+    adapter: TypeAdapter,
+    status_code: int | None,
+) -> Callable[..., Any]:
+    def to_response(result: Any) -> Any:
+        if not matcher(result):
+            return result
+        return Response(
+            content=adapter.dump_json(result, by_alias=True),
+            status_code=status_code or 200,
+            media_type=JSON_MEDIA_TYPE,
+        )
+
+    # FastAPI picks event loop vs thread pool from the callable, so keep the original kind.
+    if asyncio.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def async_endpoint(**values: Any) -> Any:
+            return to_response(await call(**values))
+
+        endpoint: Callable[..., Any] = async_endpoint
+    else:
+
+        @functools.wraps(call)
+        def sync_endpoint(**values: Any) -> Any:
+            return to_response(call(**values))
+
+        endpoint = sync_endpoint
+
+    endpoint._serializes_models = True  # type: ignore[attr-defined]
+    return endpoint
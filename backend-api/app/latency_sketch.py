@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Iterable
+
+_DEFAULT_RELATIVE_ACCURACY = 0.01
+_DEFAULT_EXACT_LIMIT = 64
+
+
+class LatencySketch:
+    """Mergeable quantile sketch for non-negative latencies.
+
+    Small sketches keep their raw values, so percentiles over a handful of samples are exact.
+    Past `exact_limit` samples values collapse into logarithmic buckets whose width bounds the
+    relative error of any quantile by `relative_accuracy`. Two sketches merge by adding bucket
+    counts, which is what lets hourly rollups combine into arbitrary windows.
+    """
+
+    __slots__ = ("relative_accuracy", "exact_limit", "_gamma_log", "_values", "_buckets", "_zero_count", "_count")
+
+    def __init__(
+        self,
+        relative_accuracy: float = _DEFAULT_RELATIVE_ACCURACY,
+        exact_limit: int = _DEFAULT_EXACT_LIMIT,
+    ) -> None:
+        self.relative_accuracy = min(max(relative_accuracy, 0.0001), 0.5)
+        self.exact_limit = max(0, exact_limit)
+        gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self._gamma_log = math.log(gamma)
+        self._values: list[int] | None = []
+        self._buckets: dict[int, int] = {}
+        self._zero_count = 0
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def is_exact(self) -> bool:
+        return self._values is not None
+
+    def add(self, value: int | float) -> None:
+        value = max(0, int(value))
+        self._count += 1
+        if self._values is not None:
+            self._values.append(value)
+            if len(self._values) > self.exact_limit:
+                self._collapse()
+            return
+        self._add_to_buckets(value, 1)
+
+    def extend(self, values: Iterable[int | float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: LatencySketch) -> None:
+        if other._count == 0:
+            return
+        if other._gamma_log != self._gamma_log:
+            raise ValueError("latency_sketch_accuracy_mismatch")
+        if self._values is not None and other._values is not None:
+            self._values.extend(other._values)
+            self._count += other._count
+            if len(self._values) > self.exact_limit:
+                self._collapse()
+            return
+
+        if self._values is not None:
+            self._collapse()
+        if other._values is not None:
+            for value in other._values:
+                self._add_to_buckets(value, 1)
+        else:
+            self._zero_count += other._zero_count
+            for index, bucket_count in other._buckets.items():
+                self._buckets[index] = self._buckets.get(index, 0) + bucket_count
+        self._count += other._count
+
+    def quantile(self, q: float) -> float | None:
+        """Nearest-rank quantile, matching the `round((n - 1) * q)` rank used for raw lists."""
+        if self._count == 0:
+            return None
+        rank = int(round((self._count - 1) * min(max(q, 0.0), 1.0)))
+        if self._values is not None:
+            return float(sorted(self._values)[rank])
+
+        seen = self._zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if rank < seen:
+                # Midpoint of the bucket in relative terms, so the error is symmetric.
+                return 2 * math.exp(index * self._gamma_log) / (1 + math.exp(self._gamma_log))
+        return 2 * math.exp(max(self._buckets) * self._gamma_log) / (1 + math.exp(self._gamma_log))
+
+    def to_json(self) -> dict[str, Any]:
+        payload: dict[str, Any] = {"a": self.relative_accuracy, "n": self._count}
+        if self._values is not None:
+            payload["v"] = sorted(self._values)
+        else:
+            payload["z"] = self._zero_count
+            payload["b"] = {str(index): bucket_count for index, bucket_count in sorted(self._buckets.items())}
+        return payload
+
+    @classmethod
+    def from_json(cls, payload: dict[str, Any] | None, exact_limit: int = _DEFAULT_EXACT_LIMIT) -> LatencySketch:
+        payload = payload or {}
+        sketch = cls(relative_accuracy=float(payload.get("a", _DEFAULT_RELATIVE_ACCURACY)), exact_limit=exact_limit)
+        if "b" in payload:
+            sketch._values = None
+            sketch._zero_count = int(payload.get("z", 0))
+            sketch._buckets = {int(index): int(bucket_count) for index, bucket_count in payload["b"].items()}
+            sketch._count = sketch._zero_count + sum(sketch._buckets.values())
+        else:
+            sketch._values = [int(value) for value in payload.get("v", [])]
+            sketch._count = len(sketch._values)
+        return sketch
+
+    def _collapse(self) -> None:
+        values, self._values = self._values or [], None
+        for value in values:
+            self._add_to_buckets(value, 1)
+
+    def _add_to_buckets(self, value: int, amount: int) -> None:
+        if value <= 0:
+            self._zero_count += amount
+            return
+        index = math.ceil(math.log(value) / self._gamma_log)
+        self._buckets[index] = self._buckets.get(index, 0) + amount
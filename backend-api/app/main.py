@@ -5,9 +5,19 @@ import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.analytics_buffer import start_analytics_buffer, stop_analytics_buffer
+from app.analytics_funnel_store import start_funnel_scheduler, stop_funnel_scheduler
+from app.analytics_partitions import ensure_analytics_partitions
+from app.analytics_rollup_store import start_rollup_scheduler, stop_rollup_scheduler
 from app.bootstrap import init_database
+from app.cache_bus import start_invalidation_listener, stop_invalidation_listener
+from app.json_responses import FastJSONResponse
+from app.provider_health_store import warm_provider_health
+from app.retention_store import start_retention_scheduler, stop_retention_scheduler
 from app.routes.auth import router as auth_router
+from app.routes.admin_export import router as admin_export_router
 from app.routes.admin_product import router as admin_product_router
+from app.routes.admin_retention import router as admin_retention_router
 from app.routes.admin_settings import router as admin_router
 from app.routes.analytics import router as analytics_router
 from app.routes.config import router as config_router
@@ -33,6 +43,7 @@ app = FastAPI(
         "Provider-flexible image generation/editing backend for iOS and Android apps "
         "with dashboard-driven provider/plan/variable controls."
     ),
+    default_response_class=FastJSONResponse,
 )
 
 
@@ -56,10 +67,28 @@ app.add_middleware(
 @app.on_event("startup")
 async def on_startup() -> None:
     init_database()
+    ensure_analytics_partitions()
+    warm_provider_health()
+    start_invalidation_listener()
+    start_retention_scheduler()
+    start_analytics_buffer()
+    start_rollup_scheduler()
+    start_funnel_scheduler()
+
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    await stop_analytics_buffer()
+    stop_invalidation_listener()
+    stop_retention_scheduler()
+    stop_rollup_scheduler()
+    stop_funnel_scheduler()
 
 
 app.include_router(admin_router)
+app.include_router(admin_export_router)
 app.include_router(admin_product_router)
+app.include_router(admin_retention_router)
 app.include_router(auth_router)
 app.include_router(render_router)
 app.include_router(session_router)
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable
+
+from sqlalchemy import Index, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.analytics_partitions import partition_analytics_events_table
+from app.db import Base, engine
+from app.models import SchemaMigrationModel
+from app.time_utils import utc_now
+
+_PG_MIGRATION_LOCK_ID = 7_231_026
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    upgrade: Callable[[Connection], None]
+
+
+def _find_index(table_name: str, index_name: str) -> Index:
+    table = Base.metadata.tables[table_name]
+    for index in table.indexes:
+        if index.name == index_name:
+            return index
+    raise LookupError(f"Unknown index {index_name} on {table_name}")
+
+
+def _create_indexes(*targets: tuple[str, str]) -> Callable[[Connection], None]:
+    def upgrade(connection: Connection) -> None:
+        for table_name, index_name in targets:
+            _find_index(table_name, index_name).create(bind=connection, checkfirst=True)
+
+    return upgrade
+
+
+def _add_columns(*targets: tuple[str, str]) -> Callable[[Connection], None]:
+    def upgrade(connection: Connection) -> None:
+        for table_name, column_name in targets:
+            existing = {item["name"] for item in inspect(connection).get_columns(table_name)}
+            if column_name in existing:
+                continue
+
+            column = Base.metadata.tables[table_name].c[column_name]
+            ddl = f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(connection.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT '{column.server_default.arg}'"
+            if not column.nullable:
+                ddl += " NOT NULL"
+            connection.execute(text(ddl))
+
+    return upgrade
+
+
+def _add_rollup_user_sketch(connection: Connection) -> None:
+    _add_columns(("analytics_hourly_rollups", "user_sketch"))(connection)
+    # Drop the refresh watermark so the next refresh re-rolls every retained hour with user sketches.
+    connection.execute(text("DELETE FROM analytics_rollup_state"))
+
+
+# `create_all` only creates missing tables, so anything added to an existing table
+# (indexes, columns) ships as a numbered migration. Versions are append-only.
+MIGRATIONS: list[Migration] = [
+    Migration(
+        version=1,
+        name="hot_query_composite_indexes",
+        upgrade=_create_indexes(
+            ("render_jobs", "ix_render_jobs_project_style_tier_status"),
+            ("render_jobs", "ix_render_jobs_project_id_updated_at"),
+            ("render_jobs", "ix_render_jobs_status_updated_at"),
+            ("analytics_events", "ix_analytics_events_occurred_at"),
+            ("analytics_events", "ix_analytics_events_created_at"),
+            ("analytics_events", "ix_analytics_events_user_id_occurred_at"),
+            ("credit_ledger_entries", "ix_credit_ledger_entries_created_at"),
+            ("credit_ledger_entries", "ix_credit_ledger_entries_user_id_created_at"),
+            ("user_projects", "ix_user_projects_user_id_updated_at"),
+            ("auth_sessions", "ix_auth_sessions_created_at"),
+            ("admin_audit_logs", "ix_admin_audit_logs_domain_created_at"),
+        ),
+    ),
+    Migration(
+        version=2,
+        name="lazy_credit_refill_columns",
+        upgrade=_add_columns(
+            ("credit_balances", "last_refill_date"),
+            ("credit_reset_schedule", "refill_mode"),
+        ),
+    ),
+    Migration(
+        version=3,
+        name="analytics_rollup_user_sketch",
+        upgrade=_add_rollup_user_sketch,
+    ),
+    Migration(
+        version=4,
+        name="analytics_events_range_partitions",
+        # Postgres only: SQLite keeps the plain table and optionally writes to shard tables instead.
+        upgrade=partition_analytics_events_table,
+    ),
+    Migration(
+        version=5,
+        name="render_jobs_created_at_index",
+        # Keyset cursor for `GET /v1/admin/export/render_jobs`.
+        upgrade=_create_indexes(("render_jobs", "ix_render_jobs_created_at")),
+    ),
+]
+
+
+def apply_migrations(bind: Engine | None = None) -> list[int]:
+    target = bind or engine
+    applied: list[int] = []
+
+    with target.begin() as connection:
+        if connection.dialect.name == "postgresql":
+            # Serialize concurrent worker startups; released at transaction end.
+            connection.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": _PG_MIGRATION_LOCK_ID})
+
+        done = set(connection.execute(select(SchemaMigrationModel.version)).scalars().all())
+        for migration in sorted(MIGRATIONS, key=lambda item: item.version):
+            if migration.version in done:
+                continue
+            migration.upgrade(connection)
+            connection.execute(
+                insert(SchemaMigrationModel).values(
+                    version=migration.version,
+                    name=migration.name,
+                    applied_at=utc_now(),
+                )
+            )
+            applied.append(migration.version)
+
+    return applied
+
+
+def get_migration_status(bind: Engine | None = None) -> dict[str, object]:
+    target = bind or engine
+    with target.connect() as connection:
+        done = set(connection.execute(select(SchemaMigrationModel.version)).scalars().all())
+
+    known_versions = sorted(item.version for item in MIGRATIONS)
+    return {
+        "current_version": max(done) if done else 0,
+        "latest_version": known_versions[-1] if known_versions else 0,
+        "pending_versions": [version for version in known_versions if version not in done],
+    }
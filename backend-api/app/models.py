@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime
 from app.time_utils import utc_now
 
-from sqlalchemy import JSON, Boolean, DateTime, Float, Integer, String, Text, UniqueConstraint
+from sqlalchemy import JSON, BigInteger, Boolean, Date, DateTime, Float, Index, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db import Base
@@ -38,6 +38,7 @@ class ProviderSettingsVersionModel(Base):
 
 class AdminAuditLogModel(Base):
     __tablename__ = "admin_audit_logs"
+    __table_args__ = (Index("ix_admin_audit_logs_domain_created_at", "domain", "created_at"),)
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True)
     domain: Mapped[str] = mapped_column(String(64), nullable=False)
@@ -118,6 +119,11 @@ class ExperimentAssignmentModel(Base):
 
 class AnalyticsEventModel(Base):
     __tablename__ = "analytics_events"
+    __table_args__ = (
+        Index("ix_analytics_events_occurred_at", "occurred_at"),
+        Index("ix_analytics_events_created_at", "created_at"),
+        Index("ix_analytics_events_user_id_occurred_at", "user_id", "occurred_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     event_name: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
@@ -132,8 +138,82 @@ class AnalyticsEventModel(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
 
 
+class AnalyticsHourlyRollupModel(Base):
+    __tablename__ = "analytics_hourly_rollups"
+    __table_args__ = (
+        # Empty strings stand in for NULL dimensions so the key stays unique.
+        UniqueConstraint(
+            "bucket_start",
+            "event_name",
+            "provider",
+            "operation",
+            "platform",
+            "status",
+            name="uq_analytics_hourly_rollups_key",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    event_name: Mapped[str] = mapped_column(String(128), nullable=False)
+    provider: Mapped[str] = mapped_column(String(64), nullable=False, default="")
+    operation: Mapped[str] = mapped_column(String(32), nullable=False, default="")
+    platform: Mapped[str] = mapped_column(String(32), nullable=False, default="")
+    status: Mapped[str] = mapped_column(String(32), nullable=False, default="")
+    event_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    cost_usd_sum: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    latency_ms_sum: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    latency_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    latency_sketch: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    # HyperLogLog of user ids; NULL on rows rolled up before distinct counts were tracked.
+    user_sketch: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
+
+
+class AnalyticsDailyFunnelModel(Base):
+    __tablename__ = "analytics_daily_funnel"
+    __table_args__ = (UniqueConstraint("day", "platform", "plan_id", name="uq_analytics_daily_funnel_key"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    platform: Mapped[str] = mapped_column(String(32), nullable=False)
+    plan_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    login_users: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    preview_users: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    final_users: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    checkout_starts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    paid_activations: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # One HyperLogLog per user stage so multi-day windows count each user once.
+    user_sketches: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
+
+
+class AnalyticsRollupStateModel(Base):
+    __tablename__ = "analytics_rollup_state"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Events created at or after this instant (minus a small overlap) are re-rolled on the next refresh.
+    watermark: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
+
+
+class AnalyticsShardStateModel(Base):
+    __tablename__ = "analytics_shard_state"
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    # Next id to hand out; SQLite shard tables share one id space with `analytics_events`.
+    next_event_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
+
+
 class RenderJobModel(Base):
     __tablename__ = "render_jobs"
+    __table_args__ = (
+        Index("ix_render_jobs_project_style_tier_status", "project_id", "style_id", "tier", "status"),
+        Index("ix_render_jobs_project_id_updated_at", "project_id", "updated_at"),
+        Index("ix_render_jobs_status_updated_at", "status", "updated_at"),
+        Index("ix_render_jobs_created_at", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String(64), primary_key=True)
     project_id: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
@@ -158,6 +238,7 @@ class CreditBalanceModel(Base):
 
     user_id: Mapped[str] = mapped_column(String(128), primary_key=True)
     balance: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_refill_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime,
         default=utc_now,
@@ -168,6 +249,10 @@ class CreditBalanceModel(Base):
 
 class CreditLedgerEntryModel(Base):
     __tablename__ = "credit_ledger_entries"
+    __table_args__ = (
+        Index("ix_credit_ledger_entries_created_at", "created_at"),
+        Index("ix_credit_ledger_entries_user_id_created_at", "user_id", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     user_id: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
@@ -178,6 +263,22 @@ class CreditLedgerEntryModel(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
 
 
+class CreditHoldModel(Base):
+    __tablename__ = "credit_holds"
+    __table_args__ = (Index("ix_credit_holds_status_expires_at", "status", "expires_at"),)
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
+    amount: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="held")
+    reason: Mapped[str] = mapped_column(String(128), nullable=False)
+    idempotency_key: Mapped[str | None] = mapped_column(String(128), nullable=True, unique=True, index=True)
+    metadata_json: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    resolved_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
+
+
 class SubscriptionEntitlementModel(Base):
     __tablename__ = "subscription_entitlements"
 
@@ -221,6 +322,7 @@ class CreditResetScheduleModel(Base):
     reset_minute_utc: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
     free_daily_credits: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
     pro_daily_credits: Mapped[int] = mapped_column(Integer, nullable=False, default=80)
+    refill_mode: Mapped[str] = mapped_column(String(16), nullable=False, default="batch", server_default="batch")
     last_run_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     next_run_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     updated_at: Mapped[datetime] = mapped_column(
@@ -233,6 +335,7 @@ class CreditResetScheduleModel(Base):
 
 class UserProjectModel(Base):
     __tablename__ = "user_projects"
+    __table_args__ = (Index("ix_user_projects_user_id_updated_at", "user_id", "updated_at"),)
 
     project_id: Mapped[str] = mapped_column(String(128), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
@@ -248,6 +351,7 @@ class UserProjectModel(Base):
 
 class AuthSessionModel(Base):
     __tablename__ = "auth_sessions"
+    __table_args__ = (Index("ix_auth_sessions_created_at", "created_at"),)
 
     token: Mapped[str] = mapped_column(String(128), primary_key=True)
     user_id: Mapped[str] = mapped_column(String(128), nullable=False, index=True)
@@ -255,3 +359,21 @@ class AuthSessionModel(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
     expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
     revoked_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, index=True)
+
+
+class SchemaMigrationModel(Base):
+    __tablename__ = "schema_migrations"
+
+    version: Mapped[int] = mapped_column(Integer, primary_key=True)
+    name: Mapped[str] = mapped_column(String(128), nullable=False)
+    applied_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False)
+
+
+class CacheInvalidationEventModel(Base):
+    __tablename__ = "cache_invalidation_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    topic: Mapped[str] = mapped_column(String(64), nullable=False)
+    key: Mapped[str | None] = mapped_column(String(256), nullable=True)
+    origin: Mapped[str] = mapped_column(String(128), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=utc_now, nullable=False, index=True)
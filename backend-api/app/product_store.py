@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+import threading
+import time
+from dataclasses import dataclass
+
 from app.time_utils import utc_now
 
 from sqlalchemy import desc, select
 
+from app.cache_bus import TOPIC_CATALOG, publish_invalidation, subscribe
 from app.db import session_scope
 from app.models import AdminAuditLogModel, PlanModel, StyleModel, VariableModel
+from app.runtime_env import read_float_env
 from app.schemas import (
     AdminActionRequest,
     AppVariable,
@@ -19,6 +25,26 @@ from app.schemas import (
 )
 
 _PRODUCT_DOMAIN = "product"
+# Backstop in case a cache bus event is lost; writes invalidate every worker through the bus.
+_CATALOG_CACHE_TTL_SECONDS = read_float_env("CATALOG_CACHE_TTL_SECONDS", 300.0)
+
+
+@dataclass(frozen=True)
+class _CatalogSnapshot:
+    generation: int
+    loaded_at: float
+    plans: tuple[PlanConfig, ...]
+    plans_by_id: dict[str, PlanConfig]
+    styles: tuple[StylePreset, ...]
+    active_styles: tuple[StylePreset, ...]
+    styles_by_id: dict[str, StylePreset]
+    variables: tuple[AppVariable, ...]
+    variable_map: dict[str, str | int | float | bool]
+
+
+_catalog_generation = 0
+_catalog_snapshot: _CatalogSnapshot | None = None
+_catalog_lock = threading.Lock()
 
 _DEFAULT_PLANS: dict[str, PlanConfig] = {
     "free": PlanConfig(
@@ -182,36 +208,21 @@ def bootstrap_product_data() -> None:
                     )
                 )
 
+    bump_catalog_generation()
 
+
+# Catalog readers return shared pre-validated objects; treat them as read-only.
 def list_plans() -> list[PlanConfig]:
-    with session_scope() as session:
-        rows = session.execute(select(PlanModel)).scalars().all()
-        return [PlanConfig.model_validate(row.payload_json) for row in rows]
+    return list(_get_catalog().plans)
 
 
 def get_plan(plan_id: str) -> PlanConfig | None:
-    with session_scope() as session:
-        model = session.get(PlanModel, plan_id)
-        if not model:
-            return None
-        return PlanConfig.model_validate(model.payload_json)
+    return _get_catalog().plans_by_id.get(plan_id)
 
 
 def list_styles(active_only: bool = False) -> list[StylePreset]:
-    with session_scope() as session:
-        stmt = select(StyleModel)
-        if active_only:
-            stmt = stmt.where(StyleModel.is_active.is_(True))
-        rows = session.execute(stmt).scalars().all()
-        styles = [StylePreset.model_validate(row.payload_json) for row in rows]
-        return sorted(
-            styles,
-            key=lambda item: (
-                int(item.sort_order or 0),
-                item.display_name.lower(),
-                item.style_id.lower(),
-            ),
-        )
+    catalog = _get_catalog()
+    return list(catalog.active_styles if active_only else catalog.styles)
 
 
 def list_active_styles() -> list[StylePreset]:
@@ -219,11 +230,24 @@ def list_active_styles() -> list[StylePreset]:
 
 
 def get_style(style_id: str) -> StylePreset | None:
-    with session_scope() as session:
-        model = session.get(StyleModel, style_id)
-        if not model:
-            return None
-        return StylePreset.model_validate(model.payload_json)
+    return _get_catalog().styles_by_id.get(style_id)
+
+
+def get_catalog_generation() -> int:
+    return _catalog_generation
+
+
+def get_catalog_fingerprint() -> tuple[int, float]:
+    """Identify the catalog snapshot currently served, including TTL reloads."""
+    snapshot = _get_catalog()
+    return snapshot.generation, snapshot.loaded_at
+
+
+def bump_catalog_generation() -> int:
+    global _catalog_generation
+    with _catalog_lock:
+        _catalog_generation += 1
+        return _catalog_generation
 
 
 def upsert_style(style_id: str, payload: StyleUpsertRequest, action: AdminActionRequest) -> StylePreset:
@@ -253,6 +277,7 @@ def upsert_style(style_id: str, payload: StyleUpsertRequest, action: AdminAction
             metadata={"style_id": style_id},
         )
 
+    publish_invalidation(TOPIC_CATALOG)
     return style
 
 
@@ -271,6 +296,7 @@ def delete_style(style_id: str, action: AdminActionRequest) -> bool:
             metadata={"style_id": style_id},
         )
 
+    publish_invalidation(TOPIC_CATALOG)
     return True
 
 
@@ -319,6 +345,7 @@ def seed_default_styles(action: AdminActionRequest, overwrite: bool = False) ->
             },
         )
 
+    publish_invalidation(TOPIC_CATALOG)
     return StyleSeedResponse(
         inserted_count=inserted_count,
         updated_count=updated_count,
@@ -355,6 +382,7 @@ def upsert_plan(plan_id: str, payload: PlanUpsertRequest, action: AdminActionReq
             metadata={"plan_id": plan_id},
         )
 
+    publish_invalidation(TOPIC_CATALOG)
     return plan
 
 
@@ -373,26 +401,16 @@ def delete_plan(plan_id: str, action: AdminActionRequest) -> bool:
             metadata={"plan_id": plan_id},
         )
 
+    publish_invalidation(TOPIC_CATALOG)
     return True
 
 
 def list_variables() -> list[AppVariable]:
-    with session_scope() as session:
-        rows = session.execute(select(VariableModel)).scalars().all()
-        return [
-            AppVariable(
-                key=row.key,
-                value=row.value_json,
-                description=row.description,
-            )
-            for row in rows
-        ]
+    return list(_get_catalog().variables)
 
 
 def get_variable_map() -> dict[str, str | int | float | bool]:
-    with session_scope() as session:
-        rows = session.execute(select(VariableModel)).scalars().all()
-        return {row.key: row.value_json for row in rows}
+    return dict(_get_catalog().variable_map)
 
 
 def upsert_variable(key: str, payload: VariableUpsertRequest, action: AdminActionRequest) -> AppVariable:
@@ -420,6 +438,7 @@ def upsert_variable(key: str, payload: VariableUpsertRequest, action: AdminActio
             metadata={"key": key},
         )
 
+    publish_invalidation(TOPIC_CATALOG)
     return AppVariable(key=key, value=payload.value, description=payload.description)
 
 
@@ -438,6 +457,7 @@ def delete_variable(key: str, action: AdminActionRequest) -> bool:
             metadata={"key": key},
         )
 
+    publish_invalidation(TOPIC_CATALOG)
     return True
 
 
@@ -463,6 +483,66 @@ def list_product_audit(limit: int = 100) -> list[AuditLogEntry]:
         ]
 
 
+def _on_catalog_invalidated(_key: str | None) -> None:
+    bump_catalog_generation()
+
+
+subscribe(TOPIC_CATALOG, _on_catalog_invalidated)
+
+
+def _get_catalog() -> _CatalogSnapshot:
+    global _catalog_snapshot
+    snapshot = _catalog_snapshot
+    generation = _catalog_generation
+    if (
+        snapshot
+        and snapshot.generation == generation
+        and time.monotonic() - snapshot.loaded_at < _CATALOG_CACHE_TTL_SECONDS
+    ):
+        return snapshot
+
+    snapshot = _load_catalog(generation)
+    with _catalog_lock:
+        # A write that bumped the generation mid-load leaves this snapshot stale;
+        # keep it for this call only and let the next read reload.
+        if generation == _catalog_generation:
+            _catalog_snapshot = snapshot
+    return snapshot
+
+
+def _load_catalog(generation: int) -> _CatalogSnapshot:
+    with session_scope() as session:
+        plan_rows = session.execute(select(PlanModel)).scalars().all()
+        style_rows = session.execute(select(StyleModel)).scalars().all()
+        variable_rows = session.execute(select(VariableModel)).scalars().all()
+
+        plans = tuple(PlanConfig.model_validate(row.payload_json) for row in plan_rows)
+        styles_with_flags = [(StylePreset.model_validate(row.payload_json), row.is_active) for row in style_rows]
+        variables = tuple(
+            AppVariable(key=row.key, value=row.value_json, description=row.description) for row in variable_rows
+        )
+
+    styles_with_flags.sort(
+        key=lambda item: (
+            int(item[0].sort_order or 0),
+            item[0].display_name.lower(),
+            item[0].style_id.lower(),
+        )
+    )
+    styles = tuple(style for style, _ in styles_with_flags)
+    return _CatalogSnapshot(
+        generation=generation,
+        loaded_at=time.monotonic(),
+        plans=plans,
+        plans_by_id={plan.plan_id: plan for plan in plans},
+        styles=styles,
+        active_styles=tuple(style for style, is_active in styles_with_flags if is_active),
+        styles_by_id={style.style_id: style for style in styles},
+        variables=variables,
+        variable_map={item.key: item.value for item in variables},
+    )
+
+
 def _append_audit(
     session,
     action: str,
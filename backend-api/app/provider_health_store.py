@@ -1,53 +1,185 @@
 from __future__ import annotations
 
-from collections import defaultdict
+import threading
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from app.time_utils import utc_now
+from typing import Iterable
 
 from sqlalchemy import select
 
+from app.analytics_partitions import analytics_events_source
 from app.db import session_scope
-from app.models import AnalyticsEventModel
+from app.runtime_env import read_float_env
+from app.schemas import AnalyticsEventRequest
+from app.time_utils import utc_now
 
+# Longest window the admin route accepts; the rings keep exactly this much history.
+_MAX_WINDOW_HOURS = 168
+_WARM_START_BATCH_SIZE = 5000
+_EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass
+class _Counts:
+    total: int = 0
+    success: int = 0
+    failed: int = 0
+    latency_sum: int = 0
+    latency_count: int = 0
+
+    def record(self, status: str | None, latency_ms: int | None) -> None:
+        self.total += 1
+        if status == "completed":
+            self.success += 1
+        elif status == "failed":
+            self.failed += 1
+        if latency_ms is not None:
+            self.latency_sum += int(latency_ms)
+            self.latency_count += 1
+
+    def merge(self, other: _Counts) -> None:
+        self.total += other.total
+        self.success += other.success
+        self.failed += other.failed
+        self.latency_sum += other.latency_sum
+        self.latency_count += other.latency_count
+
+
+class _ProviderRing:
+    """Per-minute and per-hour ring buffers for one provider.
+
+    A window read sums whole hours from the hour ring and only the minutes of its first,
+    partial hour from the minute ring, so it touches at most `hours + 60` slots regardless
+    of traffic.
+    """
+
+    def __init__(self, max_hours: int) -> None:
+        self._minute_slots = (max_hours + 1) * 60
+        self._hour_slots = max_hours + 2
+        self._minutes: list[tuple[int, _Counts] | None] = [None] * self._minute_slots
+        self._hours: list[tuple[int, _Counts] | None] = [None] * self._hour_slots
+        self._latest_minute = 0
+
+    def record(self, minute: int, status: str | None, latency_ms: int | None) -> None:
+        self._latest_minute = max(self._latest_minute, minute)
+        if minute <= self._latest_minute - self._minute_slots:
+            # Older than the ring spans; recording it would overwrite a live slot.
+            return
+        self._slot(self._minutes, minute).record(status, latency_ms)
+        self._slot(self._hours, minute // 60).record(status, latency_ms)
+
+    def window(self, start_minute: int, end_minute: int) -> _Counts:
+        counts = _Counts()
+        first_full_hour = -(-start_minute // 60)
+        for minute in range(start_minute, min(first_full_hour * 60, end_minute + 1)):
+            counts.merge(self._read(self._minutes, minute))
+        for hour in range(first_full_hour, end_minute // 60 + 1):
+            counts.merge(self._read(self._hours, hour))
+        return counts
+
+    @staticmethod
+    def _slot(ring: list[tuple[int, _Counts] | None], stamp: int) -> _Counts:
+        index = stamp % len(ring)
+        entry = ring[index]
+        if entry is None or entry[0] != stamp:
+            entry = ring[index] = (stamp, _Counts())
+        return entry[1]
+
+    @staticmethod
+    def _read(ring: list[tuple[int, _Counts] | None], stamp: int) -> _Counts:
+        entry = ring[stamp % len(ring)]
+        return entry[1] if entry is not None and entry[0] == stamp else _Counts()
 
-def get_provider_health(hours: int = 24) -> dict[str, dict[str, float | int]]:
-    window_start = utc_now() - timedelta(hours=hours)
-    with session_scope() as session:
-        stmt = select(AnalyticsEventModel).where(AnalyticsEventModel.created_at >= window_start)
-        rows = session.execute(stmt).scalars().all()
 
-    provider_total: dict[str, int] = defaultdict(int)
-    provider_success: dict[str, int] = defaultdict(int)
-    provider_failed: dict[str, int] = defaultdict(int)
-    provider_latency_sum: dict[str, int] = defaultdict(int)
-    provider_latency_count: dict[str, int] = defaultdict(int)
+class ProviderHealthWindow:
+    """In-memory rolling render stats per provider, fed as analytics events are written.
 
-    for row in rows:
-        if not row.provider:
-            continue
-        if not row.event_name.startswith("render_"):
-            continue
+    The first read (or an explicit `reload`) warm-starts the rings from `analytics_events`.
+    Until then `record` is a no-op because the warm start will see those rows anyway; while a
+    reload runs, new records are parked and replayed onto the rebuilt rings.
+    """
 
-        provider = row.provider
-        provider_total[provider] += 1
+    def __init__(self, max_hours: int = _MAX_WINDOW_HOURS) -> None:
+        self.max_hours = max(1, max_hours)
+        self._lock = threading.Lock()
+        self._rings: dict[str, _ProviderRing] | None = None
+        self._pending: list[tuple[str, int, str | None, int | None]] | None = None
+        self._loaded_at: datetime | None = None
 
-        if row.status == "completed":
-            provider_success[provider] += 1
-        elif row.status == "failed":
-            provider_failed[provider] += 1
+    def record(self, provider: str, status: str | None, latency_ms: int | None, at: datetime | None = None) -> None:
+        item = (provider, _minute_of(at or utc_now()), status, latency_ms)
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(item)
+            elif self._rings is not None:
+                self._apply(self._rings, item)
 
-        if row.latency_ms is not None:
-            provider_latency_sum[provider] += row.latency_ms
-            provider_latency_count[provider] += 1
+    def reload(self) -> None:
+        # Take the scan's upper bound before parking records, so parked records belong to events
+        # written after the cutoff instead of ones the scan also counts.
+        cutoff = utc_now()
+        with self._lock:
+            if self._pending is not None:
+                return
+            self._pending = []
+        try:
+            rings: dict[str, _ProviderRing] = {}
+            for item in _load_render_events(cutoff - timedelta(hours=self.max_hours), cutoff):
+                self._apply(rings, item)
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            for item in self._pending or []:
+                self._apply(rings, item)
+            self._rings = rings
+            self._pending = None
+            self._loaded_at = cutoff
+
+    def snapshot(self, hours: int, resync_seconds: float = 0.0) -> dict[str, _Counts]:
+        loaded_at = self._loaded_at
+        if loaded_at is None or (resync_seconds > 0 and utc_now() - loaded_at >= timedelta(seconds=resync_seconds)):
+            self.reload()
+        end_minute = _minute_of(utc_now())
+        start_minute = end_minute - min(max(1, hours), self.max_hours) * 60 + 1
+        with self._lock:
+            rings = self._rings or {}
+            windows = {provider: ring.window(start_minute, end_minute) for provider, ring in rings.items()}
+        return {provider: counts for provider, counts in windows.items() if counts.total}
+
+    def _apply(self, rings: dict[str, _ProviderRing], item: tuple[str, int, str | None, int | None]) -> None:
+        provider, minute, status, latency_ms = item
+        ring = rings.get(provider)
+        if ring is None:
+            ring = rings[provider] = _ProviderRing(self.max_hours)
+        ring.record(minute, status, latency_ms)
+
+
+_window = ProviderHealthWindow()
+
+
+def record_provider_events(events: Iterable[AnalyticsEventRequest]) -> None:
+    for event in events:
+        if event.provider and event.event_name.startswith("render_"):
+            _window.record(event.provider, event.status.value if event.status else None, event.latency_ms)
+
+
+def warm_provider_health() -> None:
+    """Rebuild the rolling windows from `analytics_events` (startup, or after bulk deletes)."""
+    _window.reload()
+
+
+def get_provider_health(hours: int = 24) -> dict[str, dict[str, float | int]]:
+    # Between reloads each worker only adds its own writes, so re-read the shared table every
+    # PROVIDER_HEALTH_RESYNC_SECONDS to keep failover decisions on the global view.
+    counts_by_provider = _window.snapshot(hours, read_float_env("PROVIDER_HEALTH_RESYNC_SECONDS", 60.0))
 
     summary: dict[str, dict[str, float | int]] = {}
-    for provider, total in provider_total.items():
-        success_rate = (provider_success[provider] / total) * 100.0 if total else 0.0
-        avg_latency = (
-            provider_latency_sum[provider] / provider_latency_count[provider]
-            if provider_latency_count[provider]
-            else 0.0
-        )
+    for provider, counts in counts_by_provider.items():
+        total = counts.total
+        success_rate = (counts.success / total) * 100.0 if total else 0.0
+        avg_latency = counts.latency_sum / counts.latency_count if counts.latency_count else 0.0
 
         # Simple health formula: success is dominant, latency is secondary.
         latency_factor = 100.0 if avg_latency <= 2500 else max(0.0, 100.0 - ((avg_latency - 2500) / 75.0))
@@ -56,9 +188,30 @@ def get_provider_health(hours: int = 24) -> dict[str, dict[str, float | int]]:
         summary[provider] = {
             "total_events": total,
             "success_rate": round(success_rate, 2),
-            "failed_events": provider_failed[provider],
+            "failed_events": counts.failed,
             "avg_latency_ms": round(avg_latency, 2),
             "health_score": health_score,
         }
 
     return summary
+
+
+def _minute_of(value: datetime) -> int:
+    # Timestamps are naive UTC; avoid `datetime.timestamp()`, which would apply the local offset.
+    return int((value - _EPOCH).total_seconds() // 60)
+
+
+def _load_render_events(since: datetime, until: datetime) -> Iterable[tuple[str, int, str | None, int | None]]:
+    events = analytics_events_source()
+    stmt = select(events.provider, events.created_at, events.status, events.latency_ms).where(
+        events.created_at >= since,
+        events.created_at < until,
+        events.provider.is_not(None),
+        events.provider != "",
+        events.event_name.startswith("render_", autoescape=True),
+    )
+    with session_scope() as session:
+        for provider, created_at, status, latency_ms in session.execute(
+            stmt.execution_options(yield_per=_WARM_START_BATCH_SIZE)
+        ):
+            yield provider, _minute_of(created_at), status, latency_ms
@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.analytics_partitions import drop_expired_analytics_partitions
+from app.db import session_scope
+from app.models import (
+    AdminAuditLogModel,
+    AnalyticsDailyFunnelModel,
+    AnalyticsEventModel,
+    AnalyticsHourlyRollupModel,
+    AuthSessionModel,
+    CreditHoldModel,
+    SubscriptionWebhookEventModel,
+)
+from app.runtime_env import read_bool_env, read_float_env
+from app.schemas import RetentionRunResponse, RetentionTableResult
+from app.time_utils import utc_now
+
+_DEFAULT_CHUNK_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    table: str
+    model: type
+    days_env: str
+    default_days: float
+    # Builds the "row is past retention" predicate for a cutoff timestamp.
+    predicate: Callable[[datetime], ColumnElement[bool]]
+    # Drops whole expired partitions before the chunked delete; returns (partitions, rows).
+    drop_partitions: Callable[[datetime, bool], tuple[int, int]] | None = None
+
+    def retention_days(self) -> float:
+        return read_float_env(self.days_env, self.default_days)
+
+
+# cache_invalidation_events is deliberately absent: the cache bus prunes it on publish and always keeps the
+# newest row, whereas emptying it here would let SQLite reuse ids the pollers have already passed.
+RETENTION_POLICIES: tuple[RetentionPolicy, ...] = (
+    RetentionPolicy(
+        table="auth_sessions",
+        model=AuthSessionModel,
+        days_env="RETENTION_AUTH_SESSIONS_DAYS",
+        default_days=7,
+        # Revoked sessions stay until expiry: signed-token revocations are read from these rows.
+        predicate=lambda cutoff: AuthSessionModel.expires_at < cutoff,
+    ),
+    RetentionPolicy(
+        table="analytics_events",
+        model=AnalyticsEventModel,
+        days_env="RETENTION_ANALYTICS_EVENTS_DAYS",
+        default_days=90,
+        predicate=lambda cutoff: AnalyticsEventModel.occurred_at < cutoff,
+        drop_partitions=drop_expired_analytics_partitions,
+    ),
+    RetentionPolicy(
+        table="analytics_hourly_rollups",
+        model=AnalyticsHourlyRollupModel,
+        days_env="RETENTION_ANALYTICS_ROLLUPS_DAYS",
+        default_days=400,
+        predicate=lambda cutoff: AnalyticsHourlyRollupModel.bucket_start < cutoff,
+    ),
+    RetentionPolicy(
+        table="analytics_daily_funnel",
+        model=AnalyticsDailyFunnelModel,
+        days_env="RETENTION_ANALYTICS_FUNNEL_DAYS",
+        default_days=400,
+        predicate=lambda cutoff: AnalyticsDailyFunnelModel.day < cutoff.date(),
+    ),
+    RetentionPolicy(
+        table="subscription_webhook_events",
+        model=SubscriptionWebhookEventModel,
+        days_env="RETENTION_WEBHOOK_EVENTS_DAYS",
+        default_days=180,
+        predicate=lambda cutoff: SubscriptionWebhookEventModel.created_at < cutoff,
+    ),
+    RetentionPolicy(
+        table="admin_audit_logs",
+        model=AdminAuditLogModel,
+        days_env="RETENTION_ADMIN_AUDIT_LOGS_DAYS",
+        default_days=365,
+        predicate=lambda cutoff: AdminAuditLogModel.created_at < cutoff,
+    ),
+    RetentionPolicy(
+        table="credit_holds",
+        model=CreditHoldModel,
+        days_env="RETENTION_CREDIT_HOLDS_DAYS",
+        default_days=30,
+        predicate=lambda cutoff: and_(CreditHoldModel.status != "held", CreditHoldModel.resolved_at < cutoff),
+    ),
+)
+
+_last_run: RetentionRunResponse | None = None
+_scheduler_thread: threading.Thread | None = None
+_scheduler_stop = threading.Event()
+_logger = logging.getLogger(__name__)
+
+
+def run_retention(
+    dry_run: bool = False,
+    tables: list[str] | None = None,
+    chunk_size: int = _DEFAULT_CHUNK_SIZE,
+    pause_seconds: float = 0.0,
+    now: datetime | None = None,
+) -> RetentionRunResponse:
+    global _last_run
+    started_at = now or utc_now()
+    results: list[RetentionTableResult] = []
+
+    for policy in RETENTION_POLICIES:
+        if tables and policy.table not in tables:
+            continue
+        days = policy.retention_days()
+        if days <= 0:
+            continue
+        results.append(
+            _apply_policy(
+                policy,
+                cutoff=started_at - timedelta(days=days),
+                dry_run=dry_run,
+                chunk_size=max(1, chunk_size),
+                pause_seconds=pause_seconds,
+            )
+        )
+
+    result = RetentionRunResponse(
+        started_at=started_at,
+        completed_at=utc_now(),
+        dry_run=dry_run,
+        total_rows_purged=sum(item.rows_purged for item in results),
+        tables=results,
+    )
+    if not dry_run:
+        _last_run = result
+    return result
+
+
+def get_last_retention_run() -> RetentionRunResponse | None:
+    return _last_run
+
+
+def retention_cutoff(table: str, now: datetime | None = None) -> datetime | None:
+    """Timestamp before which `table` may already have been purged, or None if it keeps everything."""
+    for policy in RETENTION_POLICIES:
+        if policy.table == table:
+            days = policy.retention_days()
+            return (now or utc_now()) - timedelta(days=days) if days > 0 else None
+    return None
+
+
+def start_retention_scheduler() -> bool:
+    global _scheduler_thread
+    if not read_bool_env("RETENTION_SCHEDULER_ENABLED", False):
+        return False
+    if _scheduler_thread and _scheduler_thread.is_alive():
+        return True
+
+    _scheduler_stop.clear()
+    _scheduler_thread = threading.Thread(target=_scheduler_loop, name="retention-scheduler", daemon=True)
+    _scheduler_thread.start()
+    return True
+
+
+def stop_retention_scheduler(timeout: float = 5.0) -> None:
+    global _scheduler_thread
+    _scheduler_stop.set()
+    if _scheduler_thread:
+        _scheduler_thread.join(timeout=timeout)
+    _scheduler_thread = None
+
+
+def _apply_policy(
+    policy: RetentionPolicy,
+    *,
+    cutoff: datetime,
+    dry_run: bool,
+    chunk_size: int,
+    pause_seconds: float,
+) -> RetentionTableResult:
+    started = time.perf_counter()
+    predicate = policy.predicate(cutoff)
+    rows_purged = 0
+    chunks = 0
+    partitions_dropped = 0
+    if policy.drop_partitions is not None:
+        partitions_dropped, rows_purged = policy.drop_partitions(cutoff, dry_run)
+
+    if dry_run:
+        with session_scope() as session:
+            rows_purged += int(
+                session.execute(select(func.count()).select_from(policy.model).where(predicate)).scalar_one()
+            )
+    else:
+        primary_key = policy.model.__mapper__.primary_key[0]
+        while True:
+            # One short transaction per chunk so no delete holds locks for long.
+            with session_scope() as session:
+                ids = session.execute(select(primary_key).where(predicate).limit(chunk_size)).scalars().all()
+                if ids:
+                    session.execute(
+                        delete(policy.model).where(primary_key.in_(ids)).execution_options(synchronize_session=False)
+                    )
+            if not ids:
+                break
+            rows_purged += len(ids)
+            chunks += 1
+            if len(ids) < chunk_size:
+                break
+            if pause_seconds > 0:
+                time.sleep(pause_seconds)
+
+    return RetentionTableResult(
+        table=policy.table,
+        cutoff=cutoff,
+        rows_purged=rows_purged,
+        chunks=chunks,
+        partitions_dropped=partitions_dropped,
+        duration_ms=int((time.perf_counter() - started) * 1000),
+    )
+
+
+def _scheduler_loop() -> None:
+    interval_seconds = max(60.0, read_float_env("RETENTION_INTERVAL_SECONDS", 3600.0))
+    while not _scheduler_stop.wait(interval_seconds):
+        try:
+            result = run_retention(pause_seconds=read_float_env("RETENTION_CHUNK_PAUSE_SECONDS", 0.05))
+            _logger.info("retention purged %s rows", result.total_rows_purged)
+        except Exception:  # noqa: BLE001
+            _logger.warning("retention run failed", exc_info=True)
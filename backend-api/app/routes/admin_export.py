@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from app.auth import require_admin_access
+from app.export_store import EXPORT_MEDIA_TYPES, FORMAT_NDJSON, stream_export
+from app.time_utils import utc_now
+
+router = APIRouter(
+    prefix="/v1/admin/export",
+    tags=["admin", "export"],
+    dependencies=[Depends(require_admin_access)],
+)
+
+_EXPORT_ERROR_STATUS = {"unknown_export_table": 404}
+
+
+@router.get("/{table}")
+async def export_table(
+    table: str,
+    since: datetime = Query(...),
+    until: datetime | None = Query(default=None),
+    export_format: str = Query(default=FORMAT_NDJSON, alias="format"),
+    gzip: bool = Query(default=False),
+    batch_size: int = Query(default=1000, ge=1, le=10000),
+) -> StreamingResponse:
+    try:
+        chunks = stream_export(
+            table,
+            since=since,
+            until=until or utc_now(),
+            export_format=export_format,
+            compress=gzip,
+            batch_size=batch_size,
+        )
+    except ValueError as exc:
+        code = str(exc)
+        raise HTTPException(status_code=_EXPORT_ERROR_STATUS.get(code, 400), detail=code) from exc
+
+    # A gzip export is a .gz file, not a transfer encoding: with Content-Encoding clients would
+    # transparently decompress it and save plain text under the .gz name.
+    filename = f"{table}.{export_format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else EXPORT_MEDIA_TYPES[export_format]
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
@@ -3,6 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.auth import require_admin_access
+from app.json_responses import ModelResponseRoute
 from app.product_store import (
     delete_style,
     delete_plan,
@@ -28,7 +29,12 @@ from app.schemas import (
     VariableUpsertRequest,
 )
 
-router = APIRouter(prefix="/v1/admin", tags=["admin"], dependencies=[Depends(require_admin_access)])
+router = APIRouter(
+    prefix="/v1/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin_access)],
+    route_class=ModelResponseRoute,
+)
 
 
 @router.get("/plans", response_model=list[PlanConfig])
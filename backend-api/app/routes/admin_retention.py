@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from app.auth import require_admin_access
+from app.json_responses import ModelResponseRoute
+from app.retention_store import get_last_retention_run, run_retention
+from app.schemas import RetentionRunResponse
+
+router = APIRouter(
+    prefix="/v1/admin/retention",
+    tags=["admin", "retention"],
+    dependencies=[Depends(require_admin_access)],
+    route_class=ModelResponseRoute,
+)
+
+
+@router.post("/run", response_model=RetentionRunResponse)
+async def run_retention_sweep(
+    dry_run: bool = Query(default=True),
+    table: list[str] | None = Query(default=None),
+) -> RetentionRunResponse:
+    return run_retention(dry_run=dry_run, tables=table)
+
+
+@router.get("/last-run", response_model=RetentionRunResponse)
+async def last_retention_run() -> RetentionRunResponse:
+    result = get_last_retention_run()
+    if not result:
+        raise HTTPException(status_code=404, detail="retention_not_run")
+    return result
@@ -3,6 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException, Query
 
 from app.auth import require_admin_access
+from app.json_responses import ModelResponseRoute
 from app.providers.registry import get_provider_registry
 from app.schemas import (
     AdminActionRequest,
@@ -22,7 +23,12 @@ from app.settings_store import (
     update_provider_settings_draft,
 )
 
-router = APIRouter(prefix="/v1/admin", tags=["admin"], dependencies=[Depends(require_admin_access)])
+router = APIRouter(
+    prefix="/v1/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin_access)],
+    route_class=ModelResponseRoute,
+)
 
 
 @router.get("/provider-settings", response_model=ProviderSettings)
@@ -1,25 +1,74 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
 
 from app.auth import require_admin_access
-from app.analytics_store import get_analytics_dashboard, get_analytics_overview, ingest_event
+from app.analytics_buffer import enqueue_event, get_analytics_buffer_stats
+from app.analytics_funnel_store import refresh_daily_funnel
+from app.analytics_rollup_store import refresh_hourly_rollups
+from app.analytics_store import get_analytics_dashboard, get_analytics_overview, ingest_event_batch
+from app.json_responses import ModelResponseRoute
+from app.runtime_env import read_float_env
 from app.schemas import (
+    AnalyticsBatchIngestResponse,
     AnalyticsDashboardResponse,
     AnalyticsEventRequest,
+    AnalyticsFunnelRefreshResponse,
+    AnalyticsIngestStatsResponse,
     AnalyticsOverviewResponse,
+    AnalyticsRollupRefreshResponse,
     EventIngestResponse,
 )
 
-router = APIRouter(prefix="/v1", tags=["analytics"])
+router = APIRouter(prefix="/v1", tags=["analytics"], route_class=ModelResponseRoute)
+
+_BATCH_ERROR_STATUS = {
+    "batch_too_large": 413,
+    "batch_body_too_large": 413,
+    "invalid_batch_body": 400,
+}
 
 
 @router.post("/analytics/events", response_model=EventIngestResponse)
 async def post_event(payload: AnalyticsEventRequest) -> EventIngestResponse:
-    ingest_event(payload)
+    enqueue_event(payload)
     return EventIngestResponse(accepted=True)
 
 
+async def _read_body_limited(request: Request, max_bytes: int) -> bytes:
+    # Reject on the declared length first, then stop reading as soon as the stream passes the limit.
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > max_bytes:
+        raise ValueError("batch_body_too_large")
+    body = bytearray()
+    async for chunk in request.stream():
+        body.extend(chunk)
+        if len(body) > max_bytes:
+            raise ValueError("batch_body_too_large")
+    return bytes(body)
+
+
+@router.post("/analytics/events:batch", response_model=AnalyticsBatchIngestResponse)
+async def post_event_batch(
+    request: Request,
+    content_type: str | None = Header(default=None),
+    content_encoding: str | None = Header(default=None),
+) -> AnalyticsBatchIngestResponse:
+    # The body is parsed by hand: it may be a JSON array, NDJSON, or either one gzip-compressed.
+    max_bytes = int(read_float_env("ANALYTICS_BATCH_MAX_BYTES", 4 * 1024 * 1024))
+    try:
+        return ingest_event_batch(
+            await _read_body_limited(request, max_bytes),
+            content_type=content_type,
+            content_encoding=content_encoding,
+            max_events=int(read_float_env("ANALYTICS_BATCH_MAX_EVENTS", 500)),
+            max_bytes=max_bytes,
+        )
+    except ValueError as exc:
+        code = str(exc)
+        raise HTTPException(status_code=_BATCH_ERROR_STATUS.get(code, 400), detail=code) from exc
+
+
 @router.get("/admin/analytics/overview", response_model=AnalyticsOverviewResponse)
 async def analytics_overview(_: str = Depends(require_admin_access)) -> AnalyticsOverviewResponse:
     return get_analytics_overview()
@@ -31,3 +80,18 @@ async def analytics_dashboard(
     _: str = Depends(require_admin_access),
 ) -> AnalyticsDashboardResponse:
     return get_analytics_dashboard(hours=hours)
+
+
+@router.get("/admin/analytics/ingest-stats", response_model=AnalyticsIngestStatsResponse)
+async def analytics_ingest_stats(_: str = Depends(require_admin_access)) -> AnalyticsIngestStatsResponse:
+    return get_analytics_buffer_stats()
+
+
+@router.post("/admin/analytics/rollups/refresh", response_model=AnalyticsRollupRefreshResponse)
+async def refresh_analytics_rollups(_: str = Depends(require_admin_access)) -> AnalyticsRollupRefreshResponse:
+    return refresh_hourly_rollups()
+
+
+@router.post("/admin/analytics/funnel/refresh", response_model=AnalyticsFunnelRefreshResponse)
+async def refresh_analytics_funnel(_: str = Depends(require_admin_access)) -> AnalyticsFunnelRefreshResponse:
+    return refresh_daily_funnel()
@@ -4,9 +4,10 @@ from fastapi import APIRouter, Header, HTTPException, status
 
 from app.auth_utils import parse_bearer_token
 from app.auth_store import create_dev_session, get_me, revoke_session
+from app.json_responses import ModelResponseRoute
 from app.schemas import AuthMeResponse, AuthSessionResponse, DevLoginRequest, LogoutResponse
 
-router = APIRouter(prefix="/v1/auth", tags=["auth"])
+router = APIRouter(prefix="/v1/auth", tags=["auth"], route_class=ModelResponseRoute)
 
 
 @router.post("/login-dev", response_model=AuthSessionResponse)
@@ -1,37 +1,26 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 
+from app.config_store import etag_matches, get_bootstrap_config
+from app.json_responses import ModelResponseRoute
 from app.providers.registry import get_provider_registry
-from app.product_store import get_variable_map, list_active_styles, list_plans
 from app.router import resolve_model, resolve_provider_candidates
 from app.schemas import ImagePart, MobileBootstrapConfigResponse, OperationType, ProviderRoutePreviewResponse, RenderTier
 from app.settings_store import get_provider_settings, get_provider_settings_meta
 
-router = APIRouter(prefix="/v1/config", tags=["config"])
+router = APIRouter(prefix="/v1/config", tags=["config"], route_class=ModelResponseRoute)
 
+_BOOTSTRAP_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
 
-@router.get("/bootstrap", response_model=MobileBootstrapConfigResponse)
-async def get_mobile_bootstrap_config() -> MobileBootstrapConfigResponse:
-    plans = [plan for plan in list_plans() if plan.is_active]
-    styles = list_active_styles()
-    variables = get_variable_map()
-
-    provider_settings = get_provider_settings()
-    provider_meta = get_provider_settings_meta()
 
-    provider_defaults = {
-        "default_provider": provider_settings.default_provider,
-        "fallback_chain": provider_settings.fallback_chain,
-        "version": provider_meta["current_version"],
-    }
-
-    return MobileBootstrapConfigResponse(
-        active_plans=plans,
-        styles=styles,
-        variables=variables,
-        provider_defaults=provider_defaults,
-    )
+@router.get("/bootstrap", response_model=MobileBootstrapConfigResponse)
+async def get_mobile_bootstrap_config(if_none_match: str | None = Header(default=None)) -> Response:
+    payload = get_bootstrap_config()
+    headers = {"ETag": payload.etag, "Cache-Control": _BOOTSTRAP_CACHE_CONTROL}
+    if etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
 
 
 @router.get("/provider-route-preview", response_model=ProviderRoutePreviewResponse)
@@ -3,13 +3,16 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, Query
 
 from app.auth import require_admin_access
+from app.credit_store import expire_credit_holds
 from app.credit_reset_store import (
     get_credit_reset_schedule,
     run_daily_credit_reset,
     tick_daily_credit_reset,
     update_credit_reset_schedule,
 )
+from app.json_responses import ModelResponseRoute
 from app.schemas import (
+    CreditHoldSweepResponse,
     CreditResetRunResponse,
     CreditResetScheduleResponse,
     CreditResetScheduleUpdateRequest,
@@ -20,6 +23,7 @@ router = APIRouter(
     prefix="/v1/admin/credits",
     tags=["admin", "credits"],
     dependencies=[Depends(require_admin_access)],
+    route_class=ModelResponseRoute,
 )
 
 
@@ -41,3 +45,8 @@ async def run_reset(dry_run: bool = Query(default=False)) -> CreditResetRunRespo
 @router.post("/tick-reset", response_model=CreditResetTickResponse)
 async def tick_reset() -> CreditResetTickResponse:
     return tick_daily_credit_reset()
+
+
+@router.post("/sweep-holds", response_model=CreditHoldSweepResponse)
+async def sweep_holds() -> CreditHoldSweepResponse:
+    return expire_credit_holds()
@@ -4,9 +4,10 @@ from fastapi import APIRouter, Depends, HTTPException
 
 from app.auth import assert_same_user, get_authenticated_user
 from app.credit_store import consume_credits, get_balance, grant_credits
+from app.json_responses import ModelResponseRoute
 from app.schemas import CreditBalanceResponse, CreditConsumeRequest, CreditGrantRequest, CreditOperationResponse
 
-router = APIRouter(prefix="/v1/credits", tags=["credits"])
+router = APIRouter(prefix="/v1/credits", tags=["credits"], route_class=ModelResponseRoute)
 
 
 @router.get("/balance/{user_id}", response_model=CreditBalanceResponse)
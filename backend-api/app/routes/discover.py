@@ -3,9 +3,10 @@ from __future__ import annotations
 from fastapi import APIRouter, Query
 
 from app.discover_store import get_discover_feed
+from app.json_responses import ModelResponseRoute
 from app.schemas import DiscoverFeedResponse
 
-router = APIRouter(prefix="/v1/discover", tags=["discover"])
+router = APIRouter(prefix="/v1/discover", tags=["discover"], route_class=ModelResponseRoute)
 
 
 @router.get("/feed", response_model=DiscoverFeedResponse)
@@ -19,6 +19,7 @@ from app.experiment_store import (
     run_experiment_automation,
     upsert_experiment,
 )
+from app.json_responses import ModelResponseRoute
 from app.schemas import (
     ActiveExperimentAssignmentsResponse,
     AdminActionRequest,
@@ -36,11 +37,12 @@ from app.schemas import (
     ExperimentUpsertRequest,
 )
 
-router = APIRouter(prefix="/v1/experiments", tags=["experiments"])
+router = APIRouter(prefix="/v1/experiments", tags=["experiments"], route_class=ModelResponseRoute)
 admin_router = APIRouter(
     prefix="/v1/admin/experiments",
     tags=["admin", "experiments"],
     dependencies=[Depends(require_admin_access)],
+    route_class=ModelResponseRoute,
 )
 
 
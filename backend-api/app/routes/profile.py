@@ -3,10 +3,11 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends
 
 from app.auth import assert_same_user, get_authenticated_user
+from app.json_responses import ModelResponseRoute
 from app.profile_store import get_profile_overview
 from app.schemas import ProfileOverviewResponse
 
-router = APIRouter(prefix="/v1/profile", tags=["profile"])
+router = APIRouter(prefix="/v1/profile", tags=["profile"], route_class=ModelResponseRoute)
 
 
 @router.get("/overview/me", response_model=ProfileOverviewResponse)
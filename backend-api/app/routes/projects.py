@@ -4,9 +4,10 @@ from fastapi import APIRouter, Depends, Query
 
 from app.auth import assert_same_user, get_authenticated_user
 from app.job_store import get_user_board
+from app.json_responses import ModelResponseRoute
 from app.schemas import UserBoardResponse
 
-router = APIRouter(prefix="/v1/projects", tags=["projects"])
+router = APIRouter(prefix="/v1/projects", tags=["projects"], route_class=ModelResponseRoute)
 
 
 @router.get("/board/me", response_model=UserBoardResponse)
@@ -3,9 +3,15 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, Query
 
 from app.auth import require_admin_access
+from app.json_responses import ModelResponseRoute
 from app.provider_health_store import get_provider_health
 
-router = APIRouter(prefix="/v1/admin", tags=["admin", "health"], dependencies=[Depends(require_admin_access)])
+router = APIRouter(
+    prefix="/v1/admin",
+    tags=["admin", "health"],
+    dependencies=[Depends(require_admin_access)],
+    route_class=ModelResponseRoute,
+)
 
 
 @router.get("/providers/health", response_model=dict[str, dict[str, float | int]])
@@ -3,14 +3,15 @@ from __future__ import annotations
 import hashlib
 import time
 from datetime import datetime
+from app.json_responses import ModelResponseRoute
 from app.time_utils import utc_now
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from app.analytics_store import ingest_event
+from app.analytics_buffer import enqueue_event
 from app.auth import assert_same_user, get_authenticated_user
-from app.credit_store import consume_credits, grant_credits
+from app.credit_store import capture_credit_hold, consume_credits, hold_credits, release_credit_hold
 from app.job_store import (
     get_render_job,
     has_completed_preview,
@@ -27,7 +28,7 @@ from app.schemas import (
     AnalyticsEventRequest,
     CancelJobResponse,
     CreditConsumeRequest,
-    CreditGrantRequest,
+    CreditHoldRequest,
     JobStatus,
     ProviderDispatchRequest,
     RenderJobCreateRequest,
@@ -39,9 +40,18 @@ from app.settings_store import get_provider_settings
 from app.subscription_store import get_entitlement
 from app.url_safety import validate_external_http_url
 
-router = APIRouter(prefix="/v1/ai", tags=["ai"])
+router = APIRouter(prefix="/v1/ai", tags=["ai"], route_class=ModelResponseRoute)
 
 _TERMINAL_STATUSES = {JobStatus.completed, JobStatus.failed, JobStatus.canceled}
+_MIN_CREDIT_HOLD_TTL_SECONDS = 300
+_CREDIT_HOLD_TTL_MARGIN_SECONDS = 60
+
+
+def _credit_hold_ttl_seconds(registry: dict[str, Any]) -> int:
+    # Failover can walk every provider up to its timeout; the hold must outlive that
+    # or the sweeper hands the credits back while the render is still in flight.
+    dispatch_budget = sum(float(getattr(provider, "timeout_seconds", 0) or 0) for provider in registry.values())
+    return min(86400, max(_MIN_CREDIT_HOLD_TTL_SECONDS, int(dispatch_budget) + _CREDIT_HOLD_TTL_MARGIN_SECONDS))
 
 
 def _build_prompt(payload: RenderJobCreateRequest) -> str:
@@ -90,7 +100,7 @@ async def create_render_job(
         tier=payload.tier,
         has_completed_preview=has_completed_preview(payload.project_id, payload.style_id),
     ):
-        ingest_event(
+        enqueue_event(
             AnalyticsEventRequest(
                 event_name="render_blocked_preview_required",
                 user_id=user_id,
@@ -101,8 +111,12 @@ async def create_render_job(
         )
         raise HTTPException(status_code=409, detail="preview_required_before_final")
 
+    # Built before any credits are held so a failure here cannot strand a hold.
+    prompt = _build_prompt(payload)
+
     credit_cost = 0
-    idempotency_key = None
+    credit_hold_id = None
+    credit_hold_request = None
     if user_id:
         entitlement = get_entitlement(user_id)
         effective_plan_id = entitlement.plan_id if entitlement.status.value == "active" else "free"
@@ -113,21 +127,25 @@ async def create_render_job(
         key_src = f"{user_id}|{payload.project_id}|{payload.style_id}|{payload.tier.value}|{payload.image_url}"
         idempotency_key = f"rdr_{hashlib.sha256(key_src.encode('utf-8')).hexdigest()[:48]}"
         if daily_credit_limit_enabled and credit_cost > 0:
+            credit_hold_request = CreditHoldRequest(
+                user_id=user_id,
+                amount=credit_cost,
+                reason=f"render_{payload.tier.value}",
+                idempotency_key=idempotency_key,
+                metadata={
+                    "plan_id": effective_plan_id,
+                    "tier": payload.tier.value,
+                },
+                ttl_seconds=_credit_hold_ttl_seconds(registry),
+            )
             try:
-                consume_credits(
-                    CreditConsumeRequest(
-                        user_id=user_id,
-                        amount=credit_cost,
-                        reason=f"render_{payload.tier.value}",
-                        idempotency_key=idempotency_key,
-                        metadata={
-                            "plan_id": effective_plan_id,
-                            "tier": payload.tier.value,
-                        },
-                    )
-                )
+                credit_hold = hold_credits(credit_hold_request)
+                # A replayed request reuses the original hold; only the request that placed
+                # it captures or releases it.
+                if credit_hold.applied:
+                    credit_hold_id = credit_hold.hold_id
             except ValueError as exc:
-                ingest_event(
+                enqueue_event(
                     AnalyticsEventRequest(
                         event_name="render_blocked_insufficient_credits",
                         user_id=user_id,
@@ -147,6 +165,8 @@ async def create_render_job(
             available_providers=set(registry.keys()),
         )
     except ValueError as exc:
+        if credit_hold_id:
+            release_credit_hold(credit_hold_id)
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     attempted_providers: list[str] = []
@@ -162,7 +182,7 @@ async def create_render_job(
             model_id = resolve_model(settings, provider_name, payload.tier)
             provider = registry[provider_name]
             dispatch_request = ProviderDispatchRequest(
-                prompt=_build_prompt(payload),
+                prompt=prompt,
                 image_url=payload.image_url,
                 mask_url=payload.mask_url,
                 model_id=model_id,
@@ -180,7 +200,7 @@ async def create_render_job(
             break
         except Exception as exc:  # noqa: BLE001
             attempt_errors[provider_name] = str(exc)
-            ingest_event(
+            enqueue_event(
                 AnalyticsEventRequest(
                     event_name="render_provider_attempt_failed",
                     user_id=user_id,
@@ -192,20 +212,13 @@ async def create_render_job(
             )
 
     if not provider_result or not selected_provider or not selected_model:
-        if user_id and daily_credit_limit_enabled and credit_cost > 0 and idempotency_key:
+        if credit_hold_id:
             try:
-                grant_credits(
-                    CreditGrantRequest(
-                        user_id=user_id,
-                        amount=credit_cost,
-                        reason="render_refund_dispatch_failed",
-                        idempotency_key=f"refund_{idempotency_key}",
-                    )
-                )
+                release_credit_hold(credit_hold_id)
             except ValueError:
-                # Keep returning dispatch failure as primary error.
+                # Keep returning dispatch failure as primary error; the sweeper expires the hold.
                 pass
-        ingest_event(
+        enqueue_event(
             AnalyticsEventRequest(
                 event_name="render_dispatch_failed",
                 user_id=user_id,
@@ -240,11 +253,52 @@ async def create_render_job(
         updated_at=utc_now(),
     )
 
+    if credit_hold_id and credit_hold_request:
+        captured = capture_credit_hold(credit_hold_id)
+        if not captured.applied:
+            # The hold expired mid-dispatch and its credits went back to the balance;
+            # charge them directly so the render is not delivered for free.
+            try:
+                consume_credits(
+                    CreditConsumeRequest(
+                        user_id=credit_hold_request.user_id,
+                        amount=credit_hold_request.amount,
+                        reason=credit_hold_request.reason,
+                        idempotency_key=credit_hold_request.idempotency_key,
+                        metadata={**credit_hold_request.metadata, "hold_id": credit_hold_id},
+                    )
+                )
+            except ValueError as exc:
+                # The provider already has the job: stop it and keep a failed record rather than
+                # orphaning an uncharged render.
+                try:
+                    await registry[selected_provider].cancel(job.provider_job_id, selected_model)
+                except Exception:  # noqa: BLE001
+                    # Still record the failure; the job never reaches the user without its output.
+                    pass
+                job.status = JobStatus.failed
+                job.output_url = None
+                job.error_code = str(exc)
+                save_render_job(job)
+                if user_id:
+                    upsert_user_project(user_id, payload.project_id, str(payload.image_url))
+                enqueue_event(
+                    AnalyticsEventRequest(
+                        event_name="render_blocked_insufficient_credits",
+                        user_id=user_id,
+                        platform=payload.platform,
+                        provider=selected_provider,
+                        operation=payload.operation,
+                        status=JobStatus.failed,
+                    )
+                )
+                raise HTTPException(status_code=402, detail=str(exc)) from exc
+
     save_render_job(job)
     if user_id:
         upsert_user_project(user_id, payload.project_id, str(payload.image_url))
 
-    ingest_event(
+    enqueue_event(
         AnalyticsEventRequest(
             event_name="render_dispatched",
             user_id=user_id,
@@ -286,7 +340,7 @@ async def get_render_job_status(
                 ) or job
 
                 if old_status != status_result.status:
-                    ingest_event(
+                    enqueue_event(
                         AnalyticsEventRequest(
                             event_name="render_status_updated",
                             provider=job.provider,
@@ -335,7 +389,7 @@ async def cancel_render_job(
 
     if canceled:
         job = update_render_job_status(job.id, status=JobStatus.canceled) or job
-        ingest_event(
+        enqueue_event(
             AnalyticsEventRequest(
                 event_name="render_canceled",
                 provider=job.provider,
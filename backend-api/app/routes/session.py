@@ -1,18 +1,21 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+import asyncio
+import time
+from typing import Any, Callable
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
 
-from app.auth import get_authenticated_user
 from app.auth_store import get_me
 from app.auth_utils import parse_bearer_token
+from app.config_store import get_bootstrap_config
 from app.experiment_store import assign_active_experiments_for_user
 from app.job_store import get_user_board
-from app.product_store import get_variable_map, list_active_styles, list_plans
+from app.json_responses import ModelResponseRoute, json_bytes_response
 from app.profile_store import get_profile_overview
 from app.schemas import ActiveExperimentAssignmentsResponse, SessionBootstrapResponse
-from app.settings_store import get_provider_settings, get_provider_settings_meta
 
-router = APIRouter(prefix="/v1/session", tags=["session"])
+router = APIRouter(prefix="/v1/session", tags=["session"], route_class=ModelResponseRoute)
 
 
 @router.get("/bootstrap/me", response_model=SessionBootstrapResponse)
@@ -20,37 +23,54 @@ async def session_bootstrap_me(
     board_limit: int = Query(default=30, ge=1, le=100),
     experiment_limit: int = Query(default=50, ge=1, le=200),
     authorization: str | None = Header(default=None),
-    auth_user_id: str = Depends(get_authenticated_user),
-) -> SessionBootstrapResponse:
+) -> Response:
+    started_at = time.perf_counter()
+    timings: dict[str, float] = {}
+
+    # Resolve the token once; `me` carries the user id the other sections need.
     token = parse_bearer_token(authorization)
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="missing_or_invalid_token")
-    me = get_me(token)
+    me = await _timed_section("auth", timings, get_me, token)
     if not me:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid_or_expired_token")
+    user_id = me.user_id
+
+    profile, board, assignments, config = await asyncio.gather(
+        _timed_section("profile", timings, get_profile_overview, user_id),
+        _timed_section("board", timings, get_user_board, user_id=user_id, limit=board_limit),
+        _timed_section(
+            "experiments",
+            timings,
+            assign_active_experiments_for_user,
+            user_id=user_id,
+            limit=experiment_limit,
+        ),
+        _timed_section("config", timings, get_bootstrap_config),
+    )
 
-    profile = get_profile_overview(auth_user_id)
-    board = get_user_board(user_id=auth_user_id, limit=board_limit)
-    assignments = assign_active_experiments_for_user(user_id=auth_user_id, limit=experiment_limit)
-    experiments = ActiveExperimentAssignmentsResponse(user_id=auth_user_id, assignments=assignments)
-    catalog = [plan for plan in list_plans() if plan.is_active]
-    styles = list_active_styles()
-
-    provider_settings = get_provider_settings()
-    provider_meta = get_provider_settings_meta()
-    provider_defaults = {
-        "default_provider": provider_settings.default_provider,
-        "fallback_chain": provider_settings.fallback_chain,
-        "version": provider_meta["current_version"],
-    }
-
-    return SessionBootstrapResponse(
+    shared = config.config
+    payload = SessionBootstrapResponse(
         me=me,
         profile=profile,
         board=board,
-        experiments=experiments,
-        catalog=catalog,
-        styles=styles,
-        variables=get_variable_map(),
-        provider_defaults=provider_defaults,
+        experiments=ActiveExperimentAssignmentsResponse(user_id=user_id, assignments=assignments),
+        catalog=shared.active_plans,
+        styles=shared.styles,
+        variables=shared.variables,
+        provider_defaults=shared.provider_defaults,
     )
+
+    # Built here rather than via an injected `Response` so the payload is serialized once.
+    timings["total"] = (time.perf_counter() - started_at) * 1000
+    server_timing = ", ".join(f"{name};dur={duration_ms:.1f}" for name, duration_ms in timings.items())
+    return json_bytes_response(payload, headers={"Server-Timing": server_timing})
+
+
+async def _timed_section(name: str, timings: dict[str, float], func: Callable[..., Any], *args, **kwargs) -> Any:
+    # Store calls are blocking; run each section on the default thread pool.
+    started_at = time.perf_counter()
+    try:
+        return await asyncio.to_thread(func, *args, **kwargs)
+    finally:
+        timings[name] = (time.perf_counter() - started_at) * 1000
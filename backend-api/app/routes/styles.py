@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from fastapi import APIRouter, HTTPException, Query
 
+from app.json_responses import ModelResponseRoute
 from app.product_store import get_style, list_styles
 from app.schemas import StylePreset
 
-router = APIRouter(prefix="/v1/styles", tags=["styles"])
+router = APIRouter(prefix="/v1/styles", tags=["styles"], route_class=ModelResponseRoute)
 
 
 @router.get("", response_model=list[StylePreset])
@@ -3,6 +3,7 @@ from __future__ import annotations
 from fastapi import APIRouter, Depends, HTTPException
 
 from app.auth import assert_same_user, get_authenticated_user, require_admin_access
+from app.json_responses import ModelResponseRoute
 from app.product_store import list_plans
 from app.schemas import (
     PlanConfig,
@@ -13,11 +14,12 @@ from app.schemas import (
 )
 from app.subscription_store import create_web_checkout_session, get_entitlement, list_entitlements, upsert_entitlement
 
-router = APIRouter(prefix="/v1/subscriptions", tags=["subscriptions"])
+router = APIRouter(prefix="/v1/subscriptions", tags=["subscriptions"], route_class=ModelResponseRoute)
 admin_router = APIRouter(
     prefix="/v1/admin/subscriptions",
     tags=["admin", "subscriptions"],
     dependencies=[Depends(require_admin_access)],
+    route_class=ModelResponseRoute,
 )
 
 
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter, Header, HTTPException
 
+from app.json_responses import ModelResponseRoute
 from app.schemas import (
     GooglePlayWebhookRequest,
     StoreKitWebhookRequest,
@@ -10,7 +11,7 @@ from app.schemas import (
 )
 from app.subscription_store import handle_google_play_webhook, handle_storekit_webhook, handle_web_billing_webhook
 
-router = APIRouter(prefix="/v1/webhooks", tags=["webhooks", "subscriptions"])
+router = APIRouter(prefix="/v1/webhooks", tags=["webhooks", "subscriptions"], route_class=ModelResponseRoute)
 
 
 @router.post("/storekit", response_model=WebhookProcessResponse)
@@ -439,6 +439,7 @@ class AnalyticsDashboardSummary(BaseModel):
     p95_latency_ms: float | None
     total_cost_usd: float
     avg_cost_per_render_usd: float | None
+    p99_latency_ms: float | None = None
 
 
 class AnalyticsProviderMetric(BaseModel):
@@ -449,6 +450,7 @@ class AnalyticsProviderMetric(BaseModel):
     p95_latency_ms: float | None
     total_cost_usd: float
     avg_cost_usd: float | None
+    p99_latency_ms: float | None = None
 
 
 class AnalyticsOperationMetric(BaseModel):
@@ -459,6 +461,7 @@ class AnalyticsOperationMetric(BaseModel):
     p95_latency_ms: float | None
     total_cost_usd: float
     avg_cost_usd: float | None
+    p99_latency_ms: float | None = None
 
 
 class AnalyticsPlatformMetric(BaseModel):
@@ -467,6 +470,7 @@ class AnalyticsPlatformMetric(BaseModel):
     render_events: int
     render_success: int
     render_success_rate: float
+    unique_users: int | None = None
 
 
 class AnalyticsStatusMetric(BaseModel):
@@ -517,6 +521,16 @@ class AnalyticsFunnelMetrics(BaseModel):
     checkout_to_paid_rate: float
 
 
+class AnalyticsFunnelSegmentMetric(BaseModel):
+    platform: str
+    plan_id: str
+    login_users: int
+    preview_users: int
+    final_users: int
+    checkout_starts: int
+    paid_activations: int
+
+
 class AnalyticsSubscriptionSourceMetric(BaseModel):
     source: str
     active_subscriptions: int
@@ -561,6 +575,7 @@ class AnalyticsDashboardResponse(BaseModel):
     subscription_sources: list[AnalyticsSubscriptionSourceMetric]
     queue: AnalyticsQueueMetrics
     funnel: AnalyticsFunnelMetrics
+    funnel_segments: list[AnalyticsFunnelSegmentMetric] = Field(default_factory=list)
     experiment_breakdown: list[AnalyticsExperimentMetric]
     alerts: list[AnalyticsAlert]
 
@@ -677,6 +692,49 @@ class EventIngestResponse(BaseModel):
     accepted: bool
 
 
+class AnalyticsBatchItemError(BaseModel):
+    index: int
+    errors: list[str] = Field(default_factory=list)
+
+
+class AnalyticsBatchIngestResponse(BaseModel):
+    received: int
+    accepted: int
+    rejected: int
+    errors: list[AnalyticsBatchItemError] = Field(default_factory=list)
+
+
+class AnalyticsRollupRefreshResponse(BaseModel):
+    watermark: datetime
+    hours_rebuilt: int
+    events_scanned: int
+    rows_written: int
+    duration_ms: int = 0
+
+
+class AnalyticsFunnelRefreshResponse(BaseModel):
+    watermark: datetime
+    days_rebuilt: int
+    rows_scanned: int
+    rows_written: int
+    duration_ms: int = 0
+
+
+class AnalyticsIngestStatsResponse(BaseModel):
+    running: bool
+    queued: int
+    max_events: int
+    batch_size: int
+    flush_interval_ms: int
+    overflow_policy: str
+    enqueued: int = 0
+    flushed: int = 0
+    dropped: int = 0
+    failed: int = 0
+    written_sync: int = 0
+    flushes: int = 0
+
+
 class MobileBootstrapConfigResponse(BaseModel):
     active_plans: list[PlanConfig]
     styles: list[StylePreset] = Field(default_factory=list)
@@ -721,6 +779,38 @@ class CreditOperationResponse(BaseModel):
     applied: bool
 
 
+class CreditHoldStatus(str, Enum):
+    held = "held"
+    captured = "captured"
+    released = "released"
+    expired = "expired"
+
+
+class CreditHoldRequest(BaseModel):
+    user_id: str
+    amount: int = Field(ge=1)
+    reason: str = "render"
+    idempotency_key: str | None = None
+    ttl_seconds: int = Field(default=300, ge=1, le=86400)
+    metadata: dict[str, Any] = Field(default_factory=dict)
+
+
+class CreditHoldResponse(BaseModel):
+    hold_id: str
+    user_id: str
+    amount: int
+    status: CreditHoldStatus
+    balance: int
+    applied: bool
+    expires_at: datetime
+
+
+class CreditHoldSweepResponse(BaseModel):
+    checked_at: datetime
+    expired_holds: int
+    credits_returned: int
+
+
 class SubscriptionSource(str, Enum):
     ios = "ios"
     android = "android"
@@ -839,8 +929,14 @@ class WebhookProcessResponse(BaseModel):
     message: str
 
 
+class CreditRefillMode(str, Enum):
+    batch = "batch"
+    lazy = "lazy"
+
+
 class CreditResetScheduleResponse(BaseModel):
     enabled: bool
+    refill_mode: CreditRefillMode = CreditRefillMode.batch
     reset_hour_utc: int
     reset_minute_utc: int
     free_daily_credits: int
@@ -851,6 +947,7 @@ class CreditResetScheduleResponse(BaseModel):
 
 class CreditResetScheduleUpdateRequest(BaseModel):
     enabled: bool | None = None
+    refill_mode: CreditRefillMode | None = None
     reset_hour_utc: int | None = Field(default=None, ge=0, le=23)
     reset_minute_utc: int | None = Field(default=None, ge=0, le=59)
     free_daily_credits: int | None = Field(default=None, ge=0)
@@ -863,6 +960,8 @@ class CreditResetRunResponse(BaseModel):
     dry_run: bool
     users_processed: int
     balances_updated: int
+    chunks_processed: int = 0
+    users_per_second: float | None = None
 
 
 class CreditResetTickResponse(BaseModel):
@@ -873,6 +972,23 @@ class CreditResetTickResponse(BaseModel):
     run_result: CreditResetRunResponse | None = None
 
 
+class RetentionTableResult(BaseModel):
+    table: str
+    cutoff: datetime
+    rows_purged: int
+    chunks: int = 0
+    partitions_dropped: int = 0
+    duration_ms: int = 0
+
+
+class RetentionRunResponse(BaseModel):
+    started_at: datetime
+    completed_at: datetime
+    dry_run: bool
+    total_rows_purged: int
+    tables: list[RetentionTableResult] = Field(default_factory=list)
+
+
 class WebCheckoutSessionRequest(BaseModel):
     user_id: str
     plan_id: str
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime
 from app.time_utils import utc_now
 
 from sqlalchemy import desc, select
 
+from app.runtime_env import read_float_env
+
+from app.cache_bus import TOPIC_PROVIDER_SETTINGS, publish_invalidation, subscribe
 from app.db import session_scope
 from app.models import AdminAuditLogModel, ProviderSettingsStateModel, ProviderSettingsVersionModel
 from app.schemas import (
@@ -17,6 +23,21 @@ from app.schemas import (
 
 _PROVIDER_DOMAIN = "provider_settings"
 _STATE_ID = 1
+# How long a worker trusts its cached published settings before re-checking
+# current_version. Publishes reach other workers through the cache bus; this only
+# bounds staleness if a bus event is lost.
+_SETTINGS_VERSION_CHECK_SECONDS = read_float_env("PROVIDER_SETTINGS_CACHE_CHECK_SECONDS", 30.0)
+
+
+@dataclass(frozen=True)
+class _PublishedSettingsCache:
+    version: int
+    settings: ProviderSettings
+    checked_at: float
+
+
+_published_cache: _PublishedSettingsCache | None = None
+_published_cache_lock = threading.Lock()
 
 
 def bootstrap_provider_settings() -> None:
@@ -48,9 +69,8 @@ def bootstrap_provider_settings() -> None:
 
 
 def get_provider_settings() -> ProviderSettings:
-    with session_scope() as session:
-        state = _get_or_create_state(session)
-        return ProviderSettings.model_validate(state.published_json)
+    """Return the published settings; the instance is shared, treat it as read-only."""
+    return _get_published_cache().settings
 
 
 def get_provider_settings_draft() -> ProviderSettings:
@@ -60,9 +80,13 @@ def get_provider_settings_draft() -> ProviderSettings:
 
 
 def get_provider_settings_meta() -> dict[str, int]:
-    with session_scope() as session:
-        state = _get_or_create_state(session)
-        return {"current_version": state.current_version}
+    return {"current_version": _get_published_cache().version}
+
+
+def invalidate_provider_settings_cache() -> None:
+    global _published_cache
+    with _published_cache_lock:
+        _published_cache = None
 
 
 def update_provider_settings(
@@ -140,12 +164,13 @@ def publish_provider_settings(
             ),
         )
 
-        return ProviderSettingsVersionSummary(
-            version=new_version,
-            actor=action.actor,
-            reason=action.reason,
-            created_at=utc_now(),
-        )
+    publish_invalidation(TOPIC_PROVIDER_SETTINGS)
+    return ProviderSettingsVersionSummary(
+        version=new_version,
+        actor=action.actor,
+        reason=action.reason,
+        created_at=utc_now(),
+    )
 
 
 def rollback_provider_settings(
@@ -192,12 +217,13 @@ def rollback_provider_settings(
             ),
         )
 
-        return ProviderSettingsVersionSummary(
-            version=new_version,
-            actor=action.actor,
-            reason=action.reason or f"rollback_from_{version}",
-            created_at=utc_now(),
-        )
+    publish_invalidation(TOPIC_PROVIDER_SETTINGS)
+    return ProviderSettingsVersionSummary(
+        version=new_version,
+        actor=action.actor,
+        reason=action.reason or f"rollback_from_{version}",
+        created_at=utc_now(),
+    )
 
 
 def list_provider_settings_versions(limit: int = 50) -> list[ProviderSettingsVersionSummary]:
@@ -227,6 +253,42 @@ def list_provider_settings_audit(limit: int = 100) -> list[AuditLogEntry]:
         return [_audit_model_to_schema(row) for row in rows]
 
 
+def _on_settings_invalidated(_key: str | None) -> None:
+    invalidate_provider_settings_cache()
+
+
+subscribe(TOPIC_PROVIDER_SETTINGS, _on_settings_invalidated)
+
+
+def _get_published_cache() -> _PublishedSettingsCache:
+    global _published_cache
+    cached = _published_cache
+    now = time.monotonic()
+    if cached and now - cached.checked_at < _SETTINGS_VERSION_CHECK_SECONDS:
+        return cached
+
+    with session_scope() as session:
+        # Cheap scalar probe first; the JSON blob is only re-read and re-validated
+        # when another worker (or this one) published a new version.
+        version = session.execute(
+            select(ProviderSettingsStateModel.current_version).where(ProviderSettingsStateModel.id == _STATE_ID)
+        ).scalar_one_or_none()
+        if cached and version == cached.version:
+            refreshed = _PublishedSettingsCache(version=cached.version, settings=cached.settings, checked_at=now)
+        else:
+            state = _get_or_create_state(session)
+            refreshed = _PublishedSettingsCache(
+                version=state.current_version,
+                settings=ProviderSettings.model_validate(state.published_json),
+                checked_at=now,
+            )
+
+    with _published_cache_lock:
+        if _published_cache is cached:
+            _published_cache = refreshed
+    return refreshed
+
+
 def _get_or_create_state(session) -> ProviderSettingsStateModel:
     state = session.get(ProviderSettingsStateModel, _STATE_ID)
     if state:
@@ -2,15 +2,17 @@ from __future__ import annotations
 
 import os
 import secrets
+from datetime import UTC
 from urllib.parse import quote_plus
 from uuid import uuid4
 
 from sqlalchemy import desc, select
 
+from app.cache_bus import TOPIC_ENTITLEMENTS, publish_invalidation, subscribe
 from app.db import session_scope
 from app.models import SubscriptionEntitlementModel, SubscriptionWebhookEventModel
 from app.product_store import list_plans
-from app.runtime_env import is_production_mode
+from app.runtime_env import is_production_mode, read_float_env
 from app.schemas import (
     GooglePlayWebhookRequest,
     WebBillingWebhookRequest,
@@ -24,6 +26,12 @@ from app.schemas import (
     WebhookProcessResponse,
 )
 from app.time_utils import utc_now
+from app.ttl_cache import TTLCache, is_missing
+
+_ENTITLEMENT_CACHE_TTL_SECONDS = read_float_env("ENTITLEMENT_CACHE_TTL_SECONDS", 300.0)
+_entitlement_cache: TTLCache[SubscriptionEntitlementResponse] = TTLCache(
+    int(os.getenv("ENTITLEMENT_CACHE_SIZE", "50000"))
+)
 
 _STATUS_PRIORITY: dict[str, int] = {
     SubscriptionStatus.active.value: 4,
@@ -34,17 +42,26 @@ _STATUS_PRIORITY: dict[str, int] = {
 
 
 def get_entitlement(user_id: str) -> SubscriptionEntitlementResponse:
+    """Return the user's entitlement; cached instances are shared, treat them as read-only."""
+    cached = _entitlement_cache.get(user_id)
+    if not is_missing(cached):
+        return cached
+
     with session_scope() as session:
         model = session.get(SubscriptionEntitlementModel, user_id)
         if not model:
-            return SubscriptionEntitlementResponse(
+            entitlement = SubscriptionEntitlementResponse(
                 user_id=user_id,
                 plan_id="free",
                 status=SubscriptionStatus.inactive,
                 source=SubscriptionSource.manual,
                 metadata={},
             )
-        return _to_schema(model)
+        else:
+            entitlement = _to_schema(model)
+
+    _cache_entitlement(entitlement)
+    return entitlement
 
 
 def list_entitlements(limit: int = 200) -> list[SubscriptionEntitlementResponse]:
@@ -71,7 +88,9 @@ def upsert_entitlement(user_id: str, payload: SubscriptionEntitlementUpsertReque
         model.metadata_json = payload.metadata
         model.updated_at = utc_now()
 
-        return _to_schema(model)
+    entitlement = _to_schema(model)
+    _publish_entitlement_change(user_id, entitlement)
+    return entitlement
 
 
 def handle_storekit_webhook(payload: StoreKitWebhookRequest, header_secret: str | None) -> WebhookProcessResponse:
@@ -94,7 +113,7 @@ def handle_storekit_webhook(payload: StoreKitWebhookRequest, header_secret: str
         session.add(event_model)
 
         plan_id = _resolve_plan_id_for_product("ios", payload.product_id)
-        _apply_webhook_entitlement_update(
+        entitlement = _apply_webhook_entitlement_update(
             session=session,
             user_id=payload.user_id,
             plan_id=plan_id,
@@ -111,6 +130,7 @@ def handle_storekit_webhook(payload: StoreKitWebhookRequest, header_secret: str
         event_model.processing_error = None
         event_model.processed_at = utc_now()
 
+    _publish_entitlement_change(payload.user_id, entitlement)
     return WebhookProcessResponse(event_id=event_id, processed=True, message="processed")
 
 
@@ -134,7 +154,7 @@ def handle_google_play_webhook(payload: GooglePlayWebhookRequest, header_secret:
         session.add(event_model)
 
         plan_id = _resolve_plan_id_for_product("android", payload.product_id)
-        _apply_webhook_entitlement_update(
+        entitlement = _apply_webhook_entitlement_update(
             session=session,
             user_id=payload.user_id,
             plan_id=plan_id,
@@ -151,6 +171,7 @@ def handle_google_play_webhook(payload: GooglePlayWebhookRequest, header_secret:
         event_model.processing_error = None
         event_model.processed_at = utc_now()
 
+    _publish_entitlement_change(payload.user_id, entitlement)
     return WebhookProcessResponse(event_id=event_id, processed=True, message="processed")
 
 
@@ -174,7 +195,7 @@ def handle_web_billing_webhook(payload: WebBillingWebhookRequest, header_secret:
         session.add(event_model)
 
         plan_id = _resolve_plan_id_for_product("web", payload.product_id)
-        _apply_webhook_entitlement_update(
+        entitlement = _apply_webhook_entitlement_update(
             session=session,
             user_id=payload.user_id,
             plan_id=plan_id,
@@ -191,6 +212,7 @@ def handle_web_billing_webhook(payload: WebBillingWebhookRequest, header_secret:
         event_model.processing_error = None
         event_model.processed_at = utc_now()
 
+    _publish_entitlement_change(payload.user_id, entitlement)
     return WebhookProcessResponse(event_id=event_id, processed=True, message="processed")
 
 
@@ -244,7 +266,7 @@ def _apply_webhook_entitlement_update(
     renews_at,
     expires_at,
     metadata: dict,
-) -> None:
+) -> SubscriptionEntitlementResponse | None:
     entitlement = session.get(SubscriptionEntitlementModel, user_id)
     if not entitlement:
         entitlement = SubscriptionEntitlementModel(user_id=user_id)
@@ -260,7 +282,7 @@ def _apply_webhook_entitlement_update(
         candidate_renews_at=renews_at,
         candidate_expires_at=expires_at,
     ):
-        return
+        return None
 
     entitlement.plan_id = plan_id
     entitlement.status = status
@@ -271,6 +293,7 @@ def _apply_webhook_entitlement_update(
     entitlement.expires_at = expires_at
     entitlement.metadata_json = metadata
     entitlement.updated_at = utc_now()
+    return _to_schema(entitlement)
 
 
 def _should_apply_candidate(
@@ -338,6 +361,35 @@ def _plan_price_rank(plan_id: str) -> float:
     return 1.0
 
 
+def _cache_entitlement(entitlement: SubscriptionEntitlementResponse) -> None:
+    ttl_seconds = _ENTITLEMENT_CACHE_TTL_SECONDS
+    expires_at = entitlement.expires_at
+    if expires_at is not None:
+        if expires_at.tzinfo is not None:
+            # Webhook and admin payloads may carry an offset; utc_now() is naive UTC.
+            expires_at = expires_at.astimezone(UTC).replace(tzinfo=None)
+        # An entry must never outlive the entitlement itself.
+        ttl_seconds = min(ttl_seconds, (expires_at - utc_now()).total_seconds())
+    _entitlement_cache.set(entitlement.user_id, entitlement, ttl_seconds)
+
+
+def _publish_entitlement_change(user_id: str, entitlement: SubscriptionEntitlementResponse | None) -> None:
+    # Publishing evicts locally and on peers; then this worker keeps the fresh value.
+    publish_invalidation(TOPIC_ENTITLEMENTS, user_id)
+    if entitlement is not None:
+        _cache_entitlement(entitlement)
+
+
+def _on_entitlements_invalidated(user_id: str | None) -> None:
+    if user_id is None:
+        _entitlement_cache.clear()
+    else:
+        _entitlement_cache.pop(user_id)
+
+
+subscribe(TOPIC_ENTITLEMENTS, _on_entitlements_invalidated)
+
+
 def _get_webhook_event(session, event_id: str) -> SubscriptionWebhookEventModel | None:
     stmt = select(SubscriptionWebhookEventModel).where(SubscriptionWebhookEventModel.event_id == event_id)
     return session.execute(stmt).scalar_one_or_none()
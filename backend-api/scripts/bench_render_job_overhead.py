@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from fastapi.testclient import TestClient
+
+from app.bootstrap import init_database
+from app.credit_store import grant_credits
+from app.main import app
+from app.schemas import CreditGrantRequest
+from app.settings_store import get_provider_settings, invalidate_provider_settings_cache
+
+
+def _summarize(samples_ms: list[float]) -> dict[str, float]:
+    ordered = sorted(samples_ms)
+    return {
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p50_ms": round(ordered[len(ordered) // 2], 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+    }
+
+
+def _time_settings_reads(iterations: int, cached: bool) -> list[float]:
+    samples: list[float] = []
+    for _ in range(iterations):
+        if not cached:
+            invalidate_provider_settings_cache()
+        started_at = time.perf_counter()
+        get_provider_settings()
+        samples.append((time.perf_counter() - started_at) * 1000)
+    return samples
+
+
+def _time_render_jobs(
+    client: TestClient,
+    token: str,
+    user_id: str,
+    iterations: int,
+    cached: bool,
+    tag: str,
+) -> list[float]:
+    samples: list[float] = []
+    for index in range(iterations):
+        if not cached:
+            invalidate_provider_settings_cache()
+        started_at = time.perf_counter()
+        response = client.post(
+            "/v1/ai/render-jobs",
+            headers={"Authorization": f"Bearer {token}"},
+            json={
+                "user_id": user_id,
+                "platform": "bench",
+                "project_id": f"bench_project_{tag}_{index}",
+                "image_url": f"https://8.8.8.8/bench_{tag}_{index}.jpg",
+                "style_id": "modern",
+                "operation": "restyle",
+                "tier": "preview",
+                "target_parts": ["full_room"],
+                "prompt_overrides": {},
+            },
+        )
+        samples.append((time.perf_counter() - started_at) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"render_job_failed: {response.status_code} {response.text}")
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure create_render_job overhead with and without the settings cache."
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--user-id", default="bench_render_user")
+    args = parser.parse_args()
+
+    init_database()
+    client = TestClient(app)
+    login = client.post("/v1/auth/login-dev", json={"user_id": args.user_id, "platform": "bench", "ttl_hours": 1})
+    token = login.json()["access_token"]
+    grant_credits(CreditGrantRequest(user_id=args.user_id, amount=args.iterations * 10, reason="bench"))
+
+    run_tag = str(int(time.time()))
+    result = {
+        "iterations": args.iterations,
+        "get_provider_settings": {
+            "uncached": _summarize(_time_settings_reads(args.iterations, cached=False)),
+            "cached": _summarize(_time_settings_reads(args.iterations, cached=True)),
+        },
+        "create_render_job": {
+            "uncached": _summarize(
+                _time_render_jobs(client, token, args.user_id, args.iterations, cached=False, tag=f"{run_tag}_u")
+            ),
+            "cached": _summarize(
+                _time_render_jobs(client, token, args.user_id, args.iterations, cached=True, tag=f"{run_tag}_c")
+            ),
+        },
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import argparse
+import enum
+import inspect
+import json
+import statistics
+import sys
+import time
+import types
+import typing
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import AnyUrl, BaseModel, TypeAdapter
+
+from app import schemas
+from app.json_responses import FastJSONResponse
+from app.time_utils import utc_now
+
+
+def _sample(annotation: Any, fanout: int, depth: int = 0) -> Any:
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin in (typing.Union, types.UnionType):
+        return _sample(next(arg for arg in args if arg is not type(None)), fanout, depth)
+    if origin is typing.Literal:
+        return args[0]
+    if origin in (list, tuple, set):
+        return [_sample(args[0] if args else str, fanout, depth + 1) for _ in range(fanout if depth < 3 else 1)]
+    if origin is dict:
+        value_type = args[1] if args else str
+        return {f"key_{index}": _sample(value_type, fanout, depth + 1) for index in range(fanout if depth < 3 else 1)}
+    if inspect.isclass(annotation):
+        if issubclass(annotation, BaseModel):
+            # model_construct skips field constraints; the values only need the right shapes.
+            fields = annotation.model_fields.items()
+            return annotation.model_construct(
+                **{name: _sample(field.annotation, fanout, depth + 1) for name, field in fields}
+            )
+        if issubclass(annotation, AnyUrl):
+            return annotation("https://cdn.example.com/sample.png")
+        if issubclass(annotation, enum.Enum):
+            return next(iter(annotation))
+        if issubclass(annotation, bool):
+            return True
+        if issubclass(annotation, int):
+            return 42
+        if issubclass(annotation, float):
+            return 0.4242
+        if issubclass(annotation, datetime):
+            return utc_now()
+        if issubclass(annotation, date):
+            return utc_now().date()
+    return "sample-value"
+
+
+def _response_schemas() -> list[type[BaseModel]]:
+    return [
+        value
+        for name, value in vars(schemas).items()
+        if name.endswith("Response") and inspect.isclass(value) and issubclass(value, BaseModel)
+    ]
+
+
+def _time(func: Callable[[], Any], iterations: int) -> dict[str, float]:
+    samples: list[float] = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started_at) * 1000)
+    ordered = sorted(samples)
+    return {
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p50_ms": round(ordered[len(ordered) // 2], 4),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+    }
+
+
+def _bench_schema(schema: type[BaseModel], payload: BaseModel, iterations: int) -> dict[str, Any]:
+    adapter = TypeAdapter(schema)
+    stdlib_response = JSONResponse.__new__(JSONResponse)
+    fast_response = FastJSONResponse.__new__(FastJSONResponse)
+
+    def revalidated() -> Any:
+        # What FastAPI does for a returned model: dump, validate again, dump to JSON-able data.
+        return adapter.dump_python(adapter.validate_python(payload.model_dump()), mode="json", by_alias=True)
+
+    variants = {
+        "revalidate_stdlib_json": lambda: stdlib_response.render(revalidated()),
+        "revalidate_orjson": lambda: fast_response.render(revalidated()),
+        "jsonable_encoder_stdlib_json": lambda: stdlib_response.render(jsonable_encoder(payload)),
+        "model_dump_json_direct": lambda: payload.model_dump_json(by_alias=True),
+    }
+    results = {name: _time(func, iterations) for name, func in variants.items()}
+    baseline = results["revalidate_stdlib_json"]["mean_ms"]
+    for stats in results.values():
+        stats["speedup"] = round(baseline / stats["mean_ms"], 2) if stats["mean_ms"] else 0.0
+
+    return {
+        "schema": schema.__name__,
+        "payload_bytes": len(payload.model_dump_json()),
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare response serialization paths for the largest API schemas.")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--fanout", type=int, default=8, help="Items per list/dict in generated payloads.")
+    parser.add_argument("--top", type=int, default=5, help="Benchmark the N schemas with the largest payloads.")
+    parser.add_argument("--schema", action="append", default=[], help="Benchmark a specific schema by name.")
+    args = parser.parse_args()
+
+    if args.schema:
+        selected = [getattr(schemas, name) for name in args.schema]
+    else:
+        selected = _response_schemas()
+
+    payloads = [(schema, _sample(schema, max(1, args.fanout))) for schema in selected]
+    payloads.sort(key=lambda item: len(item[1].model_dump_json()), reverse=True)
+    if not args.schema:
+        payloads = payloads[: max(1, args.top)]
+
+    result = {
+        "iterations": args.iterations,
+        "fanout": args.fanout,
+        "schemas": [_bench_schema(schema, payload, max(1, args.iterations)) for schema, payload in payloads],
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
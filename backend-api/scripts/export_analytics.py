@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.bootstrap import init_database
+from app.export_store import EXPORT_FORMATS, EXPORT_TABLES, FORMAT_NDJSON, stream_export
+from app.time_utils import utc_now
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Stream analytics_events, credit_ledger_entries or render_jobs rows for a time range."
+    )
+    parser.add_argument("table", choices=sorted(EXPORT_TABLES))
+    parser.add_argument("--since", required=True, type=datetime.fromisoformat, help="Inclusive start (ISO 8601).")
+    parser.add_argument("--until", type=datetime.fromisoformat, help="Exclusive end (ISO 8601); defaults to now.")
+    parser.add_argument("--format", dest="export_format", choices=EXPORT_FORMATS, default=FORMAT_NDJSON)
+    parser.add_argument("--gzip", action="store_true", help="Gzip the output stream.")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows read per keyset page.")
+    parser.add_argument("--output", "-o", help="Write to this file instead of stdout.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    init_database()
+
+    chunks = stream_export(
+        args.table,
+        since=args.since,
+        until=args.until or utc_now(),
+        export_format=args.export_format,
+        compress=bool(args.gzip),
+        batch_size=max(1, int(args.batch_size)),
+    )
+    if args.output:
+        with open(args.output, "wb") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+        return
+    for chunk in chunks:
+        sys.stdout.buffer.write(chunk)
+    sys.stdout.buffer.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.analytics_rollup_store import refresh_hourly_rollups
+from app.bootstrap import init_database
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Rebuild hourly analytics rollups for every hour touched since the last refresh."
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    parse_args()
+    init_database()
+
+    result = refresh_hourly_rollups()
+    print(json.dumps(result.model_dump(mode="json"), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.credit_store import expire_credit_holds
+
+
+def main() -> None:
+    result = expire_credit_holds()
+    print(json.dumps(result.model_dump(mode="json"), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
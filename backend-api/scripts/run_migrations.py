@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.db import Base, engine
+from app.migrations import apply_migrations, get_migration_status
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations (tables, indexes, columns).")
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Only report current/pending migration versions; do not apply anything.",
+    )
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    Base.metadata.create_all(bind=engine)
+
+    applied: list[int] = []
+    if not args.status:
+        applied = apply_migrations(engine)
+
+    result = {"applied_versions": applied, **get_migration_status(engine)}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
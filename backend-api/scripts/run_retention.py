@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from app.bootstrap import init_database
+from app.retention_store import RETENTION_POLICIES, run_retention
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Purge rows past their retention window in small batches.")
+    parser.add_argument("--dry-run", action="store_true", help="Count purgeable rows without deleting.")
+    parser.add_argument(
+        "--table",
+        action="append",
+        choices=[policy.table for policy in RETENTION_POLICIES],
+        help="Limit the run to one table (repeatable).",
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows deleted per transaction.")
+    parser.add_argument("--pause-seconds", type=float, default=0.05, help="Sleep between chunks.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    init_database()
+
+    result = run_retention(
+        dry_run=bool(args.dry_run),
+        tables=args.table,
+        chunk_size=max(1, int(args.chunk_size)),
+        pause_seconds=max(0.0, float(args.pause_seconds)),
+    )
+    print(json.dumps(result.model_dump(mode="json"), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import unittest
+from unittest.mock import patch
+
+try:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import delete, func, select
+
+    from app.bootstrap import init_database
+    from app.db import session_scope
+    from app.main import app
+    from app.models import AnalyticsEventModel
+    from app.routes.analytics import _read_body_limited
+
+    _BATCH_ROUTE_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _BATCH_ROUTE_TESTS_AVAILABLE = False
+
+_EVENT_NAME = "batch_route_test_event"
+
+
+@unittest.skipUnless(_BATCH_ROUTE_TESTS_AVAILABLE, "fastapi dependency is not installed in this environment")
+class AnalyticsBatchRouteTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+        cls.client = TestClient(app)
+
+    def setUp(self) -> None:
+        with session_scope() as session:
+            session.execute(delete(AnalyticsEventModel).where(AnalyticsEventModel.event_name == _EVENT_NAME))
+
+    def _stored_count(self) -> int:
+        with session_scope() as session:
+            return int(
+                session.execute(
+                    select(func.count()).select_from(AnalyticsEventModel).where(
+                        AnalyticsEventModel.event_name == _EVENT_NAME
+                    )
+                ).scalar_one()
+            )
+
+    def test_json_array_reports_per_item_errors(self) -> None:
+        response = self.client.post(
+            "/v1/analytics/events:batch",
+            json=[
+                {"event_name": _EVENT_NAME, "platform": "ios"},
+                {"event_name": _EVENT_NAME, "latency_ms": -5},
+                {"platform": "android"},
+                {"event_name": _EVENT_NAME, "operation": "restyle", "latency_ms": 120},
+            ],
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual((payload["received"], payload["accepted"], payload["rejected"]), (4, 2, 2))
+        self.assertEqual([error["index"] for error in payload["errors"]], [1, 2])
+        self.assertTrue(payload["errors"][0]["errors"][0].startswith("latency_ms"))
+        self.assertEqual(self._stored_count(), 2)
+
+    def test_gzip_ndjson_body(self) -> None:
+        lines = [json.dumps({"event_name": _EVENT_NAME, "user_id": f"batch_user_{index}"}) for index in range(3)]
+        body = gzip.compress(("\n".join(lines) + "\n{not json}\n").encode("utf-8"))
+        response = self.client.post(
+            "/v1/analytics/events:batch",
+            content=body,
+            headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"},
+        )
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()
+        self.assertEqual((payload["accepted"], payload["rejected"]), (3, 1))
+        self.assertEqual(payload["errors"][0]["index"], 3)
+        self.assertEqual(self._stored_count(), 3)
+
+    def test_rejects_oversized_and_malformed_batches(self) -> None:
+        oversized = self.client.post(
+            "/v1/analytics/events:batch",
+            json=[{"event_name": _EVENT_NAME}] * 501,
+        )
+        self.assertEqual(oversized.status_code, 413)
+        self.assertEqual(oversized.json()["detail"], "batch_too_large")
+
+        malformed = self.client.post(
+            "/v1/analytics/events:batch",
+            content=b'{"event_name": "not-a-list"}',
+            headers={"Content-Type": "application/json"},
+        )
+        self.assertEqual(malformed.status_code, 400)
+        self.assertEqual(self._stored_count(), 0)
+
+    def test_body_and_decompressed_size_limits(self) -> None:
+        with patch.dict(os.environ, {"ANALYTICS_BATCH_MAX_BYTES": "2048"}):
+            raw = self.client.post(
+                "/v1/analytics/events:batch",
+                content=json.dumps([{"event_name": _EVENT_NAME, "user_id": "x" * 4096}]).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+            )
+            # A small gzip body that inflates far past the limit is cut off while decompressing.
+            bomb = self.client.post(
+                "/v1/analytics/events:batch",
+                content=gzip.compress(b"[" + b" " * (1024 * 1024) + b"]"),
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+            )
+        for response in (raw, bomb):
+            self.assertEqual(response.status_code, 413)
+            self.assertEqual(response.json()["detail"], "batch_body_too_large")
+        self.assertEqual(self._stored_count(), 0)
+
+    def test_body_read_stops_at_the_limit(self) -> None:
+        chunks_read: list[int] = []
+
+        class _StreamingRequest:
+            def __init__(self, headers: dict[str, str]) -> None:
+                self.headers = headers
+
+            async def stream(self):
+                for index in range(100):
+                    chunks_read.append(index)
+                    yield b"x" * 1024
+
+        with self.assertRaisesRegex(ValueError, "batch_body_too_large"):
+            asyncio.run(_read_body_limited(_StreamingRequest({"content-length": "102400"}), 2048))
+        self.assertEqual(chunks_read, [])
+
+        with self.assertRaisesRegex(ValueError, "batch_body_too_large"):
+            asyncio.run(_read_body_limited(_StreamingRequest({}), 2048))
+        self.assertEqual(len(chunks_read), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+try:
+    from sqlalchemy import delete, func, select
+
+    from app.analytics_buffer import OVERFLOW_DROP_NEWEST, OVERFLOW_SYNC, AnalyticsEventBuffer
+    from app.bootstrap import init_database
+    from app.db import session_scope
+    from app.models import AnalyticsEventModel
+    from app.schemas import AnalyticsEventRequest
+
+    _BUFFER_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _BUFFER_TESTS_AVAILABLE = False
+
+_EVENT_NAME = "buffer_test_event"
+
+
+@unittest.skipUnless(_BUFFER_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+class AnalyticsEventBufferTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def setUp(self) -> None:
+        with session_scope() as session:
+            session.execute(delete(AnalyticsEventModel).where(AnalyticsEventModel.event_name == _EVENT_NAME))
+
+    def _stored_count(self) -> int:
+        with session_scope() as session:
+            return int(
+                session.execute(
+                    select(func.count()).select_from(AnalyticsEventModel).where(
+                        AnalyticsEventModel.event_name == _EVENT_NAME
+                    )
+                ).scalar_one()
+            )
+
+    def test_flushes_full_batches_and_drains_on_stop(self) -> None:
+        buffer = AnalyticsEventBuffer(max_events=100, batch_size=5, flush_interval_ms=10_000)
+
+        async def scenario() -> int:
+            buffer.start()
+            for index in range(5):
+                buffer.enqueue(AnalyticsEventRequest(event_name=_EVENT_NAME, user_id=f"buffer_user_{index}"))
+            for _ in range(100):
+                if self._stored_count() >= 5:
+                    break
+                await asyncio.sleep(0.01)
+            flushed_before_stop = self._stored_count()
+            buffer.enqueue(AnalyticsEventRequest(event_name=_EVENT_NAME))
+            buffer.enqueue(AnalyticsEventRequest(event_name=_EVENT_NAME))
+            await buffer.stop()
+            return flushed_before_stop
+
+        self.assertEqual(asyncio.run(scenario()), 5)
+        self.assertEqual(self._stored_count(), 7)
+        stats = buffer.stats()
+        self.assertEqual(stats.enqueued, 7)
+        self.assertEqual(stats.flushed, 7)
+        self.assertEqual(stats.dropped, 0)
+        self.assertFalse(stats.running)
+
+    def test_overflow_policies(self) -> None:
+        dropping = AnalyticsEventBuffer(max_events=2, batch_size=50, flush_interval_ms=10_000)
+        blocking = AnalyticsEventBuffer(
+            max_events=2, batch_size=50, flush_interval_ms=10_000, overflow_policy=OVERFLOW_SYNC
+        )
+        self.assertEqual(dropping.overflow_policy, OVERFLOW_DROP_NEWEST)
+
+        async def scenario() -> None:
+            dropping.start()
+            blocking.start()
+            for _ in range(3):
+                dropping.enqueue(AnalyticsEventRequest(event_name=_EVENT_NAME))
+                blocking.enqueue(AnalyticsEventRequest(event_name=_EVENT_NAME))
+            # The overflow write is handed to a worker thread, not run inline on the loop.
+            self.assertEqual(blocking.stats().written_sync, 0)
+            await dropping.stop()
+            await blocking.stop()
+
+        asyncio.run(scenario())
+        self.assertEqual(dropping.stats().dropped, 1)
+        self.assertEqual(blocking.stats().written_sync, 1)
+        self.assertEqual(self._stored_count(), 5)
+
+    def test_enqueue_without_running_loop_writes_synchronously(self) -> None:
+        buffer = AnalyticsEventBuffer()
+        buffer.enqueue(AnalyticsEventRequest(event_name=_EVENT_NAME))
+        self.assertEqual(self._stored_count(), 1)
+        self.assertEqual(buffer.stats().written_sync, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from app.time_utils import utc_now
+
+try:
+    from sqlalchemy import delete, select
+
+    from app import analytics_funnel_store
+    from app.analytics_funnel_store import (
+        aggregate_funnel,
+        load_daily_funnel,
+        load_funnel_window,
+        refresh_daily_funnel,
+    )
+    from app.analytics_store import get_analytics_dashboard, ingest_events
+    from app.bootstrap import init_database
+    from app.db import session_scope
+    from app.models import (
+        AnalyticsDailyFunnelModel,
+        AnalyticsEventModel,
+        AnalyticsHourlyRollupModel,
+        AnalyticsRollupStateModel,
+        AuthSessionModel,
+        CreditLedgerEntryModel,
+        SubscriptionEntitlementModel,
+    )
+    from app.schemas import AnalyticsEventRequest
+
+    _FUNNEL_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _FUNNEL_TESTS_AVAILABLE = False
+
+
+@unittest.skipUnless(_FUNNEL_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+class AnalyticsDailyFunnelTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def setUp(self) -> None:
+        with session_scope() as session:
+            session.execute(delete(AuthSessionModel))
+            session.execute(delete(CreditLedgerEntryModel))
+            session.execute(delete(SubscriptionEntitlementModel))
+            session.execute(delete(AnalyticsEventModel))
+            session.execute(delete(AnalyticsHourlyRollupModel))
+            session.execute(delete(AnalyticsDailyFunnelModel))
+            session.execute(delete(AnalyticsRollupStateModel))
+        # Noon three days ago: a day never straddles the test run and sessions are still within retention.
+        self.day_start = (utc_now() - timedelta(days=3)).replace(hour=0, minute=0, second=0, microsecond=0)
+        self.noon = self.day_start + timedelta(hours=12)
+
+    def _login(self, user_id: str, platform: str | None, at: datetime) -> None:
+        with session_scope() as session:
+            session.add(
+                AuthSessionModel(
+                    token=f"funnel_{user_id}_{at.isoformat()}",
+                    user_id=user_id,
+                    platform=platform,
+                    created_at=at,
+                    expires_at=at + timedelta(days=1),
+                )
+            )
+
+    def _spend(self, user_id: str, reason: str, at: datetime, plan_id: str | None = None) -> None:
+        with session_scope() as session:
+            session.add(
+                CreditLedgerEntryModel(
+                    user_id=user_id,
+                    delta=-1,
+                    reason=reason,
+                    metadata_json={"plan_id": plan_id} if plan_id else {},
+                    created_at=at,
+                )
+            )
+
+    def _stored_rows(self) -> dict[tuple, AnalyticsDailyFunnelModel]:
+        with session_scope() as session:
+            rows = session.execute(select(AnalyticsDailyFunnelModel)).scalars().all()
+            return {(row.day, row.platform, row.plan_id): row for row in rows}
+
+    def test_refresh_materializes_stages_by_platform_and_plan(self) -> None:
+        self._login("u1", "ios", self.noon)
+        self._login("u2", "android", self.noon)
+        self._spend("u1", "render_preview", self.noon, plan_id="free")
+        self._spend("u1", "render_final", self.noon + timedelta(minutes=5))
+        self._spend("u2", "render_preview", self.noon)
+        ingest_events([AnalyticsEventRequest(event_name="checkout_started", user_id="u1", occurred_at=self.noon)])
+        with session_scope() as session:
+            session.add(
+                SubscriptionEntitlementModel(
+                    user_id="u1",
+                    plan_id="pro",
+                    status="active",
+                    source="ios",
+                    updated_at=self.noon + timedelta(hours=1),
+                )
+            )
+
+        result = refresh_daily_funnel()
+        self.assertEqual(result.days_rebuilt, 1)
+
+        day = self.day_start.date()
+        rows = self._stored_rows()
+        # u1 is on pro now, so stages without their own plan are attributed to it.
+        self.assertEqual(set(rows), {(day, "ios", "free"), (day, "ios", "pro"), (day, "android", "free")})
+        pro = rows[(day, "ios", "pro")]
+        self.assertEqual(
+            (pro.login_users, pro.preview_users, pro.final_users, pro.checkout_starts, pro.paid_activations),
+            (1, 0, 1, 1, 1),
+        )
+        self.assertEqual(rows[(day, "ios", "free")].preview_users, 1)
+        self.assertEqual(rows[(day, "android", "free")].login_users, 1)
+
+        self._login("u3", None, self.noon)
+        second = refresh_daily_funnel()
+        self.assertEqual(second.days_rebuilt, 1)
+        self.assertEqual(self._stored_rows()[(day, "unknown", "free")].login_users, 1)
+
+    def test_windows_count_users_once_across_days(self) -> None:
+        for offset in range(3):
+            self._login("u1", "web", self.noon + timedelta(days=offset))
+        self._login("u2", "web", self.noon + timedelta(days=1))
+        refresh_daily_funnel()
+
+        stored = self._stored_rows()
+        self.assertEqual([row.login_users for _, row in sorted(stored.items())], [1, 2, 1])
+        (merged,) = load_daily_funnel(self.day_start.date())
+        self.assertEqual(merged.count("login"), 2)
+
+        since = self.noon - timedelta(hours=1)
+        until = self.noon + timedelta(days=2, hours=1)
+        live = {segment.key: segment.count("login") for segment in aggregate_funnel(since, until)}
+        windowed = {segment.key: segment.count("login") for segment in load_funnel_window(since, until)}
+        self.assertEqual(windowed, live)
+        self.assertEqual(windowed, {("web", "free"): 2})
+
+    def test_late_rows_past_source_retention_merge_into_stored_day(self) -> None:
+        noon = self.noon - timedelta(days=10)
+        self._login("u1", "web", noon)
+        ingest_events(
+            [AnalyticsEventRequest(event_name="checkout_started", user_id="u1", platform="web", occurred_at=noon)]
+        )
+        refresh_daily_funnel()
+        with session_scope() as session:
+            # Retention purged the day's sessions; the funnel row is all that is left of them.
+            session.execute(delete(AuthSessionModel))
+
+        ingest_events(
+            [AnalyticsEventRequest(event_name="checkout_started", user_id="u2", platform="web", occurred_at=noon)]
+        )
+        refresh_daily_funnel()
+        # The watermark overlap rescans the late event; it must not be merged twice.
+        refresh_daily_funnel()
+
+        row = self._stored_rows()[(noon.date(), "web", "free")]
+        self.assertEqual((row.login_users, row.checkout_starts), (1, 2))
+
+    def test_late_rows_are_not_merged_when_another_refresh_moved_the_watermark(self) -> None:
+        noon = self.noon - timedelta(days=10)
+        self._login("u1", "web", noon)
+        ingest_events(
+            [AnalyticsEventRequest(event_name="checkout_started", user_id="u1", platform="web", occurred_at=noon)]
+        )
+        refresh_daily_funnel()
+        with session_scope() as session:
+            session.execute(delete(AuthSessionModel))
+        ingest_events(
+            [AnalyticsEventRequest(event_name="checkout_started", user_id="u2", platform="web", occurred_at=noon)]
+        )
+
+        real_cutoff = analytics_funnel_store._source_retention_cutoff
+
+        def cutoff_after_concurrent_merge(now):
+            # Another process read the same watermark, merged the late rows and moved the watermark on.
+            with session_scope() as session:
+                state = session.get(AnalyticsRollupStateModel, "analytics_daily_funnel")
+                state.watermark = now
+            return real_cutoff(now)
+
+        with mock.patch.object(
+            analytics_funnel_store, "_source_retention_cutoff", side_effect=cutoff_after_concurrent_merge
+        ):
+            refresh_daily_funnel()
+
+        row = self._stored_rows()[(noon.date(), "web", "free")]
+        self.assertEqual((row.login_users, row.checkout_starts), (1, 1))
+
+    def test_dashboard_reads_funnel_and_alerts_on_low_checkout_conversion(self) -> None:
+        now = utc_now()
+        self._login("u1", "web", now - timedelta(hours=2))
+        ingest_events(
+            [
+                AnalyticsEventRequest(
+                    event_name="checkout_started",
+                    user_id=f"buyer_{index}",
+                    platform="web",
+                    occurred_at=now - timedelta(minutes=10),
+                )
+                for index in range(20)
+            ]
+        )
+
+        refresh_daily_funnel()
+        dashboard = get_analytics_dashboard(hours=24, max_staleness_seconds=0)
+        self.assertEqual((dashboard.funnel.login_users, dashboard.funnel.checkout_starts), (1, 20))
+        segments = {(item.platform, item.plan_id): item for item in dashboard.funnel_segments}
+        self.assertEqual(segments[("web", "free")].checkout_starts, 20)
+        self.assertIn("checkout_conversion_low", {alert.code for alert in dashboard.alerts})
+
+
+if __name__ == "__main__":
+    unittest.main()
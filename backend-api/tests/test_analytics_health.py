@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import os
 import unittest
 from datetime import datetime, timedelta
+from unittest import mock
 from app.time_utils import utc_now
 
 try:
     from sqlalchemy import delete
 
+    from app.analytics_funnel_store import refresh_daily_funnel
+    from app.analytics_rollup_store import refresh_hourly_rollups
     from app.analytics_store import get_analytics_dashboard, get_analytics_overview, ingest_event
     from app.bootstrap import init_database
     from app.db import session_scope
     from app.models import (
+        AnalyticsDailyFunnelModel,
         AnalyticsEventModel,
+        AnalyticsHourlyRollupModel,
+        AnalyticsRollupStateModel,
         AuthSessionModel,
         CreditLedgerEntryModel,
         ExperimentAssignmentModel,
@@ -19,7 +26,7 @@ try:
         RenderJobModel,
         SubscriptionEntitlementModel,
     )
-    from app.provider_health_store import get_provider_health
+    from app.provider_health_store import ProviderHealthWindow, get_provider_health, warm_provider_health
     from app.schemas import AnalyticsEventRequest, JobStatus, OperationType
 
     _ANALYTICS_TESTS_AVAILABLE = True
@@ -42,6 +49,11 @@ class AnalyticsAndHealthStoreTests(unittest.TestCase):
             session.execute(delete(RenderJobModel))
             session.execute(delete(AuthSessionModel))
             session.execute(delete(AnalyticsEventModel))
+            session.execute(delete(AnalyticsHourlyRollupModel))
+            session.execute(delete(AnalyticsDailyFunnelModel))
+            session.execute(delete(AnalyticsRollupStateModel))
+        # The rolling provider windows live in memory; rebuild them from the emptied table.
+        warm_provider_health()
 
     def test_analytics_overview_aggregates_render_metrics(self) -> None:
         ingest_event(
@@ -75,6 +87,7 @@ class AnalyticsAndHealthStoreTests(unittest.TestCase):
             )
         )
 
+        refresh_hourly_rollups()
         overview = get_analytics_overview()
         self.assertEqual(overview.total_events, 3)
         self.assertEqual(overview.render_events, 3)
@@ -131,6 +144,38 @@ class AnalyticsAndHealthStoreTests(unittest.TestCase):
         self.assertAlmostEqual(float(health["openai"]["avg_latency_ms"]), 2500.0, places=2)
         self.assertAlmostEqual(float(health["openai"]["health_score"]), 100.0, places=2)
 
+    def test_provider_health_updates_incrementally_after_warm_start(self) -> None:
+        def render(status: JobStatus, latency_ms: int) -> AnalyticsEventRequest:
+            return AnalyticsEventRequest(
+                event_name="render_status_updated",
+                provider="fal",
+                operation=OperationType.restyle,
+                status=status,
+                latency_ms=latency_ms,
+            )
+
+        # Written before the first read: counted once, by the warm start.
+        ingest_event(render(JobStatus.completed, 1000))
+        self.assertEqual(get_provider_health(hours=1)["fal"]["total_events"], 1)
+
+        ingest_event(render(JobStatus.failed, 3000))
+        health = get_provider_health(hours=1)
+        self.assertEqual((health["fal"]["total_events"], health["fal"]["failed_events"]), (2, 1))
+        self.assertAlmostEqual(float(health["fal"]["avg_latency_ms"]), 2000.0, places=2)
+
+    def test_provider_health_window_excludes_older_minutes(self) -> None:
+        window = ProviderHealthWindow(max_hours=3)
+        window.reload()
+        now = utc_now()
+        window.record("fal", "completed", 900, at=now)
+        window.record("fal", "failed", 4000, at=now - timedelta(minutes=90))
+        window.record("fal", "failed", 4000, at=now - timedelta(hours=5))
+
+        self.assertEqual(window.snapshot(hours=1)["fal"].total, 1)
+        two_hours = window.snapshot(hours=2)["fal"]
+        self.assertEqual((two_hours.total, two_hours.failed), (2, 1))
+        self.assertEqual(window.snapshot(hours=24)["fal"].total, 2)
+
     def test_analytics_dashboard_includes_health_and_business_metrics(self) -> None:
         now = utc_now()
         ingest_event(
@@ -247,7 +292,8 @@ class AnalyticsAndHealthStoreTests(unittest.TestCase):
                 )
             )
 
-        dashboard = get_analytics_dashboard(hours=24)
+        refresh_daily_funnel()
+        dashboard = get_analytics_dashboard(hours=24, max_staleness_seconds=0)
         self.assertEqual(dashboard.summary.window_hours, 24)
         self.assertEqual(dashboard.summary.total_events, 3)
         self.assertEqual(dashboard.summary.render_events, 2)
@@ -273,6 +319,11 @@ class AnalyticsAndHealthStoreTests(unittest.TestCase):
         self.assertEqual(dashboard.funnel.paid_activations, 1)
         self.assertAlmostEqual(dashboard.funnel.checkout_to_paid_rate, 100.0, places=2)
 
+        self.assertEqual(dashboard.credits.consumed_total, 3)
+        self.assertEqual(dashboard.credits.unique_consumers, 1)
+        reasons = {item.reason: item for item in dashboard.credits.top_reasons}
+        self.assertEqual((reasons["render_final"].events, reasons["render_final"].net_delta), (1, -2))
+
         source_rows = {item.source: item for item in dashboard.subscription_sources}
         self.assertIn("web", source_rows)
         self.assertEqual(source_rows["web"].active_subscriptions, 1)
@@ -285,6 +336,46 @@ class AnalyticsAndHealthStoreTests(unittest.TestCase):
         self.assertEqual(experiment.active_paid_users, 1)
         self.assertAlmostEqual(experiment.paid_conversion_rate, 50.0, places=2)
 
+    def test_analytics_dashboard_from_raw_events_aggregates_in_database(self) -> None:
+        for provider, status, latency_ms in (
+            ("fal", JobStatus.completed, 800),
+            ("fal", JobStatus.completed, 1000),
+            ("fal", JobStatus.failed, 4000),
+            ("openai", JobStatus.completed, 2000),
+        ):
+            ingest_event(
+                AnalyticsEventRequest(
+                    event_name="render_status_updated",
+                    user_id=f"sql_{provider}",
+                    platform="ios",
+                    provider=provider,
+                    operation=OperationType.restyle,
+                    status=status,
+                    latency_ms=latency_ms,
+                    cost_usd=0.01,
+                )
+            )
+        ingest_event(AnalyticsEventRequest(event_name="session_started", user_id="sql_fal", platform="android"))
+
+        with mock.patch.dict(os.environ, {"ANALYTICS_DASHBOARD_SOURCE": "events"}):
+            dashboard = get_analytics_dashboard(hours=24)
+            overview = get_analytics_overview()
+
+        self.assertEqual(dashboard.summary.total_events, 5)
+        self.assertEqual(dashboard.summary.render_events, 4)
+        self.assertAlmostEqual(dashboard.summary.p95_latency_ms or 0.0, 4000.0, places=2)
+        self.assertAlmostEqual(dashboard.summary.avg_latency_ms or 0.0, 1950.0, places=2)
+
+        providers = {item.provider: item for item in dashboard.provider_breakdown}
+        self.assertEqual(providers["fal"].total_events, 3)
+        self.assertAlmostEqual(providers["fal"].success_rate, 66.67, places=2)
+        self.assertAlmostEqual(providers["fal"].avg_latency_ms or 0.0, 1933.33, places=2)
+        self.assertAlmostEqual(providers["openai"].p95_latency_ms or 0.0, 2000.0, places=2)
+
+        platforms = {item.platform: item for item in dashboard.platform_breakdown}
+        self.assertEqual((platforms["ios"].render_events, platforms["android"].total_events), (4, 1))
+        self.assertEqual(overview.provider_event_counts, {"fal": 3, "openai": 1})
+
 
 if __name__ == "__main__":
     unittest.main()
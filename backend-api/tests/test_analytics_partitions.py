@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+try:
+    from sqlalchemy import delete, func, select
+
+    from app.analytics_partitions import (
+        analytics_events_source,
+        drop_expired_analytics_partitions,
+        list_event_partitions,
+        partition_name,
+        period_start,
+    )
+    from app.analytics_store import get_analytics_dashboard, ingest_events
+    from app.bootstrap import init_database
+    from app.db import engine, session_scope
+    from app.models import (
+        AnalyticsEventModel,
+        AnalyticsHourlyRollupModel,
+        AnalyticsRollupStateModel,
+        AnalyticsShardStateModel,
+    )
+    from app.retention_store import run_retention
+    from app.schemas import AnalyticsEventRequest, JobStatus
+    from app.time_utils import utc_now
+
+    _PARTITION_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _PARTITION_TESTS_AVAILABLE = False
+
+_SHARDED_ENV = {"ANALYTICS_SQLITE_SHARDS_ENABLED": "true", "ANALYTICS_PARTITION_PERIOD": "day"}
+
+
+@unittest.skipUnless(_PARTITION_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+@unittest.skipUnless(
+    _PARTITION_TESTS_AVAILABLE and engine.dialect.name == "sqlite", "shard tables are the SQLite partitioning scheme"
+)
+class AnalyticsShardTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def setUp(self) -> None:
+        env = mock.patch.dict(os.environ, _SHARDED_ENV)
+        env.start()
+        self.addCleanup(env.stop)
+        self._reset()
+        self.addCleanup(self._reset)
+
+    def _reset(self) -> None:
+        drop_expired_analytics_partitions(datetime.max)
+        with session_scope() as session:
+            session.execute(delete(AnalyticsShardStateModel))
+            session.execute(delete(AnalyticsEventModel))
+            session.execute(delete(AnalyticsHourlyRollupModel))
+            session.execute(delete(AnalyticsRollupStateModel))
+
+    def _event(self, days_ago: float, user_id: str = "shard_user") -> AnalyticsEventRequest:
+        return AnalyticsEventRequest(
+            event_name="render_dispatched",
+            user_id=user_id,
+            provider="fal",
+            status=JobStatus.completed,
+            latency_ms=1000,
+            occurred_at=utc_now() - timedelta(days=days_ago),
+        )
+
+    def _shard_names(self) -> list[str]:
+        with engine.connect() as connection:
+            return [item.name for item in list_event_partitions(connection)]
+
+    def test_ingest_routes_rows_to_period_shards_with_shared_ids(self) -> None:
+        with session_scope() as session:
+            session.add(AnalyticsEventModel(event_name="render_dispatched", occurred_at=utc_now() - timedelta(days=9)))
+        ingest_events([self._event(0), self._event(1), self._event(3), self._event(0, user_id="other")])
+
+        now = utc_now()
+        expected = sorted(partition_name(period_start(now - timedelta(days=days))) for days in (0, 1, 3))
+        self.assertEqual(sorted(self._shard_names()), expected)
+
+        events = analytics_events_source()
+        with session_scope() as session:
+            ids = session.execute(select(events.id)).scalars().all()
+            base_rows = session.execute(select(func.count()).select_from(AnalyticsEventModel)).scalar_one()
+        self.assertEqual(len(ids), 5)
+        self.assertEqual(len(set(ids)), 5)
+        self.assertEqual(base_rows, 1)
+
+    def test_window_reads_only_overlapping_shards(self) -> None:
+        ingest_events([self._event(0), self._event(1), self._event(3), self._event(6)])
+        recent = analytics_events_source(since=utc_now() - timedelta(hours=30))
+        with session_scope() as session:
+            sql = str(select(recent.id).compile(bind=session.get_bind()))
+        shards = self._shard_names()
+        self.assertEqual(sum(name in sql for name in shards), 2)
+
+        with mock.patch.dict(os.environ, {"ANALYTICS_DASHBOARD_SOURCE": "events"}):
+            self.assertEqual(get_analytics_dashboard(hours=30).summary.render_events, 2)
+            self.assertEqual(get_analytics_dashboard(hours=24 * 5).summary.render_events, 3)
+        self.assertEqual(get_analytics_dashboard(hours=24 * 5, max_staleness_seconds=0).summary.render_events, 3)
+
+    def test_retention_drops_whole_expired_shards(self) -> None:
+        ingest_events([self._event(0), self._event(5), self._event(5, user_id="other"), self._event(8)])
+        with mock.patch.dict(os.environ, {"RETENTION_ANALYTICS_EVENTS_DAYS": "3"}):
+            preview = run_retention(dry_run=True, tables=["analytics_events"])
+            result = run_retention(tables=["analytics_events"])
+
+        self.assertEqual((preview.tables[0].partitions_dropped, preview.tables[0].rows_purged), (2, 3))
+        self.assertEqual((result.tables[0].partitions_dropped, result.tables[0].rows_purged), (2, 3))
+        self.assertEqual(self._shard_names(), [partition_name(period_start(utc_now()))])
+
+
+if __name__ == "__main__":
+    unittest.main()
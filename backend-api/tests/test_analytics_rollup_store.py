@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import os
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+try:
+    from sqlalchemy import delete, select
+
+    from app import analytics_rollup_store
+    from app.analytics_rollup_store import floor_hour, load_hourly_rollups, refresh_hourly_rollups
+    from app.analytics_store import get_analytics_dashboard, ingest_events
+    from app.bootstrap import init_database
+    from app.db import session_scope
+    from app.models import AnalyticsEventModel, AnalyticsHourlyRollupModel, AnalyticsRollupStateModel
+    from app.schemas import AnalyticsEventRequest, JobStatus, OperationType
+    from app.time_utils import utc_now
+
+    _ROLLUP_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _ROLLUP_TESTS_AVAILABLE = False
+
+
+@unittest.skipUnless(_ROLLUP_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+class AnalyticsRollupStoreTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def setUp(self) -> None:
+        with session_scope() as session:
+            session.execute(delete(AnalyticsEventModel))
+            session.execute(delete(AnalyticsHourlyRollupModel))
+            session.execute(delete(AnalyticsRollupStateModel))
+
+    def _render_event(self, provider: str, status: JobStatus, latency_ms: int, hours_ago: int = 0):
+        return AnalyticsEventRequest(
+            event_name="render_dispatched",
+            user_id=f"rollup_{provider}",
+            platform="ios",
+            provider=provider,
+            operation=OperationType.restyle,
+            status=status,
+            latency_ms=latency_ms,
+            cost_usd=0.01,
+            occurred_at=utc_now() - timedelta(hours=hours_ago),
+        )
+
+    def test_refresh_rolls_up_by_hour_and_dimension(self) -> None:
+        ingest_events(
+            [
+                self._render_event("fal", JobStatus.completed, 800),
+                self._render_event("fal", JobStatus.completed, 1200),
+                self._render_event("fal", JobStatus.failed, 3000),
+                self._render_event("fal", JobStatus.completed, 900, hours_ago=3),
+            ]
+        )
+        result = refresh_hourly_rollups()
+        self.assertEqual(result.hours_rebuilt, 2)
+        self.assertEqual(result.rows_written, 3)
+
+        with session_scope() as session:
+            rows = session.execute(select(AnalyticsHourlyRollupModel)).scalars().all()
+        current_hour = floor_hour(utc_now())
+        completed = next(row for row in rows if row.bucket_start == current_hour and row.status == "completed")
+        self.assertEqual(completed.event_count, 2)
+        self.assertEqual(completed.latency_ms_sum, 2000)
+        self.assertAlmostEqual(completed.cost_usd_sum, 0.02, places=6)
+
+        merged = load_hourly_rollups(since=utc_now() - timedelta(hours=6))
+        self.assertEqual(sum(group.event_count for group in merged), 4)
+
+    def test_refresh_only_rebuilds_hours_with_new_events(self) -> None:
+        ingest_events([self._render_event("fal", JobStatus.completed, 800, hours_ago=5)])
+        refresh_hourly_rollups()
+
+        # A late event for an already rolled-up hour re-dirties only that hour.
+        ingest_events(
+            [
+                self._render_event("openai", JobStatus.completed, 700, hours_ago=5),
+                self._render_event("openai", JobStatus.completed, 650, hours_ago=5),
+            ]
+        )
+        result = refresh_hourly_rollups()
+        self.assertEqual(result.hours_rebuilt, 1)
+
+        merged = {group.provider: group for group in load_hourly_rollups()}
+        self.assertEqual(merged["fal"].event_count, 1)
+        self.assertEqual(merged["openai"].event_count, 2)
+
+    def test_late_event_past_raw_retention_merges_into_stored_hour(self) -> None:
+        hours_ago = 24 * 100
+        ingest_events([self._render_event("fal", JobStatus.completed, 800, hours_ago=hours_ago)] * 2)
+        refresh_hourly_rollups()
+        with session_scope() as session:
+            # Retention purged the raw events; the rollup row is all that is left of that hour.
+            session.execute(delete(AnalyticsEventModel))
+
+        ingest_events([self._render_event("fal", JobStatus.completed, 900, hours_ago=hours_ago)])
+        refresh_hourly_rollups()
+        # The watermark overlap rescans the late event; it must not be merged twice.
+        refresh_hourly_rollups()
+
+        (group,) = load_hourly_rollups()
+        self.assertEqual(group.event_count, 3)
+        self.assertEqual(group.latency_ms_sum, 2500)
+
+    def test_late_event_is_not_merged_when_another_refresh_moved_the_watermark(self) -> None:
+        hours_ago = 24 * 100
+        ingest_events([self._render_event("fal", JobStatus.completed, 800, hours_ago=hours_ago)] * 2)
+        refresh_hourly_rollups()
+        with session_scope() as session:
+            session.execute(delete(AnalyticsEventModel))
+        ingest_events([self._render_event("fal", JobStatus.completed, 900, hours_ago=hours_ago)])
+
+        real_cutoff = analytics_rollup_store.retention_cutoff
+
+        def cutoff_after_concurrent_merge(table, now):
+            # Another process read the same watermark, merged the late event and moved the watermark on.
+            with session_scope() as session:
+                state = session.get(AnalyticsRollupStateModel, "analytics_hourly")
+                state.watermark = now
+            return real_cutoff(table, now)
+
+        with mock.patch.object(analytics_rollup_store, "retention_cutoff", side_effect=cutoff_after_concurrent_merge):
+            refresh_hourly_rollups()
+
+        (group,) = load_hourly_rollups()
+        self.assertEqual(group.event_count, 2)
+
+    def test_dashboard_matches_raw_event_source(self) -> None:
+        ingest_events(
+            [
+                self._render_event("fal", JobStatus.completed, 800),
+                self._render_event("openai", JobStatus.failed, 2400),
+                self._render_event("fal", JobStatus.completed, 1000, hours_ago=2),
+            ]
+        )
+        from_rollups = get_analytics_dashboard(hours=6, max_staleness_seconds=0)
+        with mock.patch.dict(os.environ, {"ANALYTICS_DASHBOARD_SOURCE": "events"}):
+            from_events = get_analytics_dashboard(hours=6)
+
+        self.assertEqual(from_rollups.summary.model_dump(), from_events.summary.model_dump())
+        self.assertEqual(
+            [item.model_dump() for item in from_rollups.provider_breakdown],
+            [item.model_dump() for item in from_events.provider_breakdown],
+        )
+
+    def test_dashboard_distinct_users_from_rollup_sketches(self) -> None:
+        ingest_events(
+            [
+                self._render_event("fal", JobStatus.completed, 800, hours_ago=1),
+                self._render_event("fal", JobStatus.completed, 900, hours_ago=4),
+                self._render_event("openai", JobStatus.completed, 700, hours_ago=4),
+                AnalyticsEventRequest(event_name="session_started", user_id="rollup_viewer", platform="android"),
+                AnalyticsEventRequest(event_name="session_started", user_id="rollup_fal", platform="ios"),
+            ]
+        )
+        with mock.patch.dict(os.environ, {"ANALYTICS_DISTINCT_EXACT_MAX_HOURS": "0"}):
+            from_sketches = get_analytics_dashboard(hours=6, max_staleness_seconds=0)
+        with mock.patch.dict(os.environ, {"ANALYTICS_DASHBOARD_SOURCE": "events"}):
+            from_events = get_analytics_dashboard(hours=6)
+
+        self.assertEqual(from_sketches.summary.unique_users, 3)
+        self.assertEqual(from_sketches.summary.active_render_users, 2)
+        platforms = {item.platform: item.unique_users for item in from_sketches.platform_breakdown}
+        self.assertEqual(platforms, {"ios": 2, "android": 1})
+        self.assertEqual(platforms, {item.platform: item.unique_users for item in from_events.platform_breakdown})
+
+
+if __name__ == "__main__":
+    unittest.main()
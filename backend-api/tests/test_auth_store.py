@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import unittest
+from datetime import timedelta
+from unittest.mock import patch
+
+try:
+    from sqlalchemy import update
+
+    from app import auth_store, cache_bus
+    from app.auth_store import (
+        _token_cache_key,
+        create_dev_session,
+        resolve_authenticated_user,
+        revoke_session,
+    )
+    from app.bootstrap import init_database
+    from app.db import session_scope
+    from app.models import AuthSessionModel
+    from app.schemas import DevLoginRequest
+    from app.time_utils import utc_now
+
+    _AUTH_STORE_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _AUTH_STORE_TESTS_AVAILABLE = False
+
+
+@unittest.skipUnless(_AUTH_STORE_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+class AuthTokenCacheTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def _login(self, user_id: str) -> str:
+        return create_dev_session(DevLoginRequest(user_id=user_id, platform="tests", ttl_hours=1)).access_token
+
+    def test_revoke_evicts_cached_token_immediately(self) -> None:
+        token = self._login("auth_cache_user")
+        self.assertEqual(resolve_authenticated_user(token), "auth_cache_user")
+
+        self.assertTrue(revoke_session(token).revoked)
+        self.assertIsNone(resolve_authenticated_user(token))
+
+    def test_peer_revocation_and_negative_entries(self) -> None:
+        token = self._login("auth_cache_peer_user")
+        self.assertEqual(resolve_authenticated_user(token), "auth_cache_peer_user")
+
+        # Another worker revokes: the row changes and only a bus event reaches this process.
+        with session_scope() as session:
+            session.execute(
+                update(AuthSessionModel).where(AuthSessionModel.token == token).values(revoked_at=utc_now())
+            )
+        self.assertEqual(resolve_authenticated_user(token), "auth_cache_peer_user")
+        cache_bus._dispatch(cache_bus.TOPIC_AUTH_SESSIONS, _token_cache_key(token))
+        self.assertIsNone(resolve_authenticated_user(token))
+
+        unknown = "dev_unknown_token_for_negative_cache"
+        self.assertIsNone(resolve_authenticated_user(unknown))
+        with session_scope() as session:
+            session.add(
+                AuthSessionModel(
+                    token=unknown,
+                    user_id="auth_cache_guess",
+                    platform="tests",
+                    created_at=utc_now(),
+                    expires_at=utc_now() + timedelta(hours=1),
+                )
+            )
+        self.assertIsNone(resolve_authenticated_user(unknown))
+        cache_bus._dispatch(cache_bus.TOPIC_AUTH_SESSIONS, None)
+        self.assertEqual(resolve_authenticated_user(unknown), "auth_cache_guess")
+
+        with session_scope() as session:
+            session.delete(session.get(AuthSessionModel, unknown))
+
+
+@unittest.skipUnless(_AUTH_STORE_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+class SignedTokenTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def _signed_env(self, keys: str):
+        return patch.dict(os.environ, {"AUTH_TOKEN_FORMAT": "signed", "AUTH_SIGNING_KEYS": keys}, clear=False)
+
+    def test_signed_token_verifies_in_memory_and_survives_rotation(self) -> None:
+        with self._signed_env("k1:first-secret"):
+            token = create_dev_session(
+                DevLoginRequest(user_id="signed_user", platform="ios", ttl_hours=1)
+            ).access_token
+        self.assertTrue(token.startswith("hs1."))
+
+        with self._signed_env("k2:second-secret,k1:first-secret"), patch.object(
+            auth_store, "session_scope", side_effect=AssertionError("signed reads must not hit the DB")
+        ), patch.object(auth_store, "_revocations_loaded_at", float("inf")):
+            self.assertEqual(resolve_authenticated_user(token), "signed_user")
+            self.assertIsNone(resolve_authenticated_user(token[:-2] + "xx"))
+
+        with self._signed_env("k2:second-secret"):
+            self.assertIsNone(resolve_authenticated_user(token))
+
+    def test_revoked_signed_token_is_rejected_everywhere(self) -> None:
+        with self._signed_env("k1:first-secret"):
+            token = create_dev_session(DevLoginRequest(user_id="signed_revoked", ttl_hours=1)).access_token
+            self.assertEqual(resolve_authenticated_user(token), "signed_revoked")
+            self.assertTrue(revoke_session(token).revoked)
+            self.assertIsNone(resolve_authenticated_user(token))
+
+            # A fresh worker learns about the revocation from auth_sessions on its first refresh.
+            with patch.object(auth_store, "_revoked_session_ids", {}), patch.object(
+                auth_store, "_revocations_loaded_at", None
+            ):
+                self.assertIsNone(resolve_authenticated_user(token))
+
+
+if __name__ == "__main__":
+    unittest.main()
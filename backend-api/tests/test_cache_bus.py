@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+import unittest
+from unittest.mock import patch
+
+try:
+    from sqlalchemy import delete, insert, select
+
+    from app import cache_bus
+    from app.bootstrap import init_database
+    from app.cache_bus import (
+        publish_invalidation,
+        start_invalidation_listener,
+        stop_invalidation_listener,
+        subscribe,
+    )
+    from app.db import engine, session_scope
+    from app.models import CacheInvalidationEventModel
+
+    _CACHE_BUS_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _CACHE_BUS_TESTS_AVAILABLE = False
+
+
+@unittest.skipUnless(_CACHE_BUS_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+@unittest.skipIf(_CACHE_BUS_TESTS_AVAILABLE and engine.dialect.name == "postgresql", "polling backend only")
+class CacheBusPollingTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def setUp(self) -> None:
+        with session_scope() as session:
+            session.execute(delete(CacheInvalidationEventModel))
+        self.received: list[str | None] = []
+        self.received_event = threading.Event()
+
+    def tearDown(self) -> None:
+        stop_invalidation_listener()
+
+    def _handler(self, key: str | None) -> None:
+        self.received.append(key)
+        self.received_event.set()
+
+    def test_publish_applies_locally_and_records_event(self) -> None:
+        subscribe("tests_local", self._handler)
+        publish_invalidation("tests_local", "k1")
+
+        self.assertEqual(self.received, ["k1"])
+        with session_scope() as session:
+            row = session.execute(select(CacheInvalidationEventModel)).scalar_one()
+            self.assertEqual((row.topic, row.key), ("tests_local", "k1"))
+
+    def test_listener_dispatches_events_from_other_workers_only(self) -> None:
+        subscribe("tests_remote", self._handler)
+        with patch.object(cache_bus, "_POLL_INTERVAL_SECONDS", 0.02):
+            self.assertTrue(start_invalidation_listener())
+            # Let the listener record its starting position before events arrive.
+            threading.Event().wait(0.1)
+            with session_scope() as session:
+                session.execute(
+                    insert(CacheInvalidationEventModel).values(
+                        [
+                            {"topic": "tests_remote", "key": "own", "origin": cache_bus._ORIGIN},
+                            {"topic": "tests_remote", "key": "peer", "origin": "other-host:1:abc"},
+                        ]
+                    )
+                )
+            self.assertTrue(self.received_event.wait(2.0))
+
+        self.assertEqual(self.received, ["peer"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -30,6 +30,22 @@ class ConfigRouteTests(unittest.TestCase):
         self.assertIn("fallback_chain", provider_defaults)
         self.assertIn("version", provider_defaults)
 
+    def test_bootstrap_config_is_etagged_and_revalidates_with_304(self) -> None:
+        first = self.client.get("/v1/config/bootstrap")
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers.get("etag")
+        self.assertTrue(etag and etag.startswith('"'))
+        self.assertIn("max-age", first.headers.get("cache-control", ""))
+
+        second = self.client.get("/v1/config/bootstrap", headers={"If-None-Match": etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.headers.get("etag"), etag)
+        self.assertEqual(second.content, b"")
+
+        stale = self.client.get("/v1/config/bootstrap", headers={"If-None-Match": '"stale"'})
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(stale.json(), first.json())
+
     def test_provider_route_preview_returns_selected_provider_and_model(self) -> None:
         response = self.client.get(
             "/v1/config/provider-route-preview?operation=restyle&tier=preview&target_part=full_room"
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import unittest
+from datetime import datetime, timedelta
+
+try:
+    from sqlalchemy import delete, func, select
+
+    from app.bootstrap import init_database
+    from app.credit_reset_store import (
+        apply_lazy_refill,
+        get_credit_reset_schedule,
+        run_daily_credit_reset,
+        tick_daily_credit_reset,
+        update_credit_reset_schedule,
+    )
+    from app.credit_store import (
+        capture_credit_hold,
+        consume_credits,
+        get_balance,
+        grant_credits,
+        hold_credits,
+        release_credit_hold,
+    )
+    from app.db import session_scope
+    from app.models import (
+        CreditBalanceModel,
+        CreditHoldModel,
+        CreditLedgerEntryModel,
+        CreditResetScheduleModel,
+        SubscriptionEntitlementModel,
+    )
+    from app.schemas import (
+        CreditConsumeRequest,
+        CreditGrantRequest,
+        CreditHoldRequest,
+        CreditRefillMode,
+        CreditResetScheduleUpdateRequest,
+    )
+    from app.time_utils import utc_now
+
+    _CREDIT_RESET_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _CREDIT_RESET_TESTS_AVAILABLE = False
+
+
+@unittest.skipUnless(_CREDIT_RESET_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+class CreditResetStoreTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def setUp(self) -> None:
+        with session_scope() as session:
+            session.execute(delete(CreditLedgerEntryModel))
+            session.execute(delete(CreditBalanceModel))
+            session.execute(delete(CreditHoldModel))
+            session.execute(delete(SubscriptionEntitlementModel))
+
+        schedule = get_credit_reset_schedule()
+        self.schedule_snapshot = (
+            schedule.last_run_at,
+            schedule.next_run_at,
+            schedule.refill_mode.value,
+            schedule.reset_hour_utc,
+            schedule.reset_minute_utc,
+        )
+        self.free_target = schedule.free_daily_credits
+        self.pro_target = schedule.pro_daily_credits
+
+        grant_credits(CreditGrantRequest(user_id="reset_a_free", amount=1, reason="tests"))
+        grant_credits(CreditGrantRequest(user_id="reset_b_at_target", amount=self.free_target, reason="tests"))
+        grant_credits(CreditGrantRequest(user_id="reset_c_over", amount=self.free_target + 7, reason="tests"))
+        grant_credits(CreditGrantRequest(user_id="reset_d_inactive_pro", amount=1, reason="tests"))
+        with session_scope() as session:
+            session.add(SubscriptionEntitlementModel(user_id="reset_e_pro_no_balance", plan_id="pro", status="active"))
+            session.add(SubscriptionEntitlementModel(user_id="reset_d_inactive_pro", plan_id="pro", status="expired"))
+
+    def tearDown(self) -> None:
+        # Runs below use future dates; keep the shared schedule usable for other suites.
+        with session_scope() as session:
+            schedule = session.get(CreditResetScheduleModel, 1)
+            (
+                schedule.last_run_at,
+                schedule.next_run_at,
+                schedule.refill_mode,
+                schedule.reset_hour_utc,
+                schedule.reset_minute_utc,
+            ) = self.schedule_snapshot
+
+    def test_chunked_reset_sets_plan_targets_and_ledger(self) -> None:
+        run_at = datetime(2030, 1, 2, 0, 0, 5)
+        result = run_daily_credit_reset(run_at=run_at, chunk_size=2)
+
+        self.assertEqual(result.users_processed, 5)
+        self.assertEqual(result.balances_updated, 4)
+        self.assertEqual(result.chunks_processed, 3)
+        self.assertIsNotNone(result.users_per_second)
+
+        self.assertEqual(get_balance("reset_a_free").balance, self.free_target)
+        self.assertEqual(get_balance("reset_b_at_target").balance, self.free_target)
+        self.assertEqual(get_balance("reset_c_over").balance, self.free_target)
+        self.assertEqual(get_balance("reset_d_inactive_pro").balance, self.free_target)
+        self.assertEqual(get_balance("reset_e_pro_no_balance").balance, self.pro_target)
+
+        with session_scope() as session:
+            entry = session.execute(
+                select(CreditLedgerEntryModel).where(
+                    CreditLedgerEntryModel.idempotency_key == "daily_reset:2030-01-02:reset_e_pro_no_balance"
+                )
+            ).scalar_one()
+            self.assertEqual(entry.delta, self.pro_target)
+            self.assertEqual(entry.reason, "daily_reset")
+            self.assertEqual(entry.metadata_json, {"plan_id": "pro", "target_balance": self.pro_target})
+
+    def test_reset_is_idempotent_within_same_day(self) -> None:
+        run_at = datetime(2030, 1, 3, 0, 0, 5)
+        first = run_daily_credit_reset(run_at=run_at)
+        consume_credits(CreditConsumeRequest(user_id="reset_a_free", amount=1, reason="render_preview"))
+        second = run_daily_credit_reset(run_at=run_at)
+
+        self.assertEqual(first.balances_updated, 4)
+        self.assertEqual(second.balances_updated, 0)
+        self.assertEqual(get_balance("reset_a_free").balance, self.free_target - 1)
+
+    def test_late_tick_keys_on_schedule_reset_period(self) -> None:
+        update_credit_reset_schedule(CreditResetScheduleUpdateRequest(reset_hour_utc=6, reset_minute_utc=0))
+        # 03:00 is before the 06:00 boundary, so this run still belongs to the period that began the day before.
+        run_daily_credit_reset(run_at=datetime(2030, 1, 6, 3, 0))
+
+        update_credit_reset_schedule(CreditResetScheduleUpdateRequest(refill_mode=CreditRefillMode.lazy, enabled=True))
+        with session_scope() as session:
+            self.assertIsNone(apply_lazy_refill(session, "reset_a_free", now=datetime(2030, 1, 6, 4, 0)))
+            keys = session.execute(
+                select(CreditLedgerEntryModel.idempotency_key).where(
+                    CreditLedgerEntryModel.user_id == "reset_a_free",
+                    CreditLedgerEntryModel.reason == "daily_reset",
+                )
+            ).scalars().all()
+        self.assertEqual(keys, ["daily_reset:2030-01-05:reset_a_free"])
+
+    def test_holds_spanning_a_reset_settle_on_the_target(self) -> None:
+        released = hold_credits(CreditHoldRequest(user_id="reset_c_over", amount=2, reason="render_preview"))
+        captured = hold_credits(CreditHoldRequest(user_id="reset_b_at_target", amount=1, reason="render_preview"))
+        run_daily_credit_reset(run_at=datetime(2030, 1, 7, 0, 0, 5))
+
+        release_credit_hold(released.hold_id)
+        capture_credit_hold(captured.hold_id)
+
+        self.assertEqual(get_balance("reset_c_over").balance, self.free_target)
+        self.assertEqual(get_balance("reset_b_at_target").balance, self.free_target - 1)
+        with session_scope() as session:
+            for user_id in ("reset_c_over", "reset_b_at_target"):
+                ledger_sum = session.execute(
+                    select(func.sum(CreditLedgerEntryModel.delta)).where(CreditLedgerEntryModel.user_id == user_id)
+                ).scalar_one()
+                self.assertEqual(ledger_sum, get_balance(user_id).balance)
+
+    def test_dry_run_counts_without_writing(self) -> None:
+        result = run_daily_credit_reset(dry_run=True, run_at=datetime(2030, 1, 4, 0, 0, 5), chunk_size=3)
+
+        self.assertTrue(result.dry_run)
+        self.assertEqual(result.balances_updated, 4)
+        self.assertEqual(get_balance("reset_a_free").balance, 1)
+        with session_scope() as session:
+            self.assertIsNone(session.get(CreditBalanceModel, "reset_e_pro_no_balance"))
+
+    def test_lazy_mode_refills_on_read_and_skips_batch_tick(self) -> None:
+        update_credit_reset_schedule(CreditResetScheduleUpdateRequest(refill_mode=CreditRefillMode.lazy, enabled=True))
+
+        self.assertEqual(get_balance("reset_a_free").balance, self.free_target)
+        self.assertEqual(get_balance("reset_e_pro_no_balance").balance, self.pro_target)
+        consumed = consume_credits(CreditConsumeRequest(user_id="reset_a_free", amount=1, reason="render_preview"))
+        self.assertEqual(consumed.balance, self.free_target - 1)
+        self.assertEqual(get_balance("reset_a_free").balance, self.free_target - 1)
+
+        with session_scope() as session:
+            refills = session.execute(
+                select(CreditLedgerEntryModel).where(
+                    CreditLedgerEntryModel.user_id == "reset_a_free",
+                    CreditLedgerEntryModel.reason == "daily_reset",
+                )
+            ).scalars().all()
+            self.assertEqual(len(refills), 1)
+            self.assertEqual(refills[0].delta, self.free_target - 1)
+
+            schedule = session.get(CreditResetScheduleModel, 1)
+            schedule.next_run_at = utc_now() - timedelta(minutes=1)
+
+        tick = tick_daily_credit_reset()
+        self.assertTrue(tick.due)
+        self.assertFalse(tick.ran)
+        self.assertEqual(tick.skipped_reason, "lazy_refill_mode")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+try:
+    from sqlalchemy import delete, func, select
+
+    from app.bootstrap import init_database
+    from app.credit_store import (
+        capture_credit_hold,
+        consume_credits,
+        expire_credit_holds,
+        get_balance,
+        grant_credits,
+        hold_credits,
+        release_credit_hold,
+    )
+    from app.db import session_scope
+    from app.models import CreditBalanceModel, CreditHoldModel, CreditLedgerEntryModel
+    from app.schemas import CreditConsumeRequest, CreditGrantRequest, CreditHoldRequest, CreditHoldStatus
+    from app.time_utils import utc_now
+
+    _CREDIT_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _CREDIT_TESTS_AVAILABLE = False
+
+
+@unittest.skipUnless(_CREDIT_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+class CreditStoreTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def setUp(self) -> None:
+        with session_scope() as session:
+            session.execute(delete(CreditLedgerEntryModel))
+            session.execute(delete(CreditBalanceModel))
+            session.execute(delete(CreditHoldModel))
+
+    def _ledger_sum(self, user_id: str) -> int:
+        with session_scope() as session:
+            stmt = select(func.coalesce(func.sum(CreditLedgerEntryModel.delta), 0)).where(
+                CreditLedgerEntryModel.user_id == user_id
+            )
+            return int(session.execute(stmt).scalar_one())
+
+    def test_consume_rejects_insufficient_balance_without_ledger_entry(self) -> None:
+        grant_credits(CreditGrantRequest(user_id="credit_user_1", amount=2, reason="tests"))
+
+        with self.assertRaises(ValueError) as ctx:
+            consume_credits(CreditConsumeRequest(user_id="credit_user_1", amount=3, idempotency_key="c1_k1"))
+
+        self.assertEqual(str(ctx.exception), "insufficient_credits")
+        self.assertEqual(get_balance("credit_user_1").balance, 2)
+        self.assertEqual(self._ledger_sum("credit_user_1"), 2)
+
+    def test_consume_unknown_user_is_insufficient(self) -> None:
+        with self.assertRaises(ValueError):
+            consume_credits(CreditConsumeRequest(user_id="credit_user_missing", amount=1))
+        self.assertEqual(get_balance("credit_user_missing").balance, 0)
+
+    def test_consume_and_grant_are_idempotent(self) -> None:
+        first_grant = grant_credits(
+            CreditGrantRequest(user_id="credit_user_2", amount=5, reason="tests", idempotency_key="g_k1")
+        )
+        second_grant = grant_credits(
+            CreditGrantRequest(user_id="credit_user_2", amount=5, reason="tests", idempotency_key="g_k1")
+        )
+        first_consume = consume_credits(
+            CreditConsumeRequest(user_id="credit_user_2", amount=2, idempotency_key="c_k1")
+        )
+        second_consume = consume_credits(
+            CreditConsumeRequest(user_id="credit_user_2", amount=2, idempotency_key="c_k1")
+        )
+
+        self.assertTrue(first_grant.applied)
+        self.assertFalse(second_grant.applied)
+        self.assertTrue(first_consume.applied)
+        self.assertEqual(first_consume.balance, 3)
+        self.assertFalse(second_consume.applied)
+        self.assertEqual(second_consume.balance, 3)
+        self.assertEqual(self._ledger_sum("credit_user_2"), 3)
+
+    def test_parallel_consumes_keep_ledger_and_balance_consistent(self) -> None:
+        user_id = "credit_stress_user"
+        starting_balance = 25
+        attempts = 60
+        grant_credits(CreditGrantRequest(user_id=user_id, amount=starting_balance, reason="tests"))
+
+        def _consume(index: int) -> bool:
+            # Every third request reuses a key so idempotent replays race as well.
+            key = f"stress_replay_{index % 5}" if index % 3 == 0 else f"stress_unique_{index}"
+            try:
+                return consume_credits(
+                    CreditConsumeRequest(user_id=user_id, amount=1, reason="render_preview", idempotency_key=key)
+                ).applied
+            except ValueError:
+                return False
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(_consume, range(attempts)))
+
+        applied = sum(1 for item in results if item)
+        balance = get_balance(user_id).balance
+        with session_scope() as session:
+            consume_entries = int(
+                session.execute(
+                    select(func.count())
+                    .select_from(CreditLedgerEntryModel)
+                    .where(CreditLedgerEntryModel.user_id == user_id, CreditLedgerEntryModel.delta < 0)
+                ).scalar_one()
+            )
+
+        self.assertEqual(applied, starting_balance)
+        self.assertEqual(balance, 0)
+        self.assertEqual(consume_entries, applied)
+        self.assertEqual(self._ledger_sum(user_id), balance)
+
+    def test_hold_capture_writes_single_ledger_entry(self) -> None:
+        grant_credits(CreditGrantRequest(user_id="hold_user_1", amount=5, reason="tests"))
+
+        hold = hold_credits(CreditHoldRequest(user_id="hold_user_1", amount=2, idempotency_key="h_k1"))
+        replay = hold_credits(CreditHoldRequest(user_id="hold_user_1", amount=2, idempotency_key="h_k1"))
+        self.assertTrue(hold.applied)
+        self.assertFalse(replay.applied)
+        self.assertEqual(replay.hold_id, hold.hold_id)
+        self.assertEqual(get_balance("hold_user_1").balance, 3)
+        self.assertEqual(self._ledger_sum("hold_user_1"), 5)
+
+        self.assertTrue(capture_credit_hold(hold.hold_id).applied)
+        self.assertFalse(capture_credit_hold(hold.hold_id).applied)
+        self.assertFalse(release_credit_hold(hold.hold_id).applied)
+        self.assertEqual(get_balance("hold_user_1").balance, 3)
+        self.assertEqual(self._ledger_sum("hold_user_1"), 3)
+
+    def test_hold_release_and_expiry_return_credits_without_ledger_writes(self) -> None:
+        grant_credits(CreditGrantRequest(user_id="hold_user_2", amount=3, reason="tests"))
+
+        released = hold_credits(CreditHoldRequest(user_id="hold_user_2", amount=2))
+        with self.assertRaises(ValueError):
+            hold_credits(CreditHoldRequest(user_id="hold_user_2", amount=2))
+        self.assertTrue(release_credit_hold(released.hold_id).applied)
+        self.assertEqual(get_balance("hold_user_2").balance, 3)
+
+        expiring = hold_credits(CreditHoldRequest(user_id="hold_user_2", amount=3, ttl_seconds=1))
+        sweep = expire_credit_holds(now=utc_now() + timedelta(seconds=5), chunk_size=1)
+        self.assertEqual(sweep.expired_holds, 1)
+        self.assertEqual(sweep.credits_returned, 3)
+        self.assertFalse(capture_credit_hold(expiring.hold_id).applied)
+        self.assertEqual(get_balance("hold_user_2").balance, 3)
+
+        with session_scope() as session:
+            self.assertEqual(session.get(CreditHoldModel, expiring.hold_id).status, CreditHoldStatus.expired.value)
+            entries = session.execute(
+                select(func.count())
+                .select_from(CreditLedgerEntryModel)
+                .where(CreditLedgerEntryModel.user_id == "hold_user_2")
+            ).scalar_one()
+        self.assertEqual(entries, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
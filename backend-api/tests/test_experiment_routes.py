@@ -15,6 +15,8 @@ try:
     from app.models import (
         AdminAuditLogModel,
         AnalyticsEventModel,
+        AnalyticsHourlyRollupModel,
+        AnalyticsRollupStateModel,
         CreditLedgerEntryModel,
         ExperimentAssignmentModel,
         ExperimentModel,
@@ -37,6 +39,8 @@ class ExperimentRouteTests(unittest.TestCase):
     def setUp(self) -> None:
         with session_scope() as session:
             session.execute(delete(AnalyticsEventModel))
+            session.execute(delete(AnalyticsHourlyRollupModel))
+            session.execute(delete(AnalyticsRollupStateModel))
             session.execute(delete(CreditLedgerEntryModel))
             session.execute(delete(ExperimentAssignmentModel))
             session.execute(delete(ExperimentModel))
@@ -26,6 +26,8 @@ try:
     from app.models import (
         AdminAuditLogModel,
         AnalyticsEventModel,
+        AnalyticsHourlyRollupModel,
+        AnalyticsRollupStateModel,
         CreditLedgerEntryModel,
         ExperimentAssignmentModel,
         ExperimentModel,
@@ -55,6 +57,8 @@ class ExperimentStoreTests(unittest.TestCase):
     def setUp(self) -> None:
         with session_scope() as session:
             session.execute(delete(AnalyticsEventModel))
+            session.execute(delete(AnalyticsHourlyRollupModel))
+            session.execute(delete(AnalyticsRollupStateModel))
             session.execute(delete(CreditLedgerEntryModel))
             session.execute(delete(ExperimentAssignmentModel))
             session.execute(delete(ExperimentModel))
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import json
+import unittest
+from datetime import datetime, timedelta
+
+try:
+    from fastapi.testclient import TestClient
+    from sqlalchemy import delete
+
+    from app.bootstrap import init_database
+    from app.db import session_scope
+    from app.export_store import stream_export
+    from app.main import app
+    from app.models import AnalyticsEventModel, CreditLedgerEntryModel
+
+    _EXPORT_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _EXPORT_TESTS_AVAILABLE = False
+
+_USER_ID = "export_test_user"
+# A window no other test writes into, so exports only see rows created here.
+_SINCE = datetime(2001, 3, 1)
+_UNTIL = datetime(2001, 3, 2)
+
+
+@unittest.skipUnless(_EXPORT_TESTS_AVAILABLE, "fastapi dependency is not installed in this environment")
+class AnalyticsExportTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+        cls.client = TestClient(app)
+
+    def setUp(self) -> None:
+        self._cleanup()
+        self.addCleanup(self._cleanup)
+        with session_scope() as session:
+            # Several rows share a timestamp so pages must break ties on id.
+            for index in range(7):
+                session.add(
+                    CreditLedgerEntryModel(
+                        user_id=_USER_ID,
+                        delta=index,
+                        reason="export_test",
+                        metadata_json={"index": index},
+                        created_at=_SINCE + timedelta(minutes=index // 3),
+                    )
+                )
+            session.add(CreditLedgerEntryModel(user_id=_USER_ID, delta=99, reason="export_test", created_at=_UNTIL))
+            session.add(AnalyticsEventModel(event_name="export_test_event", user_id=_USER_ID, occurred_at=_SINCE))
+
+    def _cleanup(self) -> None:
+        with session_scope() as session:
+            session.execute(delete(CreditLedgerEntryModel).where(CreditLedgerEntryModel.user_id == _USER_ID))
+            session.execute(delete(AnalyticsEventModel).where(AnalyticsEventModel.user_id == _USER_ID))
+
+    def _ndjson(self, **kwargs) -> list[dict]:
+        body = b"".join(stream_export("credit_ledger_entries", _SINCE, _UNTIL, **kwargs))
+        return [json.loads(line) for line in body.splitlines()]
+
+    def test_keyset_pages_return_every_row_once_in_order(self) -> None:
+        paged = self._ndjson(batch_size=2)
+        self.assertEqual([row["delta"] for row in paged], list(range(7)))
+        self.assertEqual(paged, self._ndjson(batch_size=1000))
+        self.assertEqual(paged[4]["metadata_json"], {"index": 4})
+
+    def test_csv_and_gzip_output(self) -> None:
+        body = gzip.decompress(
+            b"".join(stream_export("credit_ledger_entries", _SINCE, _UNTIL, export_format="csv", compress=True))
+        )
+        rows = list(csv.DictReader(io.StringIO(body.decode("utf-8"))))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(json.loads(rows[0]["metadata_json"]), {"index": 0})
+        self.assertEqual(rows[0]["idempotency_key"], "")
+
+        empty = b"".join(stream_export("render_jobs", _SINCE, _UNTIL, export_format="csv"))
+        self.assertTrue(empty.startswith(b"id,project_id,"))
+        self.assertEqual(empty.count(b"\n"), 1)
+
+    def test_invalid_requests_raise_before_streaming(self) -> None:
+        for kwargs, code in (
+            ({"table": "auth_sessions"}, "unknown_export_table"),
+            ({"export_format": "xml"}, "unknown_export_format"),
+            ({"until": _SINCE}, "invalid_export_range"),
+        ):
+            params = {"table": "credit_ledger_entries", "since": _SINCE, "until": _UNTIL, **kwargs}
+            with self.assertRaisesRegex(ValueError, code):
+                stream_export(**params)
+
+    def test_admin_route_streams_analytics_events(self) -> None:
+        response = self.client.get(
+            "/v1/admin/export/analytics_events",
+            params={"since": "2001-03-01T00:00:00Z", "until": "2001-03-02T00:00:00Z", "gzip": "true"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/gzip")
+        self.assertNotIn("content-encoding", response.headers)
+        self.assertIn('filename="analytics_events.ndjson.gz"', response.headers["content-disposition"])
+        rows = [json.loads(line) for line in gzip.decompress(response.content).splitlines()]
+        self.assertEqual([row["event_name"] for row in rows], ["export_test_event"])
+
+        missing = self.client.get("/v1/admin/export/auth_sessions", params={"since": "2001-03-01T00:00:00"})
+        self.assertEqual(missing.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
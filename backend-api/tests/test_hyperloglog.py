@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import unittest
+
+from app.hyperloglog import HyperLogLog
+
+
+class HyperLogLogTests(unittest.TestCase):
+    def test_small_sets_are_exact(self) -> None:
+        sketch = HyperLogLog(precision=12)
+        sketch.update(["u1", "u2", "u1", "u3"])
+        self.assertTrue(sketch.is_exact)
+        self.assertEqual(sketch.count(), 3)
+
+    def test_large_sets_within_expected_error(self) -> None:
+        for precision in (12, 14):
+            sketch = HyperLogLog(precision=precision)
+            sketch.update(f"user_{index}" for index in range(50000))
+            self.assertFalse(sketch.is_exact)
+            # Three standard errors of 1.04 / sqrt(m).
+            tolerance = 3 * 1.04 / (2 ** (precision / 2))
+            self.assertLessEqual(abs(sketch.count() - 50000) / 50000, tolerance, f"precision={precision}")
+
+    def test_merge_matches_union_across_precisions(self) -> None:
+        hourly = []
+        for hour in range(6):
+            sketch = HyperLogLog(precision=12 if hour % 2 else 14)
+            # Overlapping user ranges: 3000 users per hour, 13000 distinct overall.
+            sketch.update(f"user_{index}" for index in range(hour * 2000, hour * 2000 + 3000))
+            hourly.append(sketch)
+
+        merged = HyperLogLog(precision=14)
+        for sketch in hourly:
+            merged.merge(sketch)
+        self.assertEqual(merged.precision, 12)
+        self.assertLessEqual(abs(merged.count() - 13000) / 13000, 3 * 1.04 / 64)
+
+    def test_json_round_trip(self) -> None:
+        small = HyperLogLog()
+        small.update(["a", "b"])
+        large = HyperLogLog()
+        large.update(str(index) for index in range(5000))
+        for sketch in (small, large):
+            restored = HyperLogLog.from_json(sketch.to_json())
+            self.assertEqual(restored.count(), sketch.count())
+            self.assertEqual(restored.is_exact, sketch.is_exact)
+
+
+if __name__ == "__main__":
+    unittest.main()
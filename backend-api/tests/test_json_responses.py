@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import unittest
+
+try:
+    from fastapi import APIRouter, FastAPI
+    from fastapi.testclient import TestClient
+    from pydantic import BaseModel
+
+    from app.json_responses import FastJSONResponse, ModelResponseRoute
+
+    _JSON_RESPONSE_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _JSON_RESPONSE_TESTS_AVAILABLE = False
+
+
+if _JSON_RESPONSE_TESTS_AVAILABLE:
+
+    class _Item(BaseModel):
+        item_id: str
+        score: float
+
+    class _PrivateItem(_Item):
+        secret: str
+
+    def _build_client() -> TestClient:
+        router = APIRouter(route_class=ModelResponseRoute)
+
+        @router.get("/item", response_model=_Item, status_code=202)
+        async def get_item() -> _Item:
+            return _Item(item_id="a", score=1.5)
+
+        @router.get("/items", response_model=list[_Item])
+        def list_items() -> list[_Item]:
+            return [_Item(item_id="a", score=1.0), _Item(item_id="b", score=2.0)]
+
+        @router.get("/private", response_model=_Item)
+        async def get_private_item() -> _Item:
+            return _PrivateItem(item_id="a", score=1.0, secret="hidden")
+
+        @router.get("/dict", response_model=_Item)
+        async def get_item_dict() -> dict:
+            return {"item_id": "a", "score": "2.5"}
+
+        app = FastAPI(default_response_class=FastJSONResponse)
+        app.include_router(router)
+        return TestClient(app)
+
+
+@unittest.skipUnless(_JSON_RESPONSE_TESTS_AVAILABLE, "fastapi dependency is not installed in this environment")
+class JsonResponseTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.client = _build_client()
+
+    def test_matching_models_keep_status_code_and_payload(self) -> None:
+        single = self.client.get("/item")
+        self.assertEqual(single.status_code, 202)
+        self.assertEqual(single.headers["content-type"], "application/json")
+        self.assertEqual(single.json(), {"item_id": "a", "score": 1.5})
+
+        many = self.client.get("/items")
+        self.assertEqual(many.json(), [{"item_id": "a", "score": 1.0}, {"item_id": "b", "score": 2.0}])
+
+    def test_other_results_still_go_through_response_model(self) -> None:
+        self.assertEqual(self.client.get("/private").json(), {"item_id": "a", "score": 1.0})
+        self.assertEqual(self.client.get("/dict").json(), {"item_id": "a", "score": 2.5})
+
+
+if __name__ == "__main__":
+    unittest.main()
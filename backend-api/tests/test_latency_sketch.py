@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import random
+import unittest
+
+from app.latency_sketch import LatencySketch
+
+_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+def _exact_quantile(values: list[int], q: float) -> float:
+    ordered = sorted(values)
+    return float(ordered[int(round((len(ordered) - 1) * q))])
+
+
+class LatencySketchTests(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = random.Random(44)
+        # Long-tailed render latencies: most jobs around a second, a few tens of seconds.
+        self.values = [int(rng.lognormvariate(7.0, 0.9)) for _ in range(20000)]
+
+    def test_quantiles_within_relative_accuracy_of_exact(self) -> None:
+        sketch = LatencySketch(relative_accuracy=0.01)
+        sketch.extend(self.values)
+        self.assertFalse(sketch.is_exact)
+        for q in _QUANTILES:
+            exact = _exact_quantile(self.values, q)
+            estimate = sketch.quantile(q)
+            self.assertLessEqual(abs(estimate - exact) / exact, 0.011, f"q={q}")
+
+    def test_merged_sketches_match_single_sketch(self) -> None:
+        whole = LatencySketch()
+        whole.extend(self.values)
+
+        merged = LatencySketch()
+        for start in range(0, len(self.values), 1500):
+            part = LatencySketch()
+            part.extend(self.values[start : start + 1500])
+            merged.merge(part)
+
+        self.assertEqual(merged.count, whole.count)
+        for q in _QUANTILES:
+            self.assertEqual(merged.quantile(q), whole.quantile(q))
+
+    def test_json_round_trip_and_small_samples_stay_exact(self) -> None:
+        small = LatencySketch()
+        small.extend([900, 1200, 3000, 800])
+        self.assertTrue(small.is_exact)
+        self.assertEqual(small.quantile(0.95), _exact_quantile([900, 1200, 3000, 800], 0.95))
+
+        large = LatencySketch()
+        large.extend(self.values)
+        for sketch in (small, large):
+            restored = LatencySketch.from_json(sketch.to_json())
+            self.assertEqual(restored.count, sketch.count)
+            self.assertEqual(restored.quantile(0.99), sketch.quantile(0.99))
+
+    def test_merge_rejects_mismatched_accuracy(self) -> None:
+        coarse = LatencySketch(relative_accuracy=0.05)
+        coarse.extend(self.values[:200])
+        fine = LatencySketch(relative_accuracy=0.01)
+        with self.assertRaises(ValueError):
+            fine.merge(coarse)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import unittest
+from datetime import timedelta
+from app.time_utils import utc_now
+
+try:
+    from sqlalchemy import delete, desc, func, inspect, select, text
+
+    from app.bootstrap import init_database
+    from app.db import engine, session_scope
+    from app.migrations import MIGRATIONS, apply_migrations, get_migration_status
+    from app.models import (
+        AdminAuditLogModel,
+        AnalyticsEventModel,
+        CreditLedgerEntryModel,
+        RenderJobModel,
+        SchemaMigrationModel,
+        UserProjectModel,
+    )
+
+    _MIGRATION_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _MIGRATION_TESTS_AVAILABLE = False
+
+
+def _query_plan(stmt) -> str:
+    """Return the planner output for a SQLAlchemy statement as one lowercase string."""
+    compiled = stmt.compile(dialect=engine.dialect, compile_kwargs={"render_postcompile": True})
+    with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            params = tuple(compiled.params[name] for name in compiled.positiontup)
+            rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+            return "\n".join(str(row[-1]) for row in rows).lower()
+
+        # Tiny test tables would otherwise always be seq-scanned on Postgres.
+        connection.execute(text("SET enable_seqscan = off"))
+        rows = connection.exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).all()
+        return "\n".join(str(row[0]) for row in rows).lower()
+
+
+@unittest.skipUnless(_MIGRATION_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+class SchemaMigrationTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def test_apply_migrations_is_idempotent(self) -> None:
+        self.assertEqual(apply_migrations(engine), [])
+        status = get_migration_status(engine)
+        self.assertEqual(status["pending_versions"], [])
+        self.assertEqual(status["current_version"], max(item.version for item in MIGRATIONS))
+
+    def test_missing_index_on_existing_table_is_created_by_migration(self) -> None:
+        with engine.begin() as connection:
+            connection.execute(text("DROP INDEX IF EXISTS ix_render_jobs_project_style_tier_status"))
+            connection.execute(delete(SchemaMigrationModel).where(SchemaMigrationModel.version == 1))
+
+        index_names = {item["name"] for item in inspect(engine).get_indexes("render_jobs")}
+        self.assertNotIn("ix_render_jobs_project_style_tier_status", index_names)
+
+        self.assertEqual(apply_migrations(engine), [1])
+        index_names = {item["name"] for item in inspect(engine).get_indexes("render_jobs")}
+        self.assertIn("ix_render_jobs_project_style_tier_status", index_names)
+
+    def test_hot_queries_use_composite_indexes(self) -> None:
+        window_start = utc_now() - timedelta(hours=24)
+        cases = {
+            "ix_render_jobs_project_style_tier_status": select(RenderJobModel.id)
+            .where(
+                RenderJobModel.project_id == "p1",
+                RenderJobModel.style_id == "modern",
+                RenderJobModel.tier == "preview",
+                RenderJobModel.status == "completed",
+            )
+            .limit(1),
+            "ix_render_jobs_project_id_updated_at": select(RenderJobModel)
+            .where(RenderJobModel.project_id == "p1")
+            .order_by(desc(RenderJobModel.updated_at))
+            .limit(1),
+            "ix_render_jobs_status_updated_at": select(func.count())
+            .select_from(RenderJobModel)
+            .where(RenderJobModel.status == "failed", RenderJobModel.updated_at >= window_start),
+            "ix_analytics_events_occurred_at": select(AnalyticsEventModel).where(
+                AnalyticsEventModel.occurred_at >= window_start
+            ),
+            "ix_analytics_events_created_at": select(AnalyticsEventModel).where(
+                AnalyticsEventModel.created_at >= window_start
+            ),
+            "ix_analytics_events_user_id_occurred_at": select(AnalyticsEventModel).where(
+                AnalyticsEventModel.user_id.in_(["u1", "u2", "u3"]),
+                AnalyticsEventModel.occurred_at >= window_start,
+            ),
+            "ix_credit_ledger_entries_user_id_created_at": select(CreditLedgerEntryModel).where(
+                CreditLedgerEntryModel.user_id.in_(["u1", "u2"]),
+                CreditLedgerEntryModel.created_at >= window_start,
+            ),
+            "ix_credit_ledger_entries_created_at": select(CreditLedgerEntryModel).where(
+                CreditLedgerEntryModel.created_at >= window_start
+            ),
+            "ix_user_projects_user_id_updated_at": select(UserProjectModel)
+            .where(UserProjectModel.user_id == "u1")
+            .order_by(desc(UserProjectModel.updated_at))
+            .limit(30),
+            "ix_admin_audit_logs_domain_created_at": select(AdminAuditLogModel)
+            .where(AdminAuditLogModel.domain == "product")
+            .order_by(desc(AdminAuditLogModel.created_at))
+            .limit(100),
+        }
+
+        for index_name, stmt in cases.items():
+            with self.subTest(index=index_name):
+                self.assertIn(index_name, _query_plan(stmt))
+
+
+if __name__ == "__main__":
+    unittest.main()
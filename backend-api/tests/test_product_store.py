@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import unittest
+
+try:
+    from app.bootstrap import init_database
+    from app.product_store import (
+        delete_style,
+        get_catalog_generation,
+        get_style,
+        list_active_styles,
+        list_styles,
+        upsert_style,
+    )
+    from app.schemas import AdminActionRequest, StyleUpsertRequest
+
+    _PRODUCT_STORE_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _PRODUCT_STORE_TESTS_AVAILABLE = False
+
+
+@unittest.skipUnless(_PRODUCT_STORE_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+class CatalogCacheTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def setUp(self) -> None:
+        self.action = AdminActionRequest(actor="tests", reason="catalog cache")
+
+    def tearDown(self) -> None:
+        delete_style("qa_cache_style", self.action)
+
+    def _upsert(self, display_name: str, is_active: bool) -> None:
+        upsert_style(
+            "qa_cache_style",
+            StyleUpsertRequest(
+                display_name=display_name,
+                prompt="Cache test interior.",
+                thumbnail_url="https://picsum.photos/id/1084/900/900",
+                is_active=is_active,
+                sort_order=1,
+            ),
+            self.action,
+        )
+
+    def test_reads_are_served_from_snapshot_until_a_write(self) -> None:
+        first = get_style("modern")
+        self.assertIsNotNone(first)
+        self.assertIs(get_style("modern"), first)
+
+        generation = get_catalog_generation()
+        self._upsert("QA Cache Style", is_active=True)
+        self.assertGreater(get_catalog_generation(), generation)
+        self.assertEqual(get_style("qa_cache_style").display_name, "QA Cache Style")
+        self.assertEqual(list_active_styles()[0].style_id, "qa_cache_style")
+
+        self._upsert("QA Cache Style Hidden", is_active=False)
+        self.assertNotIn("qa_cache_style", {style.style_id for style in list_active_styles()})
+        self.assertIn("qa_cache_style", {style.style_id for style in list_styles()})
+
+        delete_style("qa_cache_style", self.action)
+        self.assertIsNone(get_style("qa_cache_style"))
+
+    def test_returned_lists_do_not_alias_the_snapshot(self) -> None:
+        styles = list_active_styles()
+        styles.clear()
+        self.assertGreaterEqual(len(list_active_styles()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
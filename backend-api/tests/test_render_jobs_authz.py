@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import unittest
+from contextlib import ExitStack
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
 
 try:
     from fastapi.testclient import TestClient
-    from sqlalchemy import delete
+    from sqlalchemy import delete, select
 
     from app.bootstrap import init_database
+    from app.credit_store import capture_credit_hold, consume_credits, expire_credit_holds, get_balance
     from app.db import session_scope
     from app.main import app
+    from app.providers.registry import get_provider_registry
+    from app.schemas import CreditConsumeRequest
+    from app.time_utils import utc_now
     from app.models import AuthSessionModel, CreditBalanceModel, CreditLedgerEntryModel, RenderJobModel, UserProjectModel
 
     _RENDER_AUTH_TESTS_AVAILABLE = True
@@ -124,6 +131,68 @@ class RenderJobsAuthzTests(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json()["detail"], "image_url_non_public_target")
 
+    def test_render_job_charges_credits_when_hold_expires_mid_dispatch(self) -> None:
+        token = self._login("render_hold_expired")
+        self._grant_credits("render_hold_expired", token)
+
+        def expire_then_capture(hold_id: str):
+            expire_credit_holds(now=utc_now() + timedelta(days=2))
+            return capture_credit_hold(hold_id)
+
+        with patch("app.routes.render_jobs.capture_credit_hold", side_effect=expire_then_capture):
+            self._create_preview_job("render_hold_expired", token, "render_hold_project")
+
+        with session_scope() as session:
+            spends = session.execute(
+                select(CreditLedgerEntryModel.delta).where(
+                    CreditLedgerEntryModel.user_id == "render_hold_expired",
+                    CreditLedgerEntryModel.reason == "render_preview",
+                )
+            ).scalars().all()
+        self.assertEqual(len(spends), 1)
+        self.assertEqual(get_balance("render_hold_expired").balance, 20 + spends[0])
+
+    def test_render_job_is_canceled_and_failed_when_expired_hold_cannot_be_charged(self) -> None:
+        token = self._login("render_hold_broke")
+        self._grant_credits("render_hold_broke", token)
+
+        def expire_spend_then_capture(hold_id: str):
+            expire_credit_holds(now=utc_now() + timedelta(days=2))
+            # The returned credits are spent elsewhere before the render settles.
+            consume_credits(CreditConsumeRequest(user_id="render_hold_broke", amount=20, reason="tests"))
+            return capture_credit_hold(hold_id)
+
+        cancel = AsyncMock(return_value=True)
+        with ExitStack() as stack:
+            stack.enter_context(
+                patch("app.routes.render_jobs.capture_credit_hold", side_effect=expire_spend_then_capture)
+            )
+            for provider in get_provider_registry().values():
+                stack.enter_context(patch.object(type(provider), "cancel", cancel))
+            response = self.client.post(
+                "/v1/ai/render-jobs",
+                headers={"Authorization": f"Bearer {token}"},
+                json={
+                    "user_id": "render_hold_broke",
+                    "platform": "tests",
+                    "project_id": "render_hold_broke_project",
+                    "image_url": "https://8.8.8.8/demo.jpg",
+                    "style_id": "modern",
+                    "operation": "restyle",
+                    "tier": "preview",
+                    "target_parts": ["full_room"],
+                    "prompt_overrides": {},
+                },
+            )
+
+        self.assertEqual(response.status_code, 402)
+        cancel.assert_awaited_once()
+        with session_scope() as session:
+            (job,) = session.execute(
+                select(RenderJobModel).where(RenderJobModel.project_id == "render_hold_broke_project")
+            ).scalars().all()
+            self.assertEqual((job.status, job.error_code, job.output_url), ("failed", "insufficient_credits", None))
+
 
 if __name__ == "__main__":
     unittest.main()
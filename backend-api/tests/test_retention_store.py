@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import unittest
+from datetime import timedelta
+
+try:
+    from sqlalchemy import delete, func, select
+
+    from app.bootstrap import init_database
+    from app.db import session_scope
+    from app.models import AnalyticsEventModel, AuthSessionModel
+    from app.retention_store import get_last_retention_run, run_retention
+    from app.time_utils import utc_now
+
+    _RETENTION_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _RETENTION_TESTS_AVAILABLE = False
+
+
+@unittest.skipUnless(_RETENTION_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+class RetentionStoreTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def setUp(self) -> None:
+        now = utc_now()
+        with session_scope() as session:
+            session.execute(delete(AnalyticsEventModel).where(AnalyticsEventModel.event_name == "retention_test"))
+            session.execute(delete(AuthSessionModel).where(AuthSessionModel.user_id == "retention_user"))
+            for days_ago in (200, 150, 120, 91, 10):
+                session.add(
+                    AnalyticsEventModel(event_name="retention_test", occurred_at=now - timedelta(days=days_ago))
+                )
+            session.add(
+                AuthSessionModel(
+                    token="dev_retention_expired",
+                    user_id="retention_user",
+                    created_at=now - timedelta(days=40),
+                    expires_at=now - timedelta(days=10),
+                )
+            )
+            session.add(
+                AuthSessionModel(
+                    token="dev_retention_active",
+                    user_id="retention_user",
+                    created_at=now,
+                    expires_at=now + timedelta(days=1),
+                )
+            )
+
+    def _count(self, model, *conditions) -> int:
+        with session_scope() as session:
+            return int(session.execute(select(func.count()).select_from(model).where(*conditions)).scalar_one())
+
+    def test_dry_run_counts_and_real_run_purges_in_chunks(self) -> None:
+        tables = ["analytics_events", "auth_sessions"]
+        preview = run_retention(dry_run=True, tables=tables, chunk_size=2)
+        by_table = {item.table: item for item in preview.tables}
+        self.assertGreaterEqual(by_table["analytics_events"].rows_purged, 4)
+        self.assertEqual(self._count(AnalyticsEventModel, AnalyticsEventModel.event_name == "retention_test"), 5)
+
+        result = run_retention(tables=tables, chunk_size=2)
+        by_table = {item.table: item for item in result.tables}
+        self.assertEqual(set(by_table), set(tables))
+        self.assertGreaterEqual(by_table["analytics_events"].chunks, 2)
+        self.assertEqual(result.total_rows_purged, sum(item.rows_purged for item in result.tables))
+        self.assertIs(get_last_retention_run(), result)
+
+        self.assertEqual(self._count(AnalyticsEventModel, AnalyticsEventModel.event_name == "retention_test"), 1)
+        remaining = self._rows(select(AuthSessionModel.token).where(AuthSessionModel.user_id == "retention_user"))
+        remaining_tokens = {token for (token,) in remaining}
+        self.assertEqual(remaining_tokens, {"dev_retention_active"})
+
+    def _rows(self, stmt):
+        with session_scope() as session:
+            return session.execute(stmt).all()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -59,6 +59,10 @@ class SessionBootstrapRouteTests(unittest.TestCase):
         self.assertIn("default_provider", payload["provider_defaults"])
         self.assertIn("fallback_chain", payload["provider_defaults"])
 
+        server_timing = response.headers.get("server-timing", "")
+        for section in ("auth", "profile", "board", "experiments", "config", "total"):
+            self.assertIn(f"{section};dur=", server_timing)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import unittest
+from unittest.mock import patch
+
+try:
+    from app.bootstrap import init_database
+    from app.db import session_scope
+    from app.models import ProviderSettingsStateModel
+    from app.providers.registry import get_provider_registry
+    from app.schemas import AdminActionRequest
+    from app import settings_store
+    from app.settings_store import (
+        get_provider_settings,
+        get_provider_settings_meta,
+        invalidate_provider_settings_cache,
+        publish_provider_settings,
+    )
+
+    _SETTINGS_STORE_TESTS_AVAILABLE = True
+except ModuleNotFoundError:
+    _SETTINGS_STORE_TESTS_AVAILABLE = False
+
+
+@unittest.skipUnless(_SETTINGS_STORE_TESTS_AVAILABLE, "sqlalchemy dependency is not installed in this environment")
+class ProviderSettingsCacheTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        init_database()
+
+    def setUp(self) -> None:
+        invalidate_provider_settings_cache()
+
+    def test_publish_invalidates_cached_settings(self) -> None:
+        first = get_provider_settings()
+        self.assertIs(get_provider_settings(), first)
+        version_before = get_provider_settings_meta()["current_version"]
+
+        summary = publish_provider_settings(
+            set(get_provider_registry().keys()),
+            AdminActionRequest(actor="tests", reason="cache invalidation"),
+        )
+
+        self.assertEqual(get_provider_settings_meta()["current_version"], summary.version)
+        self.assertEqual(summary.version, version_before + 1)
+        self.assertIsNot(get_provider_settings(), first)
+
+    def test_version_probe_picks_up_other_worker_publish(self) -> None:
+        version_before = get_provider_settings_meta()["current_version"]
+        with session_scope() as session:
+            # Simulates a publish from another process, which cannot clear this cache.
+            state = session.get(ProviderSettingsStateModel, 1)
+            state.current_version = version_before + 1
+
+        self.assertEqual(get_provider_settings_meta()["current_version"], version_before)
+        with patch.object(settings_store, "_SETTINGS_VERSION_CHECK_SECONDS", 0.0):
+            self.assertEqual(get_provider_settings_meta()["current_version"], version_before + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
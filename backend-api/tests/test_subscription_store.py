@@ -2,11 +2,13 @@ from __future__ import annotations
 
 import os
 import unittest
+from datetime import timedelta
 from unittest.mock import patch
 
 try:
     from sqlalchemy import delete
 
+    from app import cache_bus
     from app.bootstrap import init_database
     from app.db import session_scope
     from app.models import SubscriptionEntitlementModel, SubscriptionWebhookEventModel
@@ -27,6 +29,7 @@ try:
         handle_web_billing_webhook,
         upsert_entitlement,
     )
+    from app.time_utils import utc_now
 
     _SUBSCRIPTION_TESTS_AVAILABLE = True
 except ModuleNotFoundError:
@@ -43,11 +46,57 @@ class SubscriptionStoreTests(unittest.TestCase):
         with session_scope() as session:
             session.execute(delete(SubscriptionEntitlementModel))
             session.execute(delete(SubscriptionWebhookEventModel))
+        cache_bus._dispatch(cache_bus.TOPIC_ENTITLEMENTS, None)
         os.environ.pop("WEB_BILLING_WEBHOOK_SECRET", None)
         os.environ.pop("STOREKIT_WEBHOOK_SECRET", None)
         os.environ.pop("GOOGLE_PLAY_WEBHOOK_SECRET", None)
         os.environ.pop("APP_ENV", None)
 
+    def test_entitlement_cache_is_updated_in_place_and_bounded_by_expiry(self) -> None:
+        self.assertEqual(get_entitlement("cache-user-1").plan_id, "free")
+
+        upsert_entitlement(
+            "cache-user-1",
+            SubscriptionEntitlementUpsertRequest(
+                plan_id="pro",
+                status=SubscriptionStatus.active,
+                source=SubscriptionSource.manual,
+                expires_at=utc_now() + timedelta(hours=1),
+            ),
+        )
+        cached = get_entitlement("cache-user-1")
+        self.assertEqual(cached.plan_id, "pro")
+        with session_scope() as session:
+            session.execute(delete(SubscriptionEntitlementModel))
+        self.assertIs(get_entitlement("cache-user-1"), cached)
+
+        upsert_entitlement(
+            "cache-user-2",
+            SubscriptionEntitlementUpsertRequest(
+                plan_id="pro",
+                status=SubscriptionStatus.active,
+                source=SubscriptionSource.manual,
+                expires_at=utc_now() - timedelta(seconds=1),
+            ),
+        )
+        with session_scope() as session:
+            session.get(SubscriptionEntitlementModel, "cache-user-2").plan_id = "free"
+        # Already past expires_at, so nothing was cached and the read goes to the DB.
+        self.assertEqual(get_entitlement("cache-user-2").plan_id, "free")
+
+    def test_upsert_accepts_timezone_aware_expires_at(self) -> None:
+        entitlement = upsert_entitlement(
+            "cache-user-tz",
+            SubscriptionEntitlementUpsertRequest(
+                plan_id="pro",
+                status=SubscriptionStatus.active,
+                source=SubscriptionSource.manual,
+                expires_at="2030-01-01T00:00:00Z",
+            ),
+        )
+        self.assertEqual(entitlement.plan_id, "pro")
+        self.assertEqual(get_entitlement("cache-user-tz").plan_id, "pro")
+
     def test_create_web_checkout_session_returns_checkout_url(self) -> None:
         session_data = create_web_checkout_session(
             WebCheckoutSessionRequest(